@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Artifact Catalog
+SQLite index of every run's video and sidecar files (sizes, durations,
+delivery URLs), so status and retention never have to scan the output folder.
+"""
+
+import os
+import struct
+from datetime import datetime
+from typing import Dict, List, Optional
+from config_free import FreeConfig
+from logger import get_logger
+from sqlite_store import connect
+
+logger = get_logger(__name__)
+
+# Sidecar files written next to a run's video, by kind
+SIDECAR_SUFFIXES = {
+    "metadata": "_metadata.json",
+    "instructions": "_upload_instructions.txt",
+    "delivery_manifest": "_delivery.json",
+}
+
+# Deliveries still in flight - retention never removes these runs
+ACTIVE_DELIVERY = ("pending", "retrying")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_path TEXT NOT NULL UNIQUE,
+    topic TEXT,
+    duration_seconds REAL,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    delivery_method TEXT,
+    delivery_status TEXT,
+    video_url TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    created_at TEXT NOT NULL,
+    deleted_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_status_created ON runs(status, created_at);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    url TEXT,
+    sha256 TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_run ON artifacts(run_id);
+CREATE TABLE IF NOT EXISTS catalog_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    active_runs INTEGER NOT NULL DEFAULT 0,
+    active_bytes INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO catalog_stats (id, active_runs, active_bytes) VALUES (1, 0, 0);
+"""
+
+
+def mp4_duration(path: str) -> Optional[float]:
+    """Duration from the MP4 `mvhd` box - reads a few headers, not the stream"""
+    try:
+        with open(path, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            while f.tell() < end:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                size, box = struct.unpack(">I4s", header)
+                if size == 1:
+                    size = struct.unpack(">Q", f.read(8))[0] - 8
+                elif size == 0:
+                    size = end - f.tell() + 8
+                if box == b"moov":
+                    end = f.tell() + size - 8  # descend into moov
+                    continue
+                if box == b"mvhd":
+                    version = f.read(4)[0]
+                    if version == 1:
+                        _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+                    else:
+                        _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+                    return duration / timescale if timescale else None
+                f.seek(size - 8, os.SEEK_CUR)
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
+
+class ArtifactCatalog:
+    """Runs and their files, with running totals for O(log n) status and retention"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or FreeConfig.CATALOG_DB_PATH
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def sidecar_paths(video_path: str) -> Dict[str, str]:
+        stem = os.path.splitext(video_path)[0]
+        return {kind: stem + suffix for kind, suffix in SIDECAR_SUFFIXES.items()}
+
+    def register_run(self, video_path: str, topic: Optional[str] = None,
+                     duration_seconds: Optional[float] = None, created_at: Optional[datetime] = None) -> int:
+        """Record a finished render and whichever of its sidecars exist"""
+        if duration_seconds is None:
+            duration_seconds = mp4_duration(video_path)
+        created = (created_at or datetime.now()).isoformat()
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO runs (video_path, topic, duration_seconds, created_at) VALUES (?, ?, ?, ?)",
+                (video_path, topic, duration_seconds, created),
+            )
+            if cur.rowcount:
+                run_id = cur.lastrowid
+                conn.execute("UPDATE catalog_stats SET active_runs = active_runs + 1 WHERE id = 1")
+            else:
+                run_id = conn.execute("SELECT id FROM runs WHERE video_path = ?", (video_path,)).fetchone()["id"]
+            self._add_artifact(conn, run_id, "video", video_path)
+            for kind, path in self.sidecar_paths(video_path).items():
+                self._add_artifact(conn, run_id, kind, path)
+            conn.execute("COMMIT")
+        return run_id
+
+    def _add_artifact(self, conn, run_id: int, kind: str, path: str, url: Optional[str] = None,
+                      sha256: Optional[str] = None):
+        """Insert or refresh one file, keeping run and catalog byte totals in step"""
+        if not os.path.exists(path):
+            return
+        size = os.path.getsize(path)
+        row = conn.execute("SELECT bytes FROM artifacts WHERE path = ?", (path,)).fetchone()
+        delta = size - (row["bytes"] if row else 0)
+        if row:
+            conn.execute("UPDATE artifacts SET bytes = ?, url = COALESCE(?, url), sha256 = COALESCE(?, sha256) "
+                         "WHERE path = ?", (size, url, sha256, path))
+        else:
+            conn.execute("INSERT INTO artifacts (run_id, kind, path, bytes, url, sha256, created_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (run_id, kind, path, size, url, sha256, datetime.now().isoformat()))
+        if delta:
+            conn.execute("UPDATE runs SET total_bytes = total_bytes + ? WHERE id = ?", (delta, run_id))
+            conn.execute("UPDATE catalog_stats SET active_bytes = active_bytes + ? WHERE id = 1", (delta,))
+
+    def record_delivery(self, video_path: str, manifest_path: str, manifest: Dict):
+        """Update a run from its delivery manifest (status, URLs, checksums)"""
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            run = conn.execute("SELECT id FROM runs WHERE video_path = ? AND status = 'active'",
+                               (video_path,)).fetchone()
+            if run is None:
+                conn.execute("COMMIT")
+                return
+            conn.execute("UPDATE runs SET delivery_method = ?, delivery_status = ?, video_url = ? WHERE id = ?",
+                         (manifest.get("method"), manifest.get("status"), manifest.get("video_url"), run["id"]))
+            self._add_artifact(conn, run["id"], "video", video_path,
+                               manifest.get("video_url"), manifest.get("video_sha256"))
+            instructions = self.sidecar_paths(video_path)["instructions"]
+            self._add_artifact(conn, run["id"], "instructions", instructions,
+                               manifest.get("instructions_url"), manifest.get("instructions_sha256"))
+            self._add_artifact(conn, run["id"], "delivery_manifest", manifest_path)
+            conn.execute("COMMIT")
+
+    def latest_run(self) -> Optional[Dict]:
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT * FROM runs WHERE status = 'active' "
+                               "ORDER BY created_at DESC LIMIT 1").fetchone()
+            return dict(row) if row else None
+
+    def stats(self) -> Dict:
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT active_runs, active_bytes FROM catalog_stats WHERE id = 1").fetchone()
+            return {"runs": row["active_runs"], "bytes": row["active_bytes"]}
+
+    def artifacts(self, video_path: str) -> List[Dict]:
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT a.* FROM artifacts a JOIN runs r ON r.id = a.run_id "
+                                "WHERE r.video_path = ? ORDER BY a.id", (video_path,)).fetchall()
+            return [dict(row) for row in rows]
+
+    def enforce_retention(self, keep_count: Optional[int] = None, max_bytes: Optional[int] = None) -> List[str]:
+        """Delete the oldest runs until both the count and the byte budget hold
+
+        Runs with a delivery still in flight are kept. Returns removed video paths.
+        """
+        keep_count = FreeConfig.KEEP_VIDEO_COUNT if keep_count is None else keep_count
+        max_bytes = FreeConfig.OUTPUT_MAX_BYTES if max_bytes is None else max_bytes
+        removed = []
+        while True:
+            with connect(self.db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                stats = conn.execute("SELECT active_runs, active_bytes FROM catalog_stats WHERE id = 1").fetchone()
+                over_count = stats["active_runs"] > keep_count
+                over_bytes = bool(max_bytes) and stats["active_bytes"] > max_bytes
+                run = None
+                if over_count or over_bytes:
+                    run = conn.execute(
+                        "SELECT id, video_path, total_bytes FROM runs WHERE status = 'active' "
+                        "AND COALESCE(delivery_status, '') NOT IN (?, ?) ORDER BY created_at LIMIT 1",
+                        ACTIVE_DELIVERY,
+                    ).fetchone()
+                if run is None:
+                    conn.execute("COMMIT")
+                    return removed
+                paths = self._mark_deleted(conn, run)
+                conn.execute("COMMIT")
+            self._remove_files(paths)
+            removed.append(run["video_path"])
+            logger.info(f"Cleaned up old run: {run['video_path']} ({run['total_bytes'] / 1e6:.1f}MB)")
+
+    def discard_run(self, video_path: str) -> bool:
+        """Delete one run and its files now (e.g. a staged video that was re-produced)"""
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            run = conn.execute("SELECT id, video_path, total_bytes FROM runs WHERE video_path = ? "
+                               "AND status = 'active'", (video_path,)).fetchone()
+            paths = self._mark_deleted(conn, run) if run else []
+            conn.execute("COMMIT")
+        self._remove_files(paths)
+        return run is not None
+
+    @staticmethod
+    def _mark_deleted(conn, run) -> List[str]:
+        """Flag a run deleted and take it out of the totals; returns its file paths"""
+        paths = [row["path"] for row in conn.execute("SELECT path FROM artifacts WHERE run_id = ?", (run["id"],))]
+        conn.execute("UPDATE runs SET status = 'deleted', deleted_at = ? WHERE id = ?",
+                     (datetime.now().isoformat(), run["id"]))
+        conn.execute("UPDATE catalog_stats SET active_runs = active_runs - 1, "
+                     "active_bytes = active_bytes - ? WHERE id = 1", (run["total_bytes"],))
+        return paths
+
+    @staticmethod
+    def _remove_files(paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove {path}: {e}")
+
+    def adopt_existing(self, output_dir: str) -> int:
+        """One-time import of videos rendered before the catalog existed"""
+        if not os.path.isdir(output_dir):
+            return 0
+        with connect(self.db_path) as conn:
+            if conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone():
+                return 0
+        adopted = 0
+        for name in sorted(os.listdir(output_dir)):
+            if name.endswith((".mp4", ".avi", ".mov")) and not name.endswith("_email.mp4"):
+                path = os.path.join(output_dir, name)
+                self.register_run(path, created_at=datetime.fromtimestamp(os.path.getmtime(path)))
+                adopted += 1
+        if adopted:
+            logger.info(f"Catalogued {adopted} existing videos from {output_dir}")
+        return adopted
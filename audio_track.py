@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Narration Audio Track
+Reads MP3 durations from the frame headers (no decoding, no ffmpeg process) and
+joins the per-segment narration clips into one track by copying their frames,
+with silent frames standing in for segments whose audio is missing. The
+encoder then opens a single audio file per video instead of one per segment.
+"""
+
+import os
+import math
+import subprocess
+from typing import Dict, Iterator, List, Optional, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bitrates in kbps by (MPEG-1?, layer), indexed by the header's bitrate index
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+
+def parse_header(header: bytes) -> Optional[Dict]:
+    """Fields of a 4-byte MPEG audio frame header, or None if it is not one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3
+    layer = 4 - ((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free-format bitrate (frame length unknown)
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 3 and not mpeg1 else 1152
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        "version": version,
+        "layer": layer,
+        "sample_rate": sample_rate,
+        "channels": 1 if header[3] >> 6 == 3 else 2,
+        "bitrate": bitrate,
+        "samples": samples,
+        "length": length,
+    }
+
+
+def _id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def _is_info_frame(data: bytes, offset: int, frame: Dict) -> bool:
+    """Xing/Info/VBRI frames carry the file's frame count, not audio"""
+    if frame["layer"] != 3:
+        return False
+    side_info = (17 if frame["channels"] == 1 else 32) if frame["version"] == 3 else \
+        (9 if frame["channels"] == 1 else 17)
+    tag = data[offset + 4 + side_info:offset + 8 + side_info]
+    return tag in (b"Xing", b"Info") or data[offset + 36:offset + 40] == b"VBRI"
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, Dict]]:
+    """(offset, header fields) of each audio frame, skipping tags, info frames and junk"""
+    offset = _id3v2_size(data)
+    first = True
+    while offset + 4 <= len(data):
+        if data[offset:offset + 3] == b"TAG":
+            break  # ID3v1 trailer
+        frame = parse_header(data[offset:offset + 4])
+        if frame is None:
+            offset += 1  # resync on the next frame header
+            continue
+        if offset + frame["length"] > len(data):
+            break  # truncated last frame
+        if not (first and _is_info_frame(data, offset, frame)):
+            yield offset, frame
+        first = False
+        offset += frame["length"]
+
+
+def mp3_duration(path: str) -> float:
+    """Playing time of an MP3 from its frame headers"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return sum(frame["samples"] / frame["sample_rate"] for _, frame in iter_frames(data))
+
+
+def silent_frames(template: bytes, seconds: float) -> Tuple[bytes, int]:
+    """Frames of silence shaped like the `template` frame header, covering at least `seconds`
+
+    A frame whose side info and main data are all zero decodes to silence.
+    Returns the bytes and the number of frames.
+    """
+    header = bytearray(template[:4])
+    header[1] |= 0x01  # no CRC
+    header[2] &= 0xFD  # no padding
+    header[3] &= 0xCF  # no joint-stereo mode extension
+    frame = parse_header(bytes(header))
+    # The epsilon keeps a duration measured from whole frames at the same frame count
+    count = max(1, math.ceil(seconds * frame["sample_rate"] / frame["samples"] - 1e-6))
+    return (bytes(header) + bytes(frame["length"] - 4)) * count, count
+
+
+def _format(frame: Dict) -> Tuple:
+    return frame["version"], frame["layer"], frame["sample_rate"], frame["channels"]
+
+
+def concat_mp3(parts: List[Tuple[Optional[str], float]], output_path: str) -> List[float]:
+    """Join (mp3 path or None, fallback seconds) parts into one MP3 track
+
+    Missing or unreadable clips become silence of their fallback length. When
+    every clip shares one format the frames are copied as they are; otherwise
+    the track is re-encoded in a single ffmpeg pass. Returns each part's
+    duration in the track, for timing the slides against it.
+    """
+    clips = []
+    for path, fallback in parts:
+        data = b""
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        frames = list(iter_frames(data))
+        if path and not frames:
+            logger.warning(f"No audio frames in {path}, using {fallback:.1f}s of silence")
+        clips.append((data, frames, fallback))
+
+    formats = {_format(frame) for _, frames, _ in clips for _, frame in frames[:1]}
+    if len(formats) > 1:
+        return _ffmpeg_concat(parts, clips, output_path)
+
+    template = next((data[offset:offset + 4] for data, frames, _ in clips for offset, _ in frames[:1]),
+                    None)
+    if template is None:  # no narration at all: 32 kbps 24 kHz mono, as TTS produces
+        template = b"\xff\xf3\x44\xc4"
+    durations = []
+    with open(output_path, "wb") as out:
+        for data, frames, fallback in clips:
+            if frames:
+                for offset, frame in frames:
+                    out.write(data[offset:offset + frame["length"]])
+                durations.append(sum(frame["samples"] / frame["sample_rate"] for _, frame in frames))
+            else:
+                silence, count = silent_frames(template, fallback)
+                out.write(silence)
+                frame = parse_header(silence)
+                durations.append(count * frame["samples"] / frame["sample_rate"])
+    return durations
+
+
+def _ffmpeg_concat(parts: List[Tuple[Optional[str], float]], clips: List, output_path: str) -> List[float]:
+    """Mixed-format clips: decode them all in one ffmpeg process and re-encode once"""
+    import imageio_ffmpeg
+
+    first = next(frames[0][1] for _, frames, _ in clips if frames)
+    command = [imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error", "-y"]
+    durations = []
+    for (path, _), (_, frames, fallback) in zip(parts, clips):
+        if frames:
+            command += ["-i", path]
+            durations.append(sum(frame["samples"] / frame["sample_rate"] for _, frame in frames))
+        else:
+            layout = "mono" if first["channels"] == 1 else "stereo"
+            command += ["-f", "lavfi", "-t", str(fallback),
+                        "-i", f"anullsrc=r={first['sample_rate']}:cl={layout}"]
+            durations.append(fallback)
+    inputs = "".join(f"[{i}:a]" for i in range(len(parts)))
+    command += ["-filter_complex", f"{inputs}concat=n={len(parts)}:v=0:a=1",
+                "-ar", str(first["sample_rate"]), "-ac", str(first["channels"]),
+                "-b:a", f"{first['bitrate'] // 1000}k", output_path]
+    logger.info("Narration clips differ in format, re-encoding the track")
+    subprocess.run(command, check=True, capture_output=True)
+    return durations
@@ -0,0 +1,884 @@
+#!/usr/bin/env python3
+"""
+Free Agent Benchmarks
+Reproducible measurements for the parts of the agent we tune.
+
+Usage:
+    python benchmark_free.py startup [--runs 3] [--budget 1.0]
+    python benchmark_free.py email [--size-mb 20]
+    python benchmark_free.py s3 [--size-mb 64] [--part-sizes 5,8,16,32] [--concurrency 4]
+    python benchmark_free.py feeds [--items 300] [--limit 5] [--urls URL,...]
+    python benchmark_free.py model [--models tiny-gpt2,tiny-llama,microsoft/DialoGPT-medium] [--new-tokens 64]
+                                   [--loaders from_pretrained,mmap] [--dtype float32]
+    python benchmark_free.py slides [--seconds 10] [--zoom 1.15]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import hashlib
+import resource
+import threading
+import subprocess
+import socketserver
+from statistics import median
+from typing import Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join("logs", "benchmarks")
+
+# Modules that must never be imported just to start the CLI
+HEAVY_MODULES = ("torch", "transformers", "moviepy", "gtts", "PIL", "feedparser", "numpy")
+
+
+def _save_result(name: str, result: Dict) -> str:
+    """Write a benchmark result as JSON under logs/benchmarks"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def _repo_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+# ============================================================================
+# Startup / import time
+# ============================================================================
+
+def measure_import_times(module: str = "main_free", cwd: Optional[str] = None) -> List[Dict]:
+    """Per-module import times for `import module`, parsed from -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd or REPO_DIR, env=_repo_env(), capture_output=True, text=True, timeout=300,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1:]}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return entries
+
+
+def measure_status_time(runs: int = 3, cwd: Optional[str] = None) -> List[float]:
+    """Wall-clock seconds for `main_free.py --mode status`"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, os.path.join(REPO_DIR, "main_free.py"), "--mode", "status"],
+            cwd=cwd or REPO_DIR, env=_repo_env(), capture_output=True, text=True, timeout=300,
+        )
+        timings.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"status mode failed: {proc.stderr.strip()[-500:]}")
+    return timings
+
+
+def benchmark_startup(runs: int = 3, budget: float = 1.0, cwd: Optional[str] = None) -> Dict:
+    """Import-time breakdown and status-mode wall time, checked against a budget"""
+    imports = measure_import_times("main_free", cwd=cwd)
+    timings = measure_status_time(runs, cwd=cwd)
+    top_level = {entry["module"].split(".")[0] for entry in imports}
+    heavy = sorted(top_level.intersection(HEAVY_MODULES))
+    total_us = next((e["cumulative_us"] for e in imports if e["module"] == "main_free"), 0)
+
+    result = {
+        "import_main_free_seconds": total_us / 1e6,
+        "status_seconds_min": min(timings),
+        "status_seconds_median": median(timings),
+        "budget_seconds": budget,
+        "heavy_modules_imported": heavy,
+        "passed": not heavy and min(timings) <= budget,
+        "slowest_imports": sorted(imports, key=lambda e: e["cumulative_us"], reverse=True)[:25],
+    }
+    return result
+
+
+def _print_startup(result: Dict):
+    print(f"import main_free: {result['import_main_free_seconds'] * 1000:.1f} ms")
+    print(f"--mode status:    {result['status_seconds_min'] * 1000:.1f} ms min / "
+          f"{result['status_seconds_median'] * 1000:.1f} ms median (budget {result['budget_seconds']:.2f}s)")
+    print(f"\n{'module':<45} {'self ms':>9} {'cumul ms':>9}")
+    for entry in result["slowest_imports"][:15]:
+        name = "  " * entry["depth"] + entry["module"]
+        print(f"{name:<45} {entry['self_us'] / 1000:>9.1f} {entry['cumulative_us'] / 1000:>9.1f}")
+    if result["heavy_modules_imported"]:
+        print(f"\n❌ Heavy modules imported at startup: {', '.join(result['heavy_modules_imported'])}")
+    print("\n✅ Startup within budget" if result["passed"] else "\n❌ Startup regression")
+
+
+# ============================================================================
+# Email delivery memory
+# ============================================================================
+
+class SmtpStandIn:
+    """Local SMTP server (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, NOOP, RSET, QUIT)
+
+    Received messages are kept in `messages` ({"from", "to", "data"}); with
+    keep_data=False only their size is recorded, for large benchmark sends.
+    """
+
+    def __init__(self, keep_data: bool = True):
+        self.keep_data = keep_data
+        self.messages: List[Dict] = []
+        self.connections = 0
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write(f"{line}\r\n".encode())
+
+            def handle(self):
+                stand_in.connections += 1
+                self.reply("220 stand-in ESMTP")
+                mail_from, rcpt_to = None, []
+                for raw in self.rfile:
+                    command = raw.decode("utf-8", "replace").strip()
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.wfile.write(b"250-stand-in\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+                    elif verb == "AUTH":
+                        self.reply("235 2.7.0 Accepted")
+                    elif verb == "MAIL":
+                        mail_from, rcpt_to = command.split(":", 1)[1].strip(" <>"), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        rcpt_to.append(command.split(":", 1)[1].strip(" <>"))
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        size, chunks = 0, []
+                        for line in self.rfile:
+                            if line == b".\r\n":
+                                break
+                            if line.startswith(b".."):
+                                line = line[1:]
+                            size += len(line)
+                            if stand_in.keep_data:
+                                chunks.append(line)
+                        stand_in.messages.append({"from": mail_from, "to": rcpt_to, "size": size,
+                                                  "data": b"".join(chunks)})
+                        self.reply("250 OK queued")
+                    elif verb in ("NOOP", "RSET"):
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _current_rss_kb() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def _legacy_email_send(port: int, file_path: str):
+    """The previous in-memory path: whole file plus its base64 copy in one message"""
+    import smtplib
+    from email import encoders
+    from email.mime.base import MIMEBase
+    from email.mime.multipart import MIMEMultipart
+
+    msg = MIMEMultipart()
+    msg["From"] = msg["To"] = "bench@example.com"
+    with open(file_path, "rb") as f:
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(f.read())
+        encoders.encode_base64(part)
+        msg.attach(part)
+    server = smtplib.SMTP("127.0.0.1", port)
+    server.send_message(msg)
+    server.quit()
+
+
+def _email_worker(impl: str, port: int, file_path: str):
+    """Runs in a fresh process; prints the peak RSS growth caused by one send"""
+    os.environ.update({"GMAIL_ADDRESS": "bench@example.com", "GMAIL_APP_PASSWORD": "x",
+                       "SMTP_HOST": "127.0.0.1", "SMTP_PORT": str(port), "SMTP_STARTTLS": "false"})
+    import email_delivery  # noqa: F401 - imported before the baseline is taken
+    baseline = _current_rss_kb()
+    start = time.perf_counter()
+    if impl == "legacy":
+        _legacy_email_send(port, file_path)
+        ok = True
+    else:
+        ok = email_delivery.send_via_gmail_smtp(file_path)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"ok": bool(ok), "seconds": seconds, "peak_rss_growth_kb": max(peak - baseline, 0)}))
+
+
+def benchmark_email(size_mb: int = 20) -> Dict:
+    """Peak RSS growth of one email send, legacy in-memory MIME vs streaming"""
+    import tempfile
+
+    stand_in = SmtpStandIn(keep_data=False)
+    result = {"attachment_mb": size_mb, "runs": {}}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "bench.mp4")
+            with open(file_path, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1024 * 1024))
+            for impl in ("legacy", "streaming"):
+                proc = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "_email-worker", impl, str(stand_in.port), file_path],
+                    cwd=tmp, env=_repo_env(), capture_output=True, text=True, timeout=600,
+                )
+                if proc.returncode != 0:
+                    raise RuntimeError(f"{impl} email worker failed: {proc.stderr.strip()[-500:]}")
+                result["runs"][impl] = json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        stand_in.close()
+    legacy, streaming = result["runs"]["legacy"], result["runs"]["streaming"]
+    result["rss_reduction_x"] = legacy["peak_rss_growth_kb"] / max(streaming["peak_rss_growth_kb"], 1)
+    return result
+
+
+def _print_email(result: Dict):
+    print(f"Attachment: {result['attachment_mb']} MB")
+    print(f"{'impl':<12} {'peak RSS +MB':>13} {'seconds':>9}")
+    for impl, run in result["runs"].items():
+        print(f"{impl:<12} {run['peak_rss_growth_kb'] / 1024:>13.1f} {run['seconds']:>9.2f}")
+    print(f"\nStreaming uses {result['rss_reduction_x']:.1f}x less peak memory")
+
+
+# ============================================================================
+# Object storage throughput
+# ============================================================================
+
+class S3StandIn:
+    """Local S3-compatible server: PUT/HEAD/GET/DELETE objects and multipart uploads
+
+    Every signed request is checked against SigV4 with the stand-in's own
+    credentials, and payload hashes against the body. `latency` adds a delay
+    per request to mimic a remote endpoint.
+    """
+
+    ACCESS_KEY = "STANDINACCESSKEY"
+    SECRET_KEY = "stand-in-secret-key"
+
+    def __init__(self, bucket: str = "videos", latency: float = 0.0, region: str = "us-east-1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qsl, unquote, urlsplit
+        from object_storage import UNSIGNED_PAYLOAD, SigV4Signer
+
+        self.bucket = bucket
+        self.latency = latency
+        self.objects: Dict[str, Dict] = {}
+        self.uploads: Dict[str, Dict] = {}
+        self.requests: List[Dict] = []
+        self.signature_failures = 0
+        self._lock = threading.Lock()
+        signer = SigV4Signer(self.ACCESS_KEY, self.SECRET_KEY, region)
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, body: bytes = b"", headers: Optional[Dict] = None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _authorized(self, body: bytes) -> bool:
+                parts = urlsplit(self.path)
+                query = parse_qsl(parts.query, keep_blank_values=True)
+                url = f"http://{self.headers['Host']}{unquote(parts.path)}"
+                params = dict(query)
+                if "X-Amz-Signature" in params:
+                    query = [(k, v) for k, v in query if k != "X-Amz-Signature"]
+                    _, expected = signer._signature(self.command, url, {"host": self.headers["Host"]},
+                                                    UNSIGNED_PAYLOAD, params["X-Amz-Date"], query)
+                    return expected == params["X-Amz-Signature"]
+                auth = self.headers.get("Authorization", "")
+                if not auth.startswith("AWS4-HMAC-SHA256"):
+                    return False
+                fields = dict(item.strip().split("=", 1) for item in auth[len("AWS4-HMAC-SHA256 "):].split(","))
+                payload_hash = self.headers["x-amz-content-sha256"]
+                if payload_hash != UNSIGNED_PAYLOAD and payload_hash != hashlib.sha256(body).hexdigest():
+                    return False
+                signed = {name: self.headers[name] for name in fields["SignedHeaders"].split(";")}
+                _, expected = signer._signature(self.command, url, signed, payload_hash,
+                                                self.headers["x-amz-date"], query)
+                return expected == fields["Signature"]
+
+            def _handle(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                parts = urlsplit(self.path)
+                params = dict(parse_qsl(parts.query, keep_blank_values=True))
+                key = unquote(parts.path).split("/", 2)[-1]
+                with stand_in._lock:
+                    stand_in.requests.append({"method": self.command, "key": key, "params": params,
+                                              "bytes": len(body)})
+                time.sleep(stand_in.latency)
+                if not self._authorized(body):
+                    stand_in.signature_failures += 1
+                    return self._reply(403, b"<Error><Code>SignatureDoesNotMatch</Code></Error>")
+                obj = stand_in.objects.get(key)
+
+                if self.command in ("HEAD", "GET"):
+                    if obj is None:
+                        return self._reply(404)
+                    headers = {"ETag": f'"{obj["etag"]}"', **obj["meta"]}
+                    return self._reply(200, obj["data"] if self.command == "GET" else b"", headers)
+                if self.command == "DELETE":
+                    stand_in.uploads.pop(params.get("uploadId"), None)
+                    return self._reply(204)
+                if self.command == "POST" and "uploads" in params:
+                    upload_id = hashlib.md5(f"{key}{time.time()}".encode()).hexdigest()
+                    meta = {k: v for k, v in self.headers.items() if k.lower().startswith("x-amz-meta-")}
+                    stand_in.uploads[upload_id] = {"key": key, "parts": {}, "meta": meta}
+                    return self._reply(200, f"<InitiateMultipartUploadResult><UploadId>{upload_id}"
+                                            f"</UploadId></InitiateMultipartUploadResult>".encode())
+                if self.command == "PUT" and "partNumber" in params:
+                    digest = hashlib.md5(body)
+                    with stand_in._lock:
+                        stand_in.uploads[params["uploadId"]]["parts"][int(params["partNumber"])] = (body, digest)
+                    return self._reply(200, headers={"ETag": f'"{digest.hexdigest()}"'})
+                if self.command == "POST" and "uploadId" in params:
+                    upload = stand_in.uploads.pop(params["uploadId"])
+                    ordered = [upload["parts"][n] for n in sorted(upload["parts"])]
+                    etag = f"{hashlib.md5(b''.join(d.digest() for _, d in ordered)).hexdigest()}-{len(ordered)}"
+                    stand_in.objects[key] = {"data": b"".join(b for b, _ in ordered), "etag": etag,
+                                             "meta": upload["meta"]}
+                    return self._reply(200, f"<CompleteMultipartUploadResult><ETag>\"{etag}\"</ETag>"
+                                            f"</CompleteMultipartUploadResult>".encode())
+                if self.command == "PUT":
+                    etag = hashlib.md5(body).hexdigest()
+                    meta = {k: v for k, v in self.headers.items() if k.lower().startswith("x-amz-meta-")}
+                    stand_in.objects[key] = {"data": body, "etag": etag, "meta": meta}
+                    return self._reply(200, headers={"ETag": f'"{etag}"'})
+                self._reply(400)
+
+            do_GET = do_HEAD = do_PUT = do_POST = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.endpoint = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def uploader(self, **kwargs):
+        from object_storage import ObjectStorageUploader
+        return ObjectStorageUploader(self.endpoint, self.bucket, self.ACCESS_KEY, self.SECRET_KEY, **kwargs)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def benchmark_s3(size_mb: int = 64, part_sizes_mb=(5, 8, 16, 32), concurrency: int = 4,
+                 latency: float = 0.05) -> Dict:
+    """Multipart upload throughput per part size against the local S3 stand-in"""
+    import tempfile
+
+    stand_in = S3StandIn(latency=latency)
+    result = {"file_mb": size_mb, "concurrency": concurrency, "latency_seconds": latency, "runs": []}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "bench.mp4")
+            with open(file_path, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1024 * 1024))
+            for part_mb in part_sizes_mb:
+                uploader = stand_in.uploader(part_size=part_mb * 1024 * 1024, concurrency=concurrency)
+                start = time.perf_counter()
+                upload = uploader.upload(file_path, f"bench_{part_mb}mb.mp4")
+                seconds = time.perf_counter() - start
+                if not upload:
+                    raise RuntimeError(f"upload with {part_mb}MiB parts failed")
+                # Same object again: HEAD + ETag match, nothing re-sent
+                start = time.perf_counter()
+                again = uploader.upload(file_path, f"bench_{part_mb}mb.mp4")
+                result["runs"].append({
+                    "part_mb": part_mb,
+                    "parts": -(-size_mb // part_mb),
+                    "seconds": seconds,
+                    "mb_per_s": size_mb / seconds,
+                    "skip_seconds": time.perf_counter() - start,
+                    "skipped": again["skipped"],
+                })
+    finally:
+        stand_in.close()
+    return result
+
+
+def _print_s3(result: Dict):
+    print(f"File: {result['file_mb']} MB, concurrency {result['concurrency']}, "
+          f"{result['latency_seconds'] * 1000:.0f} ms per request")
+    print(f"{'part MiB':>8} {'parts':>6} {'seconds':>8} {'MB/s':>8} {'re-upload skip s':>17}")
+    for run in result["runs"]:
+        print(f"{run['part_mb']:>8} {run['parts']:>6} {run['seconds']:>8.2f} {run['mb_per_s']:>8.1f} "
+              f"{run['skip_seconds']:>17.2f}")
+
+
+# ============================================================================
+# Feed parsing: full feedparser document vs streaming top-N
+# ============================================================================
+
+def synthetic_feed(items: int = 300, atom: bool = False, description_bytes: int = 2000,
+                   malformed: bool = False) -> bytes:
+    """An RSS 2.0 (or Atom) document shaped like a busy news feed: full-text bodies per entry"""
+    body = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (description_bytes // 57 + 1))[:description_bytes]
+    entity = "&nbsp;" if malformed else ""  # an HTML entity is fatal to a strict XML parser
+    if atom:
+        entries = "".join(
+            f'<entry><title>AI startup story {i}{entity}</title><id>urn:story:{i}</id>'
+            f'<link rel="alternate" href="https://example.com/{i}"/><content type="html">{body}</content></entry>'
+            for i in range(items))
+        doc = f'<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Bench</title>{entries}</feed>'
+    else:
+        entries = "".join(
+            f"<item><title>AI startup story {i}{entity}</title><link>https://example.com/{i}</link>"
+            f"<guid>story-{i}</guid><description>{body}</description></item>" for i in range(items))
+        doc = f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>Bench</title>{entries}</channel></rss>'
+    return doc.encode("utf-8")
+
+
+class FeedStandIn:
+    """Serves fixed feed documents by path, in small writes like a real server; counts bytes sent"""
+
+    def __init__(self, documents: Dict[str, bytes]):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.documents = documents
+        self.bytes_sent = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                document = stand_in.documents.get(self.path)
+                if document is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(document)))
+                self.send_header("ETag", f'"{hashlib.md5(document).hexdigest()}"')
+                self.end_headers()
+                view = memoryview(document)
+                try:
+                    for offset in range(0, len(view), 8192):
+                        self.wfile.write(view[offset:offset + 8192])
+                        stand_in.bytes_sent += len(view[offset:offset + 8192])
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the reader stopped early
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _measure_feed_read(read, runs: int) -> Dict:
+    """Median seconds and tracemalloc peak of read() -> (entries, bytes read)"""
+    import tracemalloc
+
+    seconds, peaks = [], []
+    for _ in range(runs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        entries, bytes_read = read()
+        seconds.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"entries": entries, "bytes_read": bytes_read, "seconds": median(seconds),
+            "peak_alloc_kb": median(peaks) / 1024}
+
+
+def benchmark_feeds(items: int = 300, limit: int = 5, urls: Optional[List[str]] = None, runs: int = 5) -> Dict:
+    """Bytes read, parse time and peak allocations: feedparser on the whole feed vs read_feed(limit)
+
+    Without urls the feeds are synthetic RSS and Atom documents served locally.
+    """
+    import feedparser
+    import requests
+    from feed_reader import read_feed
+
+    stand_in = None
+    if not urls:
+        stand_in = FeedStandIn({"/rss": synthetic_feed(items), "/atom": synthetic_feed(items, atom=True)})
+        urls = [stand_in.url + "/rss", stand_in.url + "/atom"]
+    result = {"limit": limit, "runs": []}
+    try:
+        for url in urls:
+            def full():
+                content = requests.get(url, timeout=30).content  # what feedparser.parse(url) downloads
+                return len(feedparser.parse(content).entries[:limit]), len(content)
+
+            def streamed():
+                feed = read_feed(url, limit)
+                return len(feed["entries"]), feed["bytes_read"]
+
+            result["runs"].append({"url": url, "feedparser": _measure_feed_read(full, runs),
+                                   "stream": _measure_feed_read(streamed, runs)})
+    finally:
+        if stand_in:
+            stand_in.close()
+    return result
+
+
+def _print_feeds(result: Dict):
+    print(f"First {result['limit']} entries per feed")
+    print(f"{'feed':<40} {'parser':<11} {'KB read':>9} {'ms':>8} {'peak alloc KB':>14}")
+    for run in result["runs"]:
+        for parser in ("feedparser", "stream"):
+            m = run[parser]
+            print(f"{run['url'][-40:]:<40} {parser:<11} {m['bytes_read'] / 1024:>9.0f} {m['seconds'] * 1000:>8.1f} "
+                  f"{m['peak_alloc_kb']:>14.0f}")
+
+
+# ============================================================================
+# Script model latency / memory
+# ============================================================================
+
+# Topics the model benchmark prompts with (and the tiny tokenizers are trained on)
+BENCH_TOPICS = ["Python Programming Tips for Beginners", "Machine Learning Basics Explained",
+                "Cybersecurity Best Practices", "Cloud Computing Explained Simply"]
+
+# Randomly initialised stand-ins for offline CI: same code path, no download
+TINY_MODELS = {
+    "tiny-gpt2": ("gpt2", {"n_layer": 2, "n_embd": 128, "n_head": 4, "n_positions": 1024}),
+    "tiny-llama": ("llama", {"hidden_size": 128, "intermediate_size": 256, "num_hidden_layers": 2,
+                             "num_attention_heads": 4, "num_key_value_heads": 2, "max_position_embeddings": 1024}),
+    "tiny-gpt-neox": ("gpt_neox", {"hidden_size": 128, "intermediate_size": 256, "num_hidden_layers": 2,
+                                   "num_attention_heads": 4, "max_position_embeddings": 1024}),
+    # Big enough (~30M params) that prefill cost shows up next to per-call overhead
+    "small-llama": ("llama", {"hidden_size": 512, "intermediate_size": 1536, "num_hidden_layers": 8,
+                              "num_attention_heads": 8, "num_key_value_heads": 4, "max_position_embeddings": 1024}),
+}
+
+
+def build_tiny_model(name: str, output_dir: str) -> str:
+    """Save a tiny random model of TINY_MODELS[name] plus a BPE tokenizer trained on our prompts
+
+    A "-bin" suffix (e.g. small-llama-bin) saves a pickled pytorch_model.bin
+    instead of safetensors, the format DialoGPT and other older checkpoints ship.
+    """
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders, trainers
+    from transformers import AutoConfig, AutoModelForCausalLM, PreTrainedTokenizerFast
+    from content_research_free import build_script_prompt
+
+    eos = "<|endoftext|>"
+    corpus = [build_script_prompt(topic, length) for topic in BENCH_TOPICS for length in (30, 60)]
+    bpe = Tokenizer(models.BPE())
+    bpe.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    bpe.decoder = decoders.ByteLevel()
+    bpe.train_from_iterator(corpus, trainers.BpeTrainer(vocab_size=512, special_tokens=[eos],
+                                                        initial_alphabet=pre_tokenizers.ByteLevel.alphabet()))
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=bpe, eos_token=eos, bos_token=eos)
+
+    pickled = name.endswith("-bin")
+    model_type, params = TINY_MODELS[name[:-len("-bin")] if pickled else name]
+    config = AutoConfig.for_model(model_type, vocab_size=len(tokenizer), bos_token_id=tokenizer.eos_token_id,
+                                  eos_token_id=tokenizer.eos_token_id, **params)
+    torch.manual_seed(0)
+    path = os.path.join(output_dir, name)
+    model = AutoModelForCausalLM.from_config(config)
+    model.save_pretrained(path)
+    if pickled:
+        os.remove(os.path.join(path, "model.safetensors"))
+        torch.save(model.state_dict(), os.path.join(path, "pytorch_model.bin"))
+    tokenizer.save_pretrained(path)
+    return path
+
+
+def _rss_anon_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _model_worker(model: str, new_tokens: int):
+    """Runs in a fresh process: load through the researcher, then time one generation"""
+    import torch
+    from transformers.generation.streamers import BaseStreamer
+    from content_research_free import FreeContentResearcher, build_script_prompt, script_prompt_suffix
+
+    class TokenTimer(BaseStreamer):
+        """Timestamps each put(): the prompt first, then every generated token"""
+        def __init__(self):
+            self.times = []
+
+        def put(self, value):
+            self.times.append(time.perf_counter())
+
+        def end(self):
+            pass
+
+    from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline  # noqa: F401 - not part of the load
+    baseline = _current_rss_kb()
+    start = time.perf_counter()
+    researcher = FreeContentResearcher(model_name=model)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = _current_rss_kb()
+    if researcher.model is None:
+        print(json.dumps({"error": "model failed to load (not cached locally?)"}))
+        return
+    tokenizer = researcher.tokenizer
+    inputs = tokenizer(build_script_prompt(BENCH_TOPICS[0], 60), return_tensors="pt")
+    timer = TokenTimer()
+    start = time.perf_counter()
+    with torch.no_grad():
+        researcher.model.generate(**inputs, max_new_tokens=new_tokens, min_new_tokens=new_tokens, do_sample=False,
+                                  pad_token_id=tokenizer.eos_token_id, streamer=timer)
+    generated = len(timer.times) - 1
+    decode_seconds = timer.times[-1] - timer.times[1] if generated > 1 else 0.0
+
+    def first_token_seconds(generate) -> float:
+        timer = TokenTimer()
+        start = time.perf_counter()
+        generate(timer)
+        return timer.times[1] - start
+
+    # Warm first-token latency with the full prompt prefilled vs the cached prefix reused
+    suffix = script_prompt_suffix(BENCH_TOPICS[0], 60)
+    prefix_ids, _ = researcher._prefix_state()
+    with torch.no_grad():
+        full_prefill = median(first_token_seconds(lambda t: researcher.model.generate(
+            **inputs, max_new_tokens=1, do_sample=False, pad_token_id=tokenizer.eos_token_id, streamer=t))
+            for _ in range(3))
+    cached_prefill = median(first_token_seconds(lambda t: researcher.generate_from_prefix(
+        suffix, max_new_tokens=1, do_sample=False, streamer=t)) for _ in range(3))
+    print(json.dumps({
+        "params_m": sum(p.numel() for p in researcher.model.parameters()) / 1e6,
+        "load_seconds": load_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        # RSS growth across the load: resident weights plus modules the load pulls in
+        "load_rss_mb": max(loaded_rss - baseline, 0) / 1024,
+        "prompt_tokens": inputs["input_ids"].shape[1],
+        "new_tokens": generated,
+        "first_token_seconds": timer.times[1] - start,
+        "tokens_per_second": (generated - 1) / decode_seconds if decode_seconds else None,
+        # Private heap after generating; mapped weights are file-backed and not counted here
+        "rss_anon_mb": _rss_anon_kb() / 1024,
+        "prefix_tokens": prefix_ids.shape[1],
+        "first_token_warm_seconds": full_prefill,
+        "first_token_cached_prefix_seconds": cached_prefill,
+    }))
+
+
+def benchmark_model(models: List[str], new_tokens: int = 64, loaders=("from_pretrained", "mmap"),
+                    dtype: str = "float32") -> Dict:
+    """Load time, peak RSS, first-token latency and decode speed per candidate script model
+
+    Names in TINY_MODELS are built on the fly; anything else must already be in
+    the local Hugging Face cache (the workers run offline). The mmap loader's
+    one-time weight preparation happens before its worker starts, so only the
+    cold start is measured.
+    """
+    import tempfile
+    from model_weights import prepare_weights
+
+    result = {"new_tokens": new_tokens, "dtype": dtype, "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in models:
+            model = build_tiny_model(name, tmp) if name.replace("-bin", "") in TINY_MODELS else name
+            for loader in loaders:
+                env = _repo_env()
+                env.update({"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1", "AI_WEIGHTS_DTYPE": dtype,
+                            "AI_MMAP_WEIGHTS": "true" if loader == "mmap" else "false"})
+                try:
+                    if loader == "mmap":
+                        prepare_weights(model, dtype, os.path.join(tmp, "data", "models"))
+                    proc = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "_model-worker", model, str(new_tokens)],
+                        cwd=tmp, env=env, capture_output=True, text=True, timeout=1800,
+                    )
+                    run = json.loads(proc.stdout.strip().splitlines()[-1])
+                except (IndexError, ValueError, OSError) as e:
+                    run = {"error": proc.stderr.strip()[-500:] if isinstance(e, (IndexError, ValueError)) else str(e)}
+                result["runs"].append({"model": name, "loader": loader, **run})
+    return result
+
+
+def _print_model(result: Dict):
+    print(f"Generation: {result['new_tokens']} new tokens, greedy, on the script prompt ({result['dtype']} for mmap)")
+    print(f"{'model':<28} {'loader':<16} {'params M':>9} {'load s':>7} {'peak RSS MB':>12} {'load +MB':>9} "
+          f"{'anon MB':>8} {'1st token ms':>13} {'tok/s':>8} {'warm 1st ms':>12} {'cached prefix':>14}")
+    for run in result["runs"]:
+        if "error" in run:
+            print(f"{run['model']:<28} {run['loader']:<16} skipped: {(run['error'] or 'failed').splitlines()[-1]}")
+            continue
+        tokens_per_second = f"{run['tokens_per_second']:.1f}" if run["tokens_per_second"] else "-"
+        print(f"{run['model']:<28} {run['loader']:<16} {run['params_m']:>9.1f} {run['load_seconds']:>7.2f} "
+              f"{run['peak_rss_mb']:>12.0f} {run['load_rss_mb']:>9.0f} {run['rss_anon_mb']:>8.0f} "
+              f"{run['first_token_seconds'] * 1000:>13.1f} {tokens_per_second:>8} "
+              f"{run['first_token_warm_seconds'] * 1000:>12.1f} {run['first_token_cached_prefix_seconds'] * 1000:>14.1f}")
+
+
+# ============================================================================
+# Slide animation render cost
+# ============================================================================
+
+def benchmark_slides(seconds: float = 10.0, zoom: float = 1.15) -> Dict:
+    """Encode one slide as a static segment and with each Ken Burns motion
+
+    Frame generation is timed on its own, then the whole segment is exported
+    with the renderer's encoder settings; `ratio` is animated over static.
+    """
+    import tempfile
+    from moviepy.editor import ImageClip
+    from slide_motion import MOTIONS, ken_burns_clip
+    from video_generator_free import VIDEO_FPS, FreeVideoGenerator
+
+    result = {"seconds": seconds, "fps": VIDEO_FPS, "zoom": zoom, "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        slide = os.path.join(tmp, "slide.png")
+        FreeVideoGenerator().create_background_image(BENCH_TOPICS[0]).save(slide)
+        clips = [("static", lambda: ImageClip(slide, duration=seconds))]
+        clips += [(motion, lambda motion=motion: ken_burns_clip(slide, seconds, motion, zoom, VIDEO_FPS))
+                  for motion in MOTIONS]
+        for mode, build in clips:
+            start = time.perf_counter()
+            clip = build()
+            setup_seconds = time.perf_counter() - start
+            frames = int(seconds * VIDEO_FPS)
+            start = time.perf_counter()
+            for i in range(frames):
+                clip.get_frame(i / VIDEO_FPS)
+            frame_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            clip.write_videofile(os.path.join(tmp, f"{mode}.mp4"), fps=VIDEO_FPS, codec="libx264", bitrate="500k",
+                                 preset="ultrafast", threads=1, audio=False, logger=None, verbose=False)
+            export_seconds = time.perf_counter() - start
+            clip.close()
+            result["runs"].append({"mode": mode, "setup_seconds": setup_seconds,
+                                   "frame_ms": frame_seconds / frames * 1000, "export_seconds": export_seconds})
+    static = result["runs"][0]["export_seconds"]
+    for run in result["runs"]:
+        run["ratio"] = (run["setup_seconds"] + run["export_seconds"]) / static
+    return result
+
+
+def _print_slides(result: Dict):
+    print(f"One {result['seconds']:.0f}s slide at {result['fps']} fps, zoom {result['zoom']}")
+    print(f"{'mode':<10} {'setup ms':>9} {'frame ms':>9} {'export s':>9} {'x static':>9}")
+    for run in result["runs"]:
+        print(f"{run['mode']:<10} {run['setup_seconds'] * 1000:>9.1f} {run['frame_ms']:>9.2f} "
+              f"{run['export_seconds']:>9.2f} {run['ratio']:>9.2f}")
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "_email-worker":
+        _email_worker(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+        return
+    if len(sys.argv) == 4 and sys.argv[1] == "_model-worker":
+        _model_worker(sys.argv[2], int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description="Free YouTube agent benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    startup = sub.add_parser("startup", help="CLI import time and status-mode latency")
+    startup.add_argument("--runs", type=int, default=3)
+    startup.add_argument("--budget", type=float, default=1.0, help="Max seconds for --mode status")
+
+    email = sub.add_parser("email", help="Peak RSS of an email send: in-memory MIME vs streaming")
+    email.add_argument("--size-mb", type=int, default=20)
+
+    s3 = sub.add_parser("s3", help="Multipart upload throughput across part sizes (local S3 stand-in)")
+    s3.add_argument("--size-mb", type=int, default=64)
+    s3.add_argument("--part-sizes", default="5,8,16,32", help="Comma-separated part sizes in MiB")
+    s3.add_argument("--concurrency", type=int, default=4)
+    s3.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per request")
+
+    feeds = sub.add_parser("feeds", help="Feed fetch+parse: feedparser full document vs streaming top-N")
+    feeds.add_argument("--items", type=int, default=300, help="Entries in each synthetic feed")
+    feeds.add_argument("--limit", type=int, default=5)
+    feeds.add_argument("--urls", default="", help="Comma-separated real feed URLs instead of the local stand-in")
+
+    model = sub.add_parser("model", help="Load time, memory and token latency of candidate script models")
+    model.add_argument("--models", default=",".join(list(TINY_MODELS) + ["microsoft/DialoGPT-medium"]),
+                       help=f"Comma-separated: {', '.join(TINY_MODELS)} (add -bin for a pickled checkpoint) "
+                            "or locally cached model names/paths")
+    model.add_argument("--new-tokens", type=int, default=64)
+    model.add_argument("--loaders", default="from_pretrained,mmap", help="Comma-separated: from_pretrained, mmap")
+    model.add_argument("--dtype", default="float32", choices=("float32", "bfloat16", "float16"),
+                       help="Storage dtype of the prepared mmap weights")
+
+    slides = sub.add_parser("slides", help="Render cost of Ken Burns slide animation vs static slides")
+    slides.add_argument("--seconds", type=float, default=10.0, help="Length of the benchmark segment")
+    slides.add_argument("--zoom", type=float, default=1.15)
+
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        result = benchmark_startup(args.runs, args.budget)
+        _print_startup(result)
+        print(f"📄 Saved: {_save_result('startup', result)}")
+        sys.exit(0 if result["passed"] else 1)
+
+    elif args.command == "email":
+        result = benchmark_email(args.size_mb)
+        _print_email(result)
+        print(f"📄 Saved: {_save_result('email', result)}")
+
+    elif args.command == "s3":
+        part_sizes = [int(p) for p in args.part_sizes.split(",")]
+        result = benchmark_s3(args.size_mb, part_sizes, args.concurrency, args.latency)
+        _print_s3(result)
+        print(f"📄 Saved: {_save_result('s3', result)}")
+
+    elif args.command == "feeds":
+        result = benchmark_feeds(args.items, args.limit, [u.strip() for u in args.urls.split(",") if u.strip()])
+        _print_feeds(result)
+        print(f"📄 Saved: {_save_result('feeds', result)}")
+
+    elif args.command == "model":
+        result = benchmark_model([m.strip() for m in args.models.split(",") if m.strip()], args.new_tokens,
+                                 [l.strip() for l in args.loaders.split(",") if l.strip()], args.dtype)
+        _print_model(result)
+        print(f"📄 Saved: {_save_result('model', result)}")
+
+    elif args.command == "slides":
+        result = benchmark_slides(args.seconds, args.zoom)
+        _print_slides(result)
+        print(f"📄 Saved: {_save_result('slides', result)}")
+
+
+if __name__ == "__main__":
+    main()
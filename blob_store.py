@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Blob Store
+Slides, TTS clips and rendered videos stored once under OUTPUT_DIR/blobs,
+keyed by SHA-256 and reference-counted per run, so content that repeats
+across runs (fallback scripts, call to action, recurring topics) is neither
+regenerated nor stored twice.
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from config_free import FreeConfig
+from logger import get_logger
+from sqlite_store import connect
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    ext TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    last_used_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_gc ON blobs(refcount, last_used_at);
+CREATE TABLE IF NOT EXISTS blob_keys (
+    key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_blob_keys_sha ON blob_keys(sha256);
+CREATE TABLE IF NOT EXISTS blob_refs (
+    owner TEXT NOT NULL,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    PRIMARY KEY (owner, sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_blob_refs_sha ON blob_refs(sha256);
+CREATE TABLE IF NOT EXISTS blob_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    logical_bytes INTEGER NOT NULL DEFAULT 0,
+    written_bytes INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO blob_stats (id) VALUES (1);
+"""
+
+
+def content_key(*parts) -> str:
+    """Cache key for generated content, e.g. content_key("tts", "en", text)"""
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """SHA-256 addressed files with per-owner reference counts and GC"""
+
+    def __init__(self, root: Optional[str] = None, db_path: Optional[str] = None):
+        self.root = root or os.path.join(FreeConfig.OUTPUT_DIR, "blobs")
+        self.db_path = db_path or os.path.join(self.root, "index.db")
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        with connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA)
+
+    def blob_path(self, sha256: str, ext: str = "") -> str:
+        return os.path.join(self.root, sha256[:2], sha256 + ext)
+
+    def lookup(self, key: str, owner: Optional[str] = None) -> Optional[str]:
+        """Path of the blob stored under a content key, referenced by owner"""
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT b.sha256, b.ext, b.bytes FROM blob_keys k JOIN blobs b "
+                               "ON b.sha256 = k.sha256 WHERE k.key = ?", (key,)).fetchone()
+            if row is None:
+                conn.execute("UPDATE blob_stats SET misses = misses + 1 WHERE id = 1")
+                return None
+            path = self.blob_path(row["sha256"], row["ext"])
+            if not os.path.exists(path):
+                conn.execute("DELETE FROM blob_keys WHERE key = ?", (key,))
+                return None
+            conn.execute("BEGIN IMMEDIATE")
+            self._use(conn, row["sha256"], row["bytes"], owner)
+            conn.execute("UPDATE blob_stats SET hits = hits + 1 WHERE id = 1")
+            conn.execute("COMMIT")
+            return path
+
+    def put_file(self, path: str, key: Optional[str] = None, owner: Optional[str] = None,
+                 keep_source: bool = False) -> str:
+        """Move (or hard-link, with keep_source) a file into the store; returns its blob path
+
+        With keep_source the original path stays valid as a hard link to the
+        blob; if identical content was already stored, the original is replaced
+        by a link to the existing blob.
+        """
+        sha256 = _file_sha256(path)
+        ext = os.path.splitext(path)[1].lower()
+        size = os.path.getsize(path)
+        target = self.blob_path(sha256, ext)
+        with self._lock, connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stored = conn.execute("SELECT ext FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if stored and os.path.exists(self.blob_path(sha256, stored["ext"])):
+                target = self.blob_path(sha256, stored["ext"])
+                if keep_source:
+                    self._link_over(target, path)
+                else:
+                    os.remove(path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if keep_source:
+                    self._link_or_copy(path, target)
+                else:
+                    shutil.move(path, target)
+                now = datetime.now().isoformat()
+                conn.execute("INSERT OR REPLACE INTO blobs (sha256, ext, bytes, refcount, created_at, last_used_at) "
+                             "VALUES (?, ?, ?, 0, ?, ?)", (sha256, ext, size, now, now))
+                conn.execute("UPDATE blob_stats SET written_bytes = written_bytes + ? WHERE id = 1", (size,))
+            if key:
+                conn.execute("INSERT OR REPLACE INTO blob_keys (key, sha256) VALUES (?, ?)", (key, sha256))
+            self._use(conn, sha256, size, owner)
+            conn.execute("COMMIT")
+        return target
+
+    def _use(self, conn, sha256: str, size: int, owner: Optional[str]):
+        """Count a logical write of the blob and reference it from owner"""
+        conn.execute("UPDATE blob_stats SET logical_bytes = logical_bytes + ? WHERE id = 1", (size,))
+        conn.execute("UPDATE blobs SET last_used_at = ? WHERE sha256 = ?", (datetime.now().isoformat(), sha256))
+        if owner:
+            cur = conn.execute("INSERT OR IGNORE INTO blob_refs (owner, sha256) VALUES (?, ?)", (owner, sha256))
+            if cur.rowcount:
+                conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,))
+
+    @staticmethod
+    def _link_or_copy(source: str, target: str):
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    def _link_over(self, blob: str, path: str):
+        """Replace path with a link to an existing blob (atomic rename)"""
+        tmp = path + ".blobtmp"
+        self._link_or_copy(blob, tmp)
+        os.replace(tmp, path)
+
+    def release(self, owner: str) -> int:
+        """Drop every reference held by owner; returns how many were released"""
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            shas = [row["sha256"] for row in conn.execute("SELECT sha256 FROM blob_refs WHERE owner = ?", (owner,))]
+            conn.execute("DELETE FROM blob_refs WHERE owner = ?", (owner,))
+            conn.executemany("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", [(s,) for s in shas])
+            conn.execute("COMMIT")
+        return len(shas)
+
+    def gc(self, grace: Optional[timedelta] = None) -> Dict:
+        """Delete unreferenced blobs
+
+        Blobs reachable by a content key (call to action, fallback slides) stay
+        cached for the grace period after their last use; unkeyed blobs such as
+        finished videos go as soon as no run references them.
+        """
+        grace = timedelta(days=FreeConfig.BLOB_GC_GRACE_DAYS) if grace is None else grace
+        cutoff = (datetime.now() - grace).isoformat()
+        removed, freed = 0, 0
+        with self._lock, connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT sha256, ext, bytes FROM blobs b WHERE refcount <= 0 AND (last_used_at < ? "
+                "OR NOT EXISTS (SELECT 1 FROM blob_keys k WHERE k.sha256 = b.sha256))", (cutoff,)
+            ).fetchall()
+            for row in rows:
+                try:
+                    os.remove(self.blob_path(row["sha256"], row["ext"]))
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM blob_keys WHERE sha256 = ?", (row["sha256"],))
+                conn.execute("DELETE FROM blobs WHERE sha256 = ?", (row["sha256"],))
+                removed += 1
+                freed += row["bytes"]
+            conn.execute("COMMIT")
+        if removed:
+            logger.info(f"🧹 Blob GC removed {removed} blobs ({freed / 1e6:.1f}MB)")
+        return {"removed": removed, "freed_bytes": freed}
+
+    def stats(self) -> Dict:
+        """Stored size, reference totals and dedup ratios"""
+        with connect(self.db_path) as conn:
+            totals = conn.execute("SELECT COUNT(*) AS blobs, COALESCE(SUM(bytes), 0) AS stored, "
+                                  "COALESCE(SUM(bytes * MAX(refcount, 1)), 0) AS referenced FROM blobs").fetchone()
+            counters = conn.execute("SELECT * FROM blob_stats WHERE id = 1").fetchone()
+        return {
+            "blobs": totals["blobs"],
+            "stored_bytes": totals["stored"],
+            "referenced_bytes": totals["referenced"],
+            "logical_bytes": counters["logical_bytes"],
+            "written_bytes": counters["written_bytes"],
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            # Bytes runs asked for vs bytes actually written to disk
+            "write_dedup_ratio": counters["logical_bytes"] / counters["written_bytes"] if counters["written_bytes"] else 1.0,
+            # Bytes referenced by live runs vs bytes retained on disk
+            "storage_dedup_ratio": totals["referenced"] / totals["stored"] if totals["stored"] else 1.0,
+        }
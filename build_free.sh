@@ -22,6 +22,10 @@ mkdir -p output temp logs videos data
 echo "Setting permissions..."
 chmod 755 output temp logs videos data
 
+# Convert the script model once into memory-mappable weights (data/models)
+echo "Preparing memory-mapped model weights..."
+python model_weights.py prepare || echo "Model weight preparation skipped (will run on first use)"
+
 # Verify installation
 echo "Verifying free installation..."
 python -c "import torch; print('PyTorch version:', torch.__version__)" || echo "PyTorch not available"
@@ -19,21 +19,62 @@ class FreeConfig:
     VIDEO_TOPIC = os.getenv("VIDEO_TOPIC", "technology")
     VIDEO_LENGTH = int(os.getenv("VIDEO_LENGTH", "60"))
     UPLOAD_SCHEDULE = os.getenv("UPLOAD_SCHEDULE", "daily")
+    # Slide animation: 'static' or 'ken_burns' (slow pan/zoom, rendered with NumPy index maps)
+    SLIDE_ANIMATION = os.getenv("SLIDE_ANIMATION", "static")
+    KEN_BURNS_ZOOM = float(os.getenv("KEN_BURNS_ZOOM", "1.15"))
+    # Music bed under the narration (audio file path; empty = none), ducked while the narration speaks
+    BACKGROUND_MUSIC = os.getenv("BACKGROUND_MUSIC", "")
+    MUSIC_VOLUME_DB = float(os.getenv("MUSIC_VOLUME_DB", "-20"))
+    MUSIC_DUCK_DB = float(os.getenv("MUSIC_DUCK_DB", "-12"))
     
     # Directory settings
     OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
     TEMP_DIR = os.getenv("TEMP_DIR", "temp")
     LOGS_DIR = os.getenv("LOGS_DIR", "logs")
     VIDEOS_DIR = os.getenv("VIDEOS_DIR", "videos")
+    DATA_DIR = os.getenv("DATA_DIR", "data")
     # Delivery method for outputs when persistent disk isn't available
-    # Options: 'local' (default), 'transfer_sh'
+    # Options: 'local' (default), 'transfer_sh', 'email', 's3'
     OUTPUT_DELIVERY = os.getenv("OUTPUT_DELIVERY", "local")
+    # Upload hosts tried for transfer_sh delivery, in priority order
+    DELIVERY_PROVIDERS = [p.strip() for p in os.getenv("DELIVERY_PROVIDERS", "file.io,0x0.st,transfer.sh").split(",") if p.strip()]
+    # Start the next provider if the current one makes no progress for this many seconds
+    UPLOAD_LATENCY_BUDGET = float(os.getenv("UPLOAD_LATENCY_BUDGET", "5"))
+    UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", "30"))
+    # Days a hosted link stays up, on hosts that take an expiry (file.io, transfer.sh)
+    UPLOAD_EXPIRY_DAYS = int(os.getenv("UPLOAD_EXPIRY_DAYS", "14"))
+    # Resumable (tus) uploads - add "tus" to DELIVERY_PROVIDERS to use them; the other
+    # hosts are single-shot, so an interrupted upload starts over
+    TUS_ENDPOINT = os.getenv("TUS_ENDPOINT", "")
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+    UPLOAD_CHUNK_RETRIES = int(os.getenv("UPLOAD_CHUNK_RETRIES", "5"))
+    UPLOAD_RETRY_DELAY = float(os.getenv("UPLOAD_RETRY_DELAY", "1"))
+    UPLOAD_STATE_DIR = os.getenv("UPLOAD_STATE_DIR", os.path.join(DATA_DIR, "uploads"))
+    # Background delivery queue: failed deliveries are retried without re-rendering
+    DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "5"))
+    DELIVERY_RETRY_DELAY = float(os.getenv("DELIVERY_RETRY_DELAY", "300"))  # seconds, grows per attempt
+    # S3-compatible object storage (OUTPUT_DELIVERY=s3): AWS S3, R2, B2, MinIO
+    S3_ENDPOINT = os.getenv("S3_ENDPOINT", "")  # e.g. https://s3.us-east-1.amazonaws.com
+    S3_BUCKET = os.getenv("S3_BUCKET", "")
+    S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY", "")
+    S3_SECRET_KEY = os.getenv("S3_SECRET_KEY", "")
+    S3_REGION = os.getenv("S3_REGION", "us-east-1")
+    S3_PREFIX = os.getenv("S3_PREFIX", "videos/")
+    S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024)))  # min 5MiB
+    S3_CONCURRENCY = int(os.getenv("S3_CONCURRENCY", "4"))
+    S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", str(7 * 24 * 3600)))  # max 7 days
     
     # Free AI model settings
     AI_MODEL_NAME = os.getenv("AI_MODEL_NAME", "microsoft/DialoGPT-medium")
     AI_DEVICE = os.getenv("AI_DEVICE", "cpu")  # Use CPU for free deployment
     AI_MAX_LENGTH = int(os.getenv("AI_MAX_LENGTH", "500"))
     AI_TEMPERATURE = float(os.getenv("AI_TEMPERATURE", "0.7"))
+    # Use the AI script only if it is ready within this many seconds, else the rule-based one (0 = wait)
+    AI_SCRIPT_DEADLINE_SECONDS = float(os.getenv("AI_SCRIPT_DEADLINE_SECONDS", "90"))
+    # Convert the model once to local safetensors and memory-map it on every start
+    AI_MMAP_WEIGHTS = os.getenv("AI_MMAP_WEIGHTS", "true").lower() == "true"
+    AI_WEIGHTS_DIR = os.getenv("AI_WEIGHTS_DIR", os.path.join(DATA_DIR, "models"))
+    AI_WEIGHTS_DTYPE = os.getenv("AI_WEIGHTS_DTYPE", "float32")  # float32, bfloat16 or float16
     
     # Free TTS settings
     TTS_RATE = int(os.getenv("TTS_RATE", "150"))
@@ -50,12 +91,48 @@ class FreeConfig:
         "https://www.reddit.com/r/programming/.rss"
     ]
     
+    # Persistent job queue (survives worker restarts/spin-downs)
+    JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(DATA_DIR, "jobs.db"))
+    CATCHUP_POLICY = os.getenv("CATCHUP_POLICY", "once").lower()  # once, all, skip
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    
+    # Deadline-aware pre-production: VIDEO_UPLOAD_TIME is when the video must be delivered
+    PREPRODUCTION_ENABLED = os.getenv("PREPRODUCTION_ENABLED", "true").lower() == "true"
+    PREPRODUCTION_MARGIN_MINUTES = float(os.getenv("PREPRODUCTION_MARGIN_MINUTES", "10"))
+    TOPIC_REFRESH_WINDOW_MINUTES = float(os.getenv("TOPIC_REFRESH_WINDOW_MINUTES", "30"))
+    
+    # Topic history: skip headlines this similar (token Jaccard) to a past video
+    TOPIC_DB_PATH = os.getenv("TOPIC_DB_PATH", os.path.join(DATA_DIR, "topics.db"))
+    TOPIC_SIMILARITY_THRESHOLD = float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", "0.5"))
+    
+    # Background feed poller (automated mode): ranked topics ready before each run
+    FEED_POLLER_ENABLED = os.getenv("FEED_POLLER_ENABLED", "false").lower() == "true"
+    FEED_POLL_INTERVAL_MINUTES = float(os.getenv("FEED_POLL_INTERVAL_MINUTES", "30"))
+    FEED_POLL_JITTER = float(os.getenv("FEED_POLL_JITTER", "0.2"))  # +/- fraction of the interval
+    TOPIC_STORE_PATH = os.getenv("TOPIC_STORE_PATH", os.path.join(DATA_DIR, "topic_store.json"))
+    TOPIC_STORE_MAX_AGE_HOURS = float(os.getenv("TOPIC_STORE_MAX_AGE_HOURS", "48"))
+    # Per-feed health: failing feeds are skipped, slow or low-yield feeds polled less often
+    FEED_HEALTH_DB_PATH = os.getenv("FEED_HEALTH_DB_PATH", os.path.join(DATA_DIR, "feed_health.db"))
+    FEED_BREAKER_THRESHOLD = int(os.getenv("FEED_BREAKER_THRESHOLD", "3"))  # consecutive failures
+    FEED_BREAKER_COOLDOWN_MINUTES = float(os.getenv("FEED_BREAKER_COOLDOWN_MINUTES", "30"))  # doubles per failure
+    FEED_SLOW_SECONDS = float(os.getenv("FEED_SLOW_SECONDS", "5"))
+    FEED_LOW_YIELD = float(os.getenv("FEED_LOW_YIELD", "0.5"))  # matching topics per fetch
+    FEED_TIMEOUT = float(os.getenv("FEED_TIMEOUT", "15"))  # connect/read timeout per feed request
+    
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     
     # Cleanup settings
     KEEP_VIDEO_COUNT = int(os.getenv("KEEP_VIDEO_COUNT", "5"))
     CLEANUP_OLD_FILES = os.getenv("CLEANUP_OLD_FILES", "true").lower() == "true"
+    # Byte budget for catalogued runs - videos and their sidecars (0 = only KEEP_VIDEO_COUNT applies).
+    # Shared blobs (cached slides and narration) aren't counted; they go when no run references them.
+    OUTPUT_MAX_BYTES = int(float(os.getenv("OUTPUT_MAX_MB", "0")) * 1024 * 1024)
+    CATALOG_DB_PATH = os.getenv("CATALOG_DB_PATH", os.path.join(DATA_DIR, "artifacts.db"))
+    # Content-addressed store for slides, TTS clips and videos (OUTPUT_DIR/blobs)
+    BLOB_STORE_ENABLED = os.getenv("BLOB_STORE_ENABLED", "true").lower() == "true"
+    BLOB_GC_GRACE_DAYS = float(os.getenv("BLOB_GC_GRACE_DAYS", "7"))  # unreferenced blobs stay cached this long
     
     # YouTube settings (manual upload)
     YOUTUBE_UPLOAD_METHOD = "manual"  # Always manual for free version
@@ -64,12 +141,16 @@ class FreeConfig:
     # Render settings (free tier)
     RENDER_FREE_TIER = os.getenv("RENDER_FREE_TIER", "true").lower() == "true"
     
+    # Health/metrics endpoints served in automated mode
+    HEALTH_SERVER_ENABLED = os.getenv("HEALTH_SERVER_ENABLED", "true").lower() == "true"
+    HEALTH_PORT = int(os.getenv("HEALTH_PORT", os.getenv("PORT", "8080")))
+    
     @classmethod
     def validate_config(cls) -> bool:
         """Validate configuration (no API keys needed)"""
         try:
             # Create necessary directories
-            directories = [cls.OUTPUT_DIR, cls.TEMP_DIR, cls.LOGS_DIR, cls.VIDEOS_DIR]
+            directories = [cls.OUTPUT_DIR, cls.TEMP_DIR, cls.LOGS_DIR, cls.VIDEOS_DIR, cls.DATA_DIR]
             for directory in directories:
                 Path(directory).mkdir(parents=True, exist_ok=True)
             
@@ -132,6 +213,7 @@ class FreeConfig:
             "temp": cls.TEMP_DIR,
             "logs": cls.LOGS_DIR,
             "videos": cls.VIDEOS_DIR,
+            "data": cls.DATA_DIR,
             "delivery": cls.OUTPUT_DELIVERY
         }
 
@@ -5,92 +5,196 @@ Uses Hugging Face models and RSS feeds instead of OpenAI API
 """
 
 import json
-import requests
-from typing import List, Dict, Optional
+import math
+import time
+import threading
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-import feedparser
-from bs4 import BeautifulSoup
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
-import torch
+from config_free import FreeConfig
+from feed_health import FeedHealth
+from feed_reader import read_feed
+from health_server import metrics
 from logger import get_logger
+from video_generator_free import MAX_SEGMENTS
+
+# feedparser, transformers and torch are imported where they are used, so
+# modes that never research or generate (status, scheduling) start fast.
 
 logger = get_logger(__name__)
 
+# Free tech RSS feeds
+TECH_FEEDS = [
+    "https://feeds.feedburner.com/oreilly/radar",
+    "https://techcrunch.com/feed/",
+    "https://www.wired.com/feed/rss",
+    "https://feeds.arstechnica.com/arstechnica/index",
+    "https://www.theverge.com/rss/index.xml"
+]
+
+# A headline counts as a tech topic if it mentions any of these
+TECH_KEYWORDS = [
+    'ai', 'artificial intelligence', 'machine learning', 'ml',
+    'python', 'programming', 'coding', 'software',
+    'technology', 'tech', 'startup', 'innovation',
+    'blockchain', 'crypto', 'cybersecurity', 'cloud'
+]
+
+
+def is_tech_title(title: str) -> bool:
+    title = title.lower()
+    return any(tech_word in title for tech_word in TECH_KEYWORDS)
+
+
+# Static instructions come first so their key/values can be computed once per
+# model load and reused; only the topic/length suffix is prefilled per script.
+SCRIPT_PROMPT_PREFIX = """Create a short tech video script.
+
+Include:
+1. Hook/introduction (5-10 seconds)
+2. Main content points (40-50 seconds)
+3. Call to action (5-10 seconds)
+
+Format with timestamps and visual cues.
+"""
+
+
+def script_prompt_suffix(topic: str, video_length: int) -> str:
+    return f"""
+Length: {video_length} seconds
+Topic: {topic}
+Script:
+"""
+
+
+def build_script_prompt(topic: str, video_length: int) -> str:
+    """The script-generation prompt (also what the model benchmark measures)"""
+    return SCRIPT_PROMPT_PREFIX + script_prompt_suffix(topic, video_length)
+
+
+# Rough English BPE density, and the "0:05 - " timestamp plus newline per script line
+TOKENS_PER_WORD = 1.3
+LINE_OVERHEAD_TOKENS = 8
+
+
+def script_token_budget(video_length: int, max_segments: int = MAX_SEGMENTS) -> int:
+    """New tokens worth generating: the words narrated in video_length at TTS_RATE
+    (words per minute), in at most max_segments script lines"""
+    words = video_length * FreeConfig.TTS_RATE / 60
+    return math.ceil(words * TOKENS_PER_WORD + max_segments * LINE_OVERHEAD_TOKENS)
+
+
+def _script_lines(text: str) -> List[str]:
+    """Lines _parse_script turns into segments"""
+    return [line.strip() for line in text.split('\n') if line.strip() and not line.strip().startswith('#')]
+
+
+def _stopping_criteria(tokenizer, prompt_length: int, max_lines: Optional[int] = None,
+                       cancel: Optional[threading.Event] = None):
+    """Stop once max_lines complete script lines exist, or as soon as cancel is set"""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class LineLimit(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            text = tokenizer.decode(input_ids[0, prompt_length:], skip_special_tokens=True)
+            complete = text.rsplit('\n', 1)[0] if '\n' in text else ''
+            done = len(_script_lines(complete)) >= max_lines
+            return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+    class Cancelled(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), cancel.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    criteria = StoppingCriteriaList()
+    if max_lines:
+        criteria.append(LineLimit())
+    if cancel is not None:
+        criteria.append(Cancelled())
+    return criteria
+
 class FreeContentResearcher:
     """Free content research using Hugging Face models and RSS feeds"""
     
-    def __init__(self):
-        self.device = "cpu"  # Use CPU for free deployment
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or FreeConfig.AI_MODEL_NAME
+        self.device = FreeConfig.AI_DEVICE  # CPU by default for free deployment
         self.tokenizer = None
         self.model = None
-        self.text_generator = None
+        self._prefix_cache = None  # (prefix token ids, past key/values) for SCRIPT_PROMPT_PREFIX
+        self.feed_health = FeedHealth()
         self._setup_models()
     
     def _setup_models(self):
         """Setup free Hugging Face models"""
         try:
-            # Use a smaller, faster model for text generation
-            model_name = "microsoft/DialoGPT-medium"  # Free and fast
+            import torch
+            from transformers import AutoTokenizer, AutoModelForCausalLM
             
-            logger.info("Loading free Hugging Face model...")
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                torch_dtype=torch.float32,  # CPU compatible
-                device_map="cpu"
-            )
+            # AI_MODEL_NAME picks the model (see `benchmark_free.py model` to compare candidates)
+            logger.info(f"Loading free Hugging Face model {self.model_name}...")
+            if FreeConfig.AI_MMAP_WEIGHTS:
+                self._load_mapped_model()
+            if self.model is None:
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                # No device_map: it needs the optional accelerate package
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    self.model_name,
+                    torch_dtype=torch.float32  # CPU compatible
+                )
+            if self.device != "cpu":
+                self.model.to(self.device)
             
-            # Setup text generation pipeline
-            self.text_generator = pipeline(
-                "text-generation",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=-1  # CPU
-            )
+            self._prefix_cache = None
             
             logger.info("Free AI models loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to load free AI models: {e}")
+            self.tokenizer = self.model = None
             # Fallback to rule-based content generation
             logger.info("Using fallback rule-based content generation")
     
+    def _load_mapped_model(self):
+        """Map the locally prepared safetensors copy (converted on first use)"""
+        try:
+            from transformers import AutoTokenizer
+            from model_weights import load_mapped, prepare_weights
+            
+            path = prepare_weights(self.model_name, FreeConfig.AI_WEIGHTS_DTYPE)
+            self.tokenizer = AutoTokenizer.from_pretrained(path)
+            self.model = load_mapped(path)
+            logger.info(f"Memory-mapped model weights from {path}")
+        except Exception as e:
+            logger.warning(f"Memory-mapped load failed ({e}), loading weights normally")
+            self.tokenizer = self.model = None
+    
     def get_trending_tech_topics(self) -> List[str]:
         """Get trending tech topics from free RSS feeds"""
         topics = []
         
         try:
-            # Free tech RSS feeds
-            feeds = [
-                "https://feeds.feedburner.com/oreilly/radar",
-                "https://techcrunch.com/feed/",
-                "https://www.wired.com/feed/rss",
-                "https://feeds.arstechnica.com/arstechnica/index",
-                "https://www.theverge.com/rss/index.xml"
-            ]
-            
             logger.info("Fetching trending topics from RSS feeds...")
             
-            for feed_url in feeds:
+            # Feeds with an open circuit or a backed-off poll stride sit this run out
+            # (read-only: only the background poller counts a backed-off feed down)
+            for feed_url in self.feed_health.select(TECH_FEEDS, advance=False):
+                started = time.monotonic()
                 try:
-                    feed = feedparser.parse(feed_url)
-                    for entry in feed.entries[:5]:  # Top 5 from each feed
-                        # Extract keywords from title
-                        title = entry.title.lower()
-                        if any(tech_word in title for tech_word in [
-                            'ai', 'artificial intelligence', 'machine learning', 'ml',
-                            'python', 'programming', 'coding', 'software',
-                            'technology', 'tech', 'startup', 'innovation',
-                            'blockchain', 'crypto', 'cybersecurity', 'cloud'
-                        ]):
-                            topics.append(entry.title)
+                    # Top 5 from each feed - the rest of the document is never downloaded
+                    feed = read_feed(feed_url, limit=5)
+                    matched = [entry["title"] for entry in feed["entries"]
+                               if entry.get("title") and is_tech_title(entry["title"])]
+                    topics.extend(matched)
+                    # Top-5 matches aren't the poller's new-entry count - leave yield to the poller
+                    self.feed_health.record_success(feed_url, time.monotonic() - started, scheduled=False)
                             
                 except Exception as e:
+                    self.feed_health.record_failure(feed_url, e, time.monotonic() - started)
                     logger.warning(f"Failed to parse feed {feed_url}: {e}")
                     continue
             
-            # Remove duplicates and limit to top 10
-            unique_topics = list(set(topics))[:10]
+            # Remove duplicates (keeping feed order, so rank survives) and limit to top 10
+            unique_topics = list(dict.fromkeys(topics))[:10]
             logger.info(f"Found {len(unique_topics)} trending tech topics")
             
             return unique_topics if unique_topics else self._get_fallback_topics()
@@ -115,35 +219,34 @@ class FreeContentResearcher:
         ]
     
     def generate_video_script(self, topic: str, video_length: int = 60) -> Dict:
-        """Generate video script using free Hugging Face models"""
+        """Generate video script using free Hugging Face models
+        
+        The rule-based script is built first and is always ready; the AI script
+        replaces it only if it finishes within AI_SCRIPT_DEADLINE_SECONDS.
+        """
         try:
-            if self.text_generator:
-                # Generate script using AI
-                prompt = f"""Create a {video_length}-second video script about: {topic}
-                
-Include:
-1. Hook/introduction (5-10 seconds)
-2. Main content points (40-50 seconds)
-3. Call to action (5-10 seconds)
-
-Format with timestamps and visual cues."""
-
-                response = self.text_generator(
-                    prompt,
-                    max_length=500,
-                    num_return_sequences=1,
-                    temperature=0.7,
-                    do_sample=True
-                )
-                
-                script_content = response[0]['generated_text']
-                
-            else:
-                # Fallback rule-based generation
-                script_content = self._generate_rule_based_script(topic, video_length)
+            started = time.perf_counter()
+            script_content = self._generate_rule_based_script(topic, video_length)
+            rule_seconds = time.perf_counter() - started
+            
+            ai = None
+            if self.model is not None:
+                # Generate script using AI, reusing the cached prompt prefix. Only as many
+                # tokens as can be narrated, and only the lines the renderer will use.
+                budget = script_token_budget(video_length)
+                ai = self._generate_ai_script(topic, video_length, budget, FreeConfig.AI_SCRIPT_DEADLINE_SECONDS)
+                if ai["content"] and _script_lines(ai["content"]):
+                    script_content = ai["content"]
+                elif ai["timed_out"]:
+                    logger.warning(f"AI script missed the {FreeConfig.AI_SCRIPT_DEADLINE_SECONDS:.0f}s deadline, "
+                                   "using rule-based script")
+                else:
+                    logger.warning("Model produced no script lines, using rule-based script")
             
             # Parse script into structured format
             script = self._parse_script(script_content, topic)
+            if ai is not None:
+                script["generation"] = self._generation_report(script, budget, ai, rule_seconds)
             
             logger.info(f"Generated script for topic: {topic}")
             return script
@@ -152,6 +255,121 @@ Format with timestamps and visual cues."""
             logger.error(f"Error generating script: {e}")
             return self._generate_fallback_script(topic, video_length)
     
+    def _generate_ai_script(self, topic: str, video_length: int, budget: int, deadline: float) -> Dict:
+        """Run AI generation, abandoning it after `deadline` seconds (0 waits however long it takes)
+        
+        A late generation is cancelled at its next token so it stops using the CPU, and
+        its real duration is recorded when it ends; the report gets the deadline as a lower bound.
+        """
+        result = {"content": None, "generated_tokens": None, "seconds": None, "timed_out": False, "error": None}
+        cancel = threading.Event()
+        lock = threading.Lock()
+        
+        def run():
+            start = time.perf_counter()
+            try:
+                result["content"], result["generated_tokens"] = self.generate_from_prefix(
+                    script_prompt_suffix(topic, video_length),
+                    max_lines=MAX_SEGMENTS,
+                    cancel=cancel,
+                    max_new_tokens=budget,
+                    temperature=0.7,
+                    do_sample=True
+                )
+            except Exception as e:
+                logger.error(f"AI script generation failed: {e}")
+                result["error"] = str(e)
+            with lock:
+                result["seconds"] = time.perf_counter() - start
+                late = cancel.is_set()
+            if late:
+                metrics.observe("script_ai", result["seconds"])
+                logger.info(f"Abandoned AI script generation stopped after {result['seconds']:.1f}s")
+        
+        if not deadline:
+            run()
+            return result
+        worker = threading.Thread(target=run, name="script-ai", daemon=True)
+        worker.start()
+        worker.join(deadline)
+        with lock:
+            if result["seconds"] is None:
+                cancel.set()
+                return {"content": None, "generated_tokens": None, "seconds": deadline, "timed_out": True,
+                        "error": None}
+        return result
+    
+    def _generation_report(self, script: Dict, budget: int, ai: Dict, rule_seconds: float) -> Dict:
+        """Which script won the race, each path's latency, and generated vs narrated tokens"""
+        winner = "ai" if ai["content"] and _script_lines(ai["content"]) else "rule_based"
+        used_tokens = 0
+        if winner == "ai":
+            # Only the hook and first segments reach the video
+            rendered = [script["hook"]] + script["segments"][:MAX_SEGMENTS - 1]
+            used_tokens = sum(len(self.tokenizer(seg["text"], add_special_tokens=False).input_ids)
+                              for seg in rendered)
+        metrics.inc(f"script_race_{winner}_total")
+        metrics.inc("script_tokens_generated_total", ai["generated_tokens"] or 0)
+        metrics.inc("script_tokens_used_total", used_tokens)
+        if ai["timed_out"]:
+            ai_latency = f"timed out after {ai['seconds']:.0f}s"  # the worker records its real duration
+        else:
+            metrics.observe("script_ai", ai["seconds"])
+            ai_latency = f"{ai['seconds']:.1f}s"
+        logger.info(f"🏁 Script race: {winner} used (AI {ai_latency}, rule-based {rule_seconds * 1000:.1f}ms); "
+                    f"tokens {ai['generated_tokens'] or 0} generated (budget {budget}), {used_tokens} used")
+        return {
+            "winner": winner,
+            "deadline_seconds": FreeConfig.AI_SCRIPT_DEADLINE_SECONDS,
+            "ai_seconds": ai["seconds"],
+            "ai_timed_out": ai["timed_out"],
+            "rule_based_seconds": rule_seconds,
+            "max_new_tokens": budget,
+            "generated_tokens": ai["generated_tokens"],
+            "used_tokens": used_tokens,
+        }
+    
+    def _prefix_state(self):
+        """Token ids and past key/values of SCRIPT_PROMPT_PREFIX, computed once per model load"""
+        if self._prefix_cache is None:
+            import torch
+            
+            prefix_ids = self.tokenizer(SCRIPT_PROMPT_PREFIX, return_tensors="pt").input_ids.to(self.model.device)
+            with torch.no_grad():
+                past_key_values = self.model(prefix_ids, use_cache=True).past_key_values
+            self._prefix_cache = (prefix_ids, past_key_values)
+            logger.info(f"Cached prompt prefix ({prefix_ids.shape[1]} tokens)")
+        return self._prefix_cache
+    
+    def generate_from_prefix(self, suffix: str, max_lines: Optional[int] = None,
+                             cancel: Optional[threading.Event] = None, **generate_kwargs) -> Tuple[str, int]:
+        """Generate after SCRIPT_PROMPT_PREFIX + suffix, prefilling only the suffix
+        
+        The cached key/values are copied per call because generate extends them in place.
+        With max_lines, generation stops after that many complete script lines; setting
+        cancel stops it at the next token.
+        Returns the generated continuation only, and its length in tokens.
+        """
+        import copy
+        import torch
+        
+        prefix_ids, past_key_values = self._prefix_state()
+        suffix_ids = self.tokenizer(suffix, add_special_tokens=False, return_tensors="pt").input_ids
+        input_ids = torch.cat([prefix_ids, suffix_ids.to(prefix_ids.device)], dim=1)
+        if max_lines or cancel is not None:
+            generate_kwargs["stopping_criteria"] = _stopping_criteria(self.tokenizer, input_ids.shape[1],
+                                                                      max_lines, cancel)
+        with torch.no_grad():
+            output = self.model.generate(
+                input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=copy.deepcopy(past_key_values),
+                pad_token_id=self.tokenizer.eos_token_id,
+                **generate_kwargs
+            )
+        generated = output[0, input_ids.shape[1]:]
+        return self.tokenizer.decode(generated, skip_special_tokens=True), len(generated)
+    
     def _generate_rule_based_script(self, topic: str, video_length: int) -> str:
         """Generate script using templates and rules"""
         templates = {
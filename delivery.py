@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+"""
+Delivery Module
+Uploads finished files to free anonymous file hosts (file.io, 0x0.st, transfer.sh).
+
+Each provider keeps a pooled requests.Session. Uploads are hedged: if the
+primary provider makes no progress within a latency budget, the next provider
+is started too, the first success wins and the others are cancelled.
+
+The anonymous hosts take one single-shot request: an interrupted upload starts
+over, and the sha256 recorded for it is the digest of the local file. Where a
+host answers HEAD on the returned link, the stored size is checked against it.
+
+A tus (resumable upload protocol) endpoint is the only resumable path: it
+uploads in chunks the server verifies against their SHA-256, and persists its
+state, so a restarted process continues where it stopped.
+"""
+
+import os
+import abc
+import json
+import time
+import uuid
+import base64
+import queue
+import hashlib
+import threading
+import mimetypes
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+from config_free import FreeConfig
+from health_server import metrics
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadCancelled(Exception):
+    """Raised inside a request body when another provider already won"""
+
+
+class _UploadBody:
+    """Streams a file as a request body, tracking progress and honouring cancellation"""
+
+    def __init__(self, file_path: str, cancel_event: threading.Event, prefix: bytes = b"", suffix: bytes = b"",
+                 remote_name: Optional[str] = None, content_type: Optional[str] = None):
+        self.file_path = file_path
+        self.remote_name = remote_name or os.path.basename(file_path)
+        self.content_type = content_type or mimetypes.guess_type(self.remote_name)[0] or "application/octet-stream"
+        self.cancel_event = cancel_event
+        self.prefix = prefix
+        self.suffix = suffix
+        self.bytes_sent = 0
+        self.sha256 = None
+        self._digest = hashlib.sha256()
+
+    def __len__(self) -> int:
+        return len(self.prefix) + os.path.getsize(self.file_path) + len(self.suffix)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._sent(self.prefix)
+        with open(self.file_path, "rb") as f:
+            while True:
+                if self.cancel_event.is_set():
+                    raise UploadCancelled()
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._digest.update(chunk)
+                yield self._sent(chunk)
+        self.sha256 = self._digest.hexdigest()
+        yield self._sent(self.suffix)
+
+    def _sent(self, data: bytes) -> bytes:
+        self.bytes_sent += len(data)
+        return data
+
+
+class UploadProvider(abc.ABC):
+    """An anonymous file host; subclasses implement the request/response format"""
+
+    name = "provider"
+    default_url = ""
+    # Whether a HEAD on the returned link reports the stored size (file.io links are single-download)
+    head_verifies = False
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None):
+        self.url = (url or self.default_url).rstrip("/")
+        self.timeout = timeout or FreeConfig.UPLOAD_TIMEOUT
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Pooled session, so repeated uploads reuse TCP/TLS connections"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    @abc.abstractmethod
+    def upload(self, file_path: str, body: _UploadBody) -> Optional[str]:
+        """Send body and return the public URL"""
+
+    def make_body(self, file_path: str, cancel_event: threading.Event,
+                  remote_name: Optional[str] = None) -> _UploadBody:
+        return _UploadBody(file_path, cancel_event, remote_name=remote_name)
+
+    def verify(self, url: str, size: int) -> str:
+        """How the stored copy was checked: "size" (HEAD Content-Length) or "none" - raises on a mismatch"""
+        if not self.head_verifies:
+            return "none"
+        try:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+        except Exception as e:
+            logger.debug(f"{self.name}: HEAD {url} failed: {e}")
+            return "none"
+        length = response.headers.get("Content-Length")
+        if response.status_code != 200 or length is None:
+            return "none"
+        if int(length) != size:
+            raise RuntimeError(f"stored size {length} does not match {size} bytes sent")
+        return "size"
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class _MultipartProvider(UploadProvider):
+    """Providers taking a multipart/form-data POST with a `file` field"""
+
+    form_fields: Dict[str, str] = {}
+
+    def make_body(self, file_path: str, cancel_event: threading.Event,
+                  remote_name: Optional[str] = None) -> _UploadBody:
+        boundary = uuid.uuid4().hex
+        filename = remote_name or os.path.basename(file_path)
+        mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        prefix = b""
+        for key, value in self.form_fields.items():
+            prefix += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{key}\"\r\n\r\n"
+                       f"{value}\r\n").encode("utf-8")
+        prefix += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+                   f"filename=\"{filename}\"\r\nContent-Type: {mime_type}\r\n\r\n").encode("utf-8")
+        suffix = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        return _UploadBody(file_path, cancel_event, prefix, suffix, remote_name=filename,
+                           content_type=f"multipart/form-data; boundary={boundary}")
+
+    def _post(self, body: _UploadBody):
+        return self.session.post(
+            self.url,
+            data=body,
+            headers={"Content-Type": body.content_type, "Content-Length": str(len(body))},
+            timeout=self.timeout,
+        )
+
+
+class FileIoProvider(_MultipartProvider):
+    name = "file.io"
+    default_url = "https://file.io"
+
+    @property
+    def form_fields(self) -> Dict[str, str]:
+        return {"expires": f"{FreeConfig.UPLOAD_EXPIRY_DAYS}d"}
+
+    def upload(self, file_path: str, body: _UploadBody) -> Optional[str]:
+        response = self._post(body)
+        if response.status_code == 200:
+            result = response.json()
+            if result.get("success"):
+                logger.info("⚠️ file.io links are one-time download only!")
+                return result.get("link")
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+
+class ZeroXZeroProvider(_MultipartProvider):
+    name = "0x0.st"
+    default_url = "https://0x0.st"
+    head_verifies = True
+
+    def upload(self, file_path: str, body: _UploadBody) -> Optional[str]:
+        response = self._post(body)
+        if response.status_code == 200:
+            return response.text.strip()
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+
+class TransferShProvider(UploadProvider):
+    name = "transfer.sh"
+    default_url = "https://transfer.sh"
+    head_verifies = True
+
+    def upload(self, file_path: str, body: _UploadBody) -> Optional[str]:
+        response = self.session.put(
+            f"{self.url}/{body.remote_name}",
+            data=body,
+            headers={"Content-Type": body.content_type, "Content-Length": str(len(body)),
+                     "Max-Days": str(FreeConfig.UPLOAD_EXPIRY_DAYS)},
+            timeout=self.timeout,
+        )
+        if response.status_code in (200, 201):
+            return response.text.strip()
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+
+class ChecksumMismatch(Exception):
+    """The server rejected a chunk whose checksum didn't match (tus 460)"""
+
+
+class _ChunkBody:
+    """One tus chunk as a request body, advancing the upload's bytes_sent as it streams"""
+
+    def __init__(self, chunk: bytes, offset: int, body: _UploadBody):
+        self.chunk = chunk
+        self.offset = offset
+        self.body = body
+
+    def __len__(self) -> int:
+        return len(self.chunk)
+
+    def __iter__(self) -> Iterator[bytes]:
+        view = memoryview(self.chunk)
+        self.body.bytes_sent = self.offset
+        for start in range(0, len(view), CHUNK_SIZE):
+            if self.body.cancel_event.is_set():
+                raise UploadCancelled()
+            piece = view[start:start + CHUNK_SIZE]
+            yield piece.tobytes()
+            self.body.bytes_sent = self.offset + start + len(piece)
+
+
+class ResumableUploadProvider(UploadProvider):
+    """tus 1.0 endpoint: chunked PATCH uploads with per-chunk SHA-256 and persisted state"""
+
+    name = "tus"
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None,
+                 chunk_size: Optional[int] = None, state_dir: Optional[str] = None,
+                 max_chunk_retries: Optional[int] = None):
+        super().__init__(url or FreeConfig.TUS_ENDPOINT, timeout)
+        self.chunk_size = chunk_size or FreeConfig.UPLOAD_CHUNK_SIZE
+        self.state_dir = state_dir or FreeConfig.UPLOAD_STATE_DIR
+        self.max_chunk_retries = max_chunk_retries or FreeConfig.UPLOAD_CHUNK_RETRIES
+        self.retry_delay = FreeConfig.UPLOAD_RETRY_DELAY
+
+    def upload(self, file_path: str, body: _UploadBody) -> Optional[str]:
+        size = os.path.getsize(file_path)
+        sha256 = file_sha256(file_path)
+        state_path = os.path.join(self.state_dir, f"{sha256}.json")
+
+        state = self._load_state(state_path)
+        offset = self._remote_offset(state["upload_url"]) if state else None
+        if offset is None:
+            state = {"file": os.path.abspath(file_path), "size": size, "sha256": sha256,
+                     "upload_url": self._create(body.remote_name, size, sha256),
+                     "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            offset = 0
+        else:
+            logger.info(f"↩️ Resuming {body.remote_name} at {offset}/{size} bytes")
+        state["offset"] = offset
+        self._save_state(state_path, state)
+
+        failures = 0
+        with open(file_path, "rb") as f:
+            while offset < size:
+                if body.cancel_event.is_set():
+                    raise UploadCancelled()
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                try:
+                    offset = self._patch(state["upload_url"], offset, chunk, body)
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    if failures > self.max_chunk_retries:
+                        raise RuntimeError(f"chunk at offset {offset} failed {failures} times: {e}")
+                    logger.warning(f"Chunk at {offset} failed ({failures}/{self.max_chunk_retries}): {e}")
+                    time.sleep(min(2 ** (failures - 1), 30) * self.retry_delay)
+                    # The server may have kept part of the chunk - continue from what it has
+                    remote = self._remote_offset(state["upload_url"])
+                    if remote is None:
+                        raise RuntimeError("upload expired on the server")
+                    offset = remote
+                body.bytes_sent = offset
+                state["offset"] = offset
+                self._save_state(state_path, state)
+
+        # Every chunk was checksum-verified; the remote length must match too
+        if self._remote_offset(state["upload_url"]) != size:
+            raise RuntimeError("remote size does not match after upload")
+        body.sha256 = sha256
+        os.remove(state_path)
+        return state["upload_url"]
+
+    def verify(self, url: str, size: int) -> str:
+        # upload() already checked every chunk's SHA-256 and the final remote length
+        return "checksum"
+
+    def _create(self, name: str, size: int, sha256: str) -> str:
+        metadata = {"filename": name, "sha256": sha256}
+        response = self.session.post(self.url, headers={
+            "Tus-Resumable": "1.0.0",
+            "Upload-Length": str(size),
+            "Upload-Metadata": ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items()),
+        }, timeout=self.timeout)
+        if response.status_code != 201 or "Location" not in response.headers:
+            raise RuntimeError(f"create failed: HTTP {response.status_code}")
+        from urllib.parse import urljoin
+        return urljoin(self.url + "/", response.headers["Location"])
+
+    def _patch(self, upload_url: str, offset: int, chunk: bytes, body: _UploadBody) -> int:
+        checksum = base64.b64encode(hashlib.sha256(chunk).digest()).decode()
+        response = self.session.patch(upload_url, data=_ChunkBody(chunk, offset, body), headers={
+            "Tus-Resumable": "1.0.0",
+            "Upload-Offset": str(offset),
+            "Upload-Checksum": f"sha256 {checksum}",
+            "Content-Type": "application/offset+octet-stream",
+        }, timeout=self.timeout)
+        if response.status_code == 460:
+            raise ChecksumMismatch(f"checksum mismatch at offset {offset}")
+        if response.status_code != 204:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return int(response.headers["Upload-Offset"])
+
+    def _remote_offset(self, upload_url: str) -> Optional[int]:
+        response = self.session.head(upload_url, headers={"Tus-Resumable": "1.0.0"}, timeout=self.timeout)
+        if response.status_code in (404, 410):
+            return None
+        response.raise_for_status()
+        return int(response.headers["Upload-Offset"])
+
+    def _load_state(self, state_path: str) -> Optional[Dict]:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, state_path: str, state: Dict):
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, state_path)
+
+
+PROVIDER_CLASSES = {cls.name: cls for cls in (FileIoProvider, ZeroXZeroProvider, TransferShProvider,
+                                              ResumableUploadProvider)}
+
+
+def build_providers(names: Optional[List[str]] = None) -> List[UploadProvider]:
+    """Providers in priority order, from DELIVERY_PROVIDERS by default"""
+    providers = []
+    for name in names or FreeConfig.DELIVERY_PROVIDERS:
+        cls = PROVIDER_CLASSES.get(name.strip())
+        if cls is None:
+            logger.warning(f"Unknown delivery provider: {name}")
+            continue
+        if cls is ResumableUploadProvider and not FreeConfig.TUS_ENDPOINT:
+            logger.warning("Skipping tus provider: TUS_ENDPOINT is not set")
+            continue
+        providers.append(cls())
+    return providers
+
+
+class HedgedUploader:
+    """Uploads a file to the first provider that succeeds, hedging slow ones"""
+
+    def __init__(self, providers: Optional[List[UploadProvider]] = None, latency_budget: Optional[float] = None):
+        self.providers = providers if providers is not None else build_providers()
+        self.latency_budget = latency_budget if latency_budget is not None else FreeConfig.UPLOAD_LATENCY_BUDGET
+        self.stats: Dict[str, Dict] = {
+            p.name: {"uploads": 0, "failures": 0, "bytes": 0, "seconds": 0.0, "throughput_bps": None}
+            for p in self.providers
+        }
+        self._stats_lock = threading.Lock()
+
+    def upload(self, file_path: str, remote_name: Optional[str] = None) -> Optional[Dict]:
+        """Upload a file; returns {"url", "provider", "bytes", "seconds", "sha256", "verified"} or None
+
+        sha256 is the digest of the local file; verified says what the host confirmed
+        about its copy: "checksum" (tus), "size" (HEAD on the link) or "none".
+        """
+        if not os.path.exists(file_path):
+            logger.error(f"File not found for upload: {file_path}")
+            return None
+        if not self.providers:
+            logger.error("No delivery providers configured")
+            return None
+
+        filename = remote_name or os.path.basename(file_path)
+        results = queue.Queue()
+        cancel_event = threading.Event()
+        attempts = []  # (provider, body)
+        pending = list(self.providers)
+
+        def launch():
+            provider = pending.pop(0)
+            body = provider.make_body(file_path, cancel_event, remote_name)
+            attempts.append((provider, body))
+            logger.info(f"📤 Uploading {filename} to {provider.name}...")
+            threading.Thread(
+                target=self._attempt, args=(provider, file_path, body, cancel_event, results),
+                name=f"upload-{provider.name}", daemon=True,
+            ).start()
+
+        launch()
+        running = 1
+        last_progress = 0
+        while running:
+            try:
+                provider, url, verified, error, seconds = results.get(timeout=self.latency_budget)
+            except queue.Empty:
+                # Hedge: the newest attempt made no progress within the budget
+                progress = attempts[-1][1].bytes_sent
+                if pending and progress == last_progress:
+                    logger.warning(f"{attempts[-1][0].name} stalled, hedging with {pending[0].name}")
+                    metrics.inc("upload_hedges_total")
+                    launch()
+                    running += 1
+                    last_progress = 0
+                else:
+                    last_progress = progress
+                continue
+
+            running -= 1
+            if url:
+                cancel_event.set()
+                logger.info(f"✅ {provider.name} URL: {url}")
+                body = next(b for p, b in attempts if p is provider)
+                return {"url": url, "provider": provider.name, "bytes": os.path.getsize(file_path),
+                        "seconds": seconds, "sha256": body.sha256 or file_sha256(file_path), "verified": verified}
+
+            logger.warning(f"{provider.name} failed: {error}")
+            if pending:
+                launch()
+                running += 1
+                last_progress = 0
+
+        logger.error("All upload services failed")
+        return None
+
+    def _attempt(self, provider: UploadProvider, file_path: str, body: _UploadBody,
+                 cancel_event: threading.Event, results: queue.Queue):
+        start = time.perf_counter()
+        try:
+            url = provider.upload(file_path, body)
+            if not url:
+                raise RuntimeError("empty response")
+            verified = provider.verify(url, os.path.getsize(file_path))
+            seconds = time.perf_counter() - start
+            self._record(provider.name, len(body), seconds, ok=True)
+            results.put((provider, url, verified, None, seconds))
+        except Exception as e:
+            seconds = time.perf_counter() - start
+            if cancel_event.is_set():
+                logger.debug(f"{provider.name} upload cancelled")
+            else:
+                self._record(provider.name, 0, seconds, ok=False)
+            results.put((provider, None, None, e, seconds))
+
+    def _record(self, name: str, size: int, seconds: float, ok: bool):
+        with self._stats_lock:
+            stats = self.stats[name]
+            if ok:
+                stats["uploads"] += 1
+                stats["bytes"] += size
+                stats["seconds"] += seconds
+                stats["throughput_bps"] = stats["bytes"] / stats["seconds"] if stats["seconds"] else None
+            else:
+                stats["failures"] += 1
+        metrics.observe(f"upload_{name}", seconds)
+        metrics.inc(f"upload_{'success' if ok else 'failure'}_total", provider=name)
+        if ok:
+            metrics.inc("upload_bytes_total", size, provider=name)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-provider upload counts and throughput"""
+        with self._stats_lock:
+            return {name: dict(stats) for name, stats in self.stats.items()}
+
+
+_default_uploader = None
+_default_lock = threading.Lock()
+
+
+def get_uploader() -> HedgedUploader:
+    """Shared uploader, so sessions stay pooled across uploads"""
+    global _default_uploader
+    with _default_lock:
+        if _default_uploader is None:
+            _default_uploader = HedgedUploader()
+        return _default_uploader
+
+
+def upload_file(file_path: str, remote_name: Optional[str] = None) -> Optional[str]:
+    """Upload a file with the shared hedged uploader and return its public URL"""
+    result = get_uploader().upload(file_path, remote_name)
+    return result["url"] if result else None
+
+
+def manifest_path_for(video_path: str) -> str:
+    """Path of the `_delivery.json` manifest written next to a video"""
+    return os.path.splitext(video_path)[0] + "_delivery.json"
+
+
+class DeliveryQueue:
+    """Background delivery of a run's artifacts, retried later without re-rendering"""
+
+    METHODS = ("transfer_sh", "email", "s3")
+
+    def __init__(self, output_dir: Optional[str] = None, uploader: Optional[HedgedUploader] = None,
+                 max_attempts: Optional[int] = None, retry_delay: Optional[float] = None,
+                 on_update: Optional[Callable[[str, str, Dict], None]] = None):
+        self.output_dir = output_dir or FreeConfig.OUTPUT_DIR
+        self.on_update = on_update  # (video_path, manifest_path, manifest) after every manifest write
+        self._uploader = uploader
+        self.max_attempts = max_attempts or FreeConfig.DELIVERY_MAX_ATTEMPTS
+        self.retry_delay = retry_delay if retry_delay is not None else FreeConfig.DELIVERY_RETRY_DELAY
+        self.jobs: List[Dict] = []
+        self.active = 0
+        self.running = False
+        self.thread = None
+        self._cond = threading.Condition()
+
+    @property
+    def uploader(self) -> HedgedUploader:
+        return self._uploader or get_uploader()
+
+    def start(self):
+        """Start the delivery thread and re-queue deliveries left unfinished"""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+        self.recover()
+        self.thread = threading.Thread(target=self._run, name="delivery-queue", daemon=True)
+        self.thread.start()
+        logger.info("Delivery queue started")
+
+    def stop(self, timeout: float = 5):
+        """Stop the delivery thread (pending manifests are picked up on next start)"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+
+    def submit(self, video_path: str, instructions_path: str, method: str) -> str:
+        """Queue a run's artifacts for delivery; returns the manifest path"""
+        manifest = {
+            "method": method,
+            "status": "pending",
+            "attempts": 0,
+            "video_file": os.path.basename(video_path),
+            "instructions_file": os.path.basename(instructions_path) if instructions_path else None,
+            "created_at": datetime.now().isoformat(),
+        }
+        manifest_path = manifest_path_for(video_path)
+        self._write_manifest(manifest_path, manifest)
+        self._notify(video_path, manifest_path, manifest)
+        self._enqueue({"manifest_path": manifest_path, "video_path": video_path,
+                       "instructions_path": instructions_path, "method": method, "due": time.time()})
+        logger.info(f"📦 Delivery queued ({method}): {os.path.basename(video_path)}")
+        return manifest_path
+
+    def recover(self) -> int:
+        """Re-queue deliveries whose manifests aren't complete (e.g. after a restart)"""
+        recovered = 0
+        if not os.path.isdir(self.output_dir):
+            return 0
+        for name in os.listdir(self.output_dir):
+            if not name.endswith("_delivery.json"):
+                continue
+            manifest_path = os.path.join(self.output_dir, name)
+            manifest = self._read_manifest(manifest_path)
+            if not manifest or manifest.get("status") not in ("pending", "retrying"):
+                continue
+            video_path = os.path.join(self.output_dir, manifest["video_file"])
+            if manifest.get("method") not in self.METHODS or not os.path.exists(video_path):
+                continue
+            instructions = manifest.get("instructions_file")
+            self._enqueue({"manifest_path": manifest_path, "video_path": video_path,
+                           "instructions_path": os.path.join(self.output_dir, instructions) if instructions else None,
+                           "method": manifest["method"], "due": time.time()})
+            recovered += 1
+        if recovered:
+            logger.info(f"Re-queued {recovered} unfinished deliveries")
+        return recovered
+
+    def wait(self, timeout: Optional[float] = None, include_retries: bool = True) -> bool:
+        """Block until no deliveries are queued or running
+
+        With include_retries=False, deliveries waiting out a retry back-off don't
+        count - their manifests stay pending and the next start() re-queues them.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self.active or any(include_retries or j["due"] <= time.time() for j in self.jobs):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self.jobs) + self.active
+
+    def _enqueue(self, job: Dict):
+        with self._cond:
+            if any(j["manifest_path"] == job["manifest_path"] for j in self.jobs):
+                return
+            self.jobs.append(job)
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                job = None
+                while self.running and job is None:
+                    now = time.time()
+                    due = [j for j in self.jobs if j["due"] <= now]
+                    if due:
+                        job = min(due, key=lambda j: j["due"])
+                        self.jobs.remove(job)
+                        self.active += 1
+                    else:
+                        next_due = min((j["due"] for j in self.jobs), default=None)
+                        self._cond.wait(None if next_due is None else next_due - now)
+                if job is None:
+                    return
+            try:
+                self._deliver(job)
+            except Exception as e:
+                logger.error(f"Delivery error for {job['video_path']}: {e}")
+            finally:
+                with self._cond:
+                    self.active -= 1
+                    self._cond.notify_all()
+
+    def _deliver(self, job: Dict):
+        manifest = self._read_manifest(job["manifest_path"]) or {}
+        manifest["attempts"] = manifest.get("attempts", 0) + 1
+        start = time.perf_counter()
+
+        if job["method"] == "email":
+            delivered = self._deliver_email(job)
+        elif job["method"] == "s3":
+            from object_storage import get_object_storage
+            storage = get_object_storage()
+            delivered = bool(storage) and self._deliver_uploads(job, manifest, storage)
+        else:
+            delivered = self._deliver_uploads(job, manifest, self.uploader)
+
+        metrics.observe("delivery", time.perf_counter() - start)
+        if delivered:
+            manifest["status"] = "complete"
+            manifest["delivered_at"] = datetime.now().isoformat()
+            manifest.pop("next_attempt_at", None)
+            logger.info(f"✅ Delivered {manifest.get('video_file')} ({job['method']})")
+            if manifest.get("video_url"):
+                logger.info(f"🔗 Video download URL: {manifest['video_url']}")
+            if manifest.get("instructions_url"):
+                logger.info(f"🔗 Instructions download URL: {manifest['instructions_url']}")
+        elif manifest["attempts"] >= self.max_attempts:
+            manifest["status"] = "failed"
+            logger.error(f"❌ Delivery of {manifest.get('video_file')} failed after {manifest['attempts']} attempts")
+            logger.warning("💡 Video saved locally, check output folder")
+        else:
+            delay = self.retry_delay * manifest["attempts"]
+            manifest["status"] = "retrying"
+            manifest["next_attempt_at"] = datetime.fromtimestamp(time.time() + delay).isoformat()
+            logger.warning(f"Delivery of {manifest.get('video_file')} failed, retrying in {delay:.0f}s")
+            self._enqueue(dict(job, due=time.time() + delay))
+        self._write_manifest(job["manifest_path"], manifest)
+        self._notify(job["video_path"], job["manifest_path"], manifest)
+
+    def _notify(self, video_path: str, manifest_path: str, manifest: Dict):
+        if self.on_update:
+            try:
+                self.on_update(video_path, manifest_path, manifest)
+            except Exception as e:
+                logger.warning(f"Delivery update callback failed: {e}")
+
+    def _deliver_uploads(self, job: Dict, manifest: Dict, uploader) -> bool:
+        """Upload every artifact that has no URL yet, all at once"""
+        artifacts = {"video": job["video_path"]}
+        if job["instructions_path"]:
+            artifacts["instructions"] = job["instructions_path"]
+        todo = {kind: path for kind, path in artifacts.items() if not manifest.get(f"{kind}_url")}
+
+        results = {}
+        threads = [threading.Thread(target=lambda k=kind, p=path: results.__setitem__(k, uploader.upload(p)),
+                                    name=f"deliver-{kind}", daemon=True)
+                   for kind, path in todo.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for kind, path in todo.items():
+            result = results.get(kind)
+            if result:
+                manifest[f"{kind}_url"] = result["url"]
+                manifest[f"{kind}_sha256"] = result["sha256"]  # of the local file
+                manifest[f"{kind}_verified"] = result.get("verified", "none")
+                manifest[f"{kind}_provider"] = result["provider"]
+                for extra in ("etag", "key", "url_expires_at"):
+                    if extra in result:
+                        manifest[f"{kind}_{extra}"] = result[extra]
+            else:
+                manifest["last_error"] = f"{kind} upload failed"
+        return all(manifest.get(f"{kind}_url") for kind in artifacts)
+
+    def _deliver_email(self, job: Dict) -> bool:
+        try:
+            from email_delivery import send_video_email
+            return bool(send_video_email(job["video_path"], job["instructions_path"]))
+        except Exception as e:
+            logger.error(f"Email error: {e}")
+            return False
+
+    def _read_manifest(self, manifest_path: str) -> Optional[Dict]:
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest_path: str, manifest: Dict):
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
@@ -6,21 +6,226 @@ All have free tiers!
 """
 
 import os
+import json
+import uuid
+import base64
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+import tempfile
+import threading
+import subprocess
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from typing import Iterator, List, Optional
 from logger import get_logger
+from artifact_catalog import mp4_duration
 
 logger = get_logger(__name__)
 
+# Attachments are read and base64-encoded this many bytes at a time. A multiple
+# of 57 so every chunk encodes to whole 76-character lines.
+CHUNK_BYTES = 57 * 1024
+
+# Gmail rejects messages over 25MB, measured *after* base64 (4/3 plus line
+# breaks), so the raw attachments get roughly 18MB of that.
+EMAIL_SIZE_LIMIT_MB = float(os.getenv('EMAIL_SIZE_LIMIT_MB', '25'))
+ENCODED_OVERHEAD = 77 / 57  # base64 with a CRLF every 76 characters
+MESSAGE_OVERHEAD_BYTES = 64 * 1024  # headers and the text body
+
+# Size-targeted re-encode settings
+EMAIL_AUDIO_KBPS = 64
+MIN_VIDEO_KBPS = 150  # below this the re-encode isn't watchable - send a link instead
+
+
+# ============================================================================
+# Streaming MIME writer
+# ============================================================================
+
+class StreamingMessage:
+    """multipart/mixed message that is written to the wire in small chunks
+
+    Every part is base64-encoded, so no line starts with "." and the output can
+    go straight into an SMTP DATA stream without dot-stuffing.
+    """
+    
+    def __init__(self, sender: str, recipients: List[str], subject: str, body: str):
+        self.sender = sender
+        self.recipients = recipients
+        self.subject = subject
+        self.body = body
+        self.attachments = []
+        self.boundary = f"=={uuid.uuid4().hex}=="
+    
+    def attach_file(self, file_path: str, content_type: str = "application/octet-stream"):
+        self.attachments.append((file_path, content_type))
+    
+    def _headers(self) -> bytes:
+        headers = [
+            f"From: {self.sender}",
+            f"To: {', '.join(self.recipients)}",
+            f"Subject: {Header(self.subject, 'utf-8').encode()}",
+            f"Date: {formatdate(localtime=True)}",
+            f"Message-ID: {make_msgid()}",
+            "MIME-Version: 1.0",
+            f'Content-Type: multipart/mixed; boundary="{self.boundary}"',
+        ]
+        return ("\r\n".join(headers) + "\r\n\r\n").encode("utf-8")
+    
+    def _part_header(self, content_type: str, filename: Optional[str] = None) -> bytes:
+        lines = [f"--{self.boundary}", f"Content-Type: {content_type}", "Content-Transfer-Encoding: base64"]
+        if filename:
+            lines.append(f'Content-Disposition: attachment; filename="{filename}"')
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+    
+    @staticmethod
+    def _encode(data: bytes) -> bytes:
+        return base64.encodebytes(data).replace(b"\n", b"\r\n")
+    
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Yield the complete message; memory use is bounded by CHUNK_BYTES"""
+        yield self._headers()
+        yield self._part_header('text/plain; charset="utf-8"')
+        yield self._encode(self.body.encode("utf-8"))
+        for file_path, content_type in self.attachments:
+            yield self._part_header(content_type, os.path.basename(file_path))
+            with open(file_path, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    yield self._encode(chunk)
+        yield f"--{self.boundary}--\r\n".encode("utf-8")
+
+
+# ============================================================================
+# Pooled SMTP session
+# ============================================================================
+
+class SmtpSession:
+    """One SMTP connection reused across sends (checked with NOOP, reopened when dropped)"""
+    
+    def __init__(self, host: str, port: int, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = True, timeout: float = 60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.server = None
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> smtplib.SMTP:
+        logger.info(f"Connecting to SMTP {self.host}:{self.port}...")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections_opened += 1
+        return server
+    
+    def _connection(self) -> smtplib.SMTP:
+        if self.server is not None:
+            try:
+                if self.server.noop()[0] == 250:
+                    return self.server
+            except smtplib.SMTPException:
+                pass
+            self._discard()
+        self.server = self._connect()
+        return self.server
+    
+    def _discard(self):
+        if self.server is not None:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+            self.server = None
+    
+    def send(self, message: StreamingMessage) -> List[str]:
+        """Send to all recipients in one DATA transfer; returns the accepted recipients"""
+        with self._lock:
+            try:
+                return self._send(message)
+            except smtplib.SMTPServerDisconnected:
+                # Pooled connection died between NOOP and DATA - one fresh attempt
+                self._discard()
+                return self._send(message)
+    
+    def _send(self, message: StreamingMessage) -> List[str]:
+        server = self._connection()
+        try:
+            code, response = server.mail(message.sender)
+            if code != 250:
+                raise smtplib.SMTPSenderRefused(code, response, message.sender)
+            accepted = [r for r in message.recipients if server.rcpt(r)[0] in (250, 251)]
+            if not accepted:
+                raise smtplib.SMTPRecipientsRefused({r: (550, b"refused") for r in message.recipients})
+            
+            server.putcmd("data")
+            code, response = server.getreply()
+            if code != 354:
+                raise smtplib.SMTPDataError(code, response)
+            for chunk in message.iter_bytes():
+                server.send(chunk)
+            server.send(b".\r\n")
+            code, response = server.getreply()
+            if code != 250:
+                raise smtplib.SMTPDataError(code, response)
+            return accepted
+        except (smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError):
+            try:
+                server.rset()
+            except smtplib.SMTPException:
+                self._discard()
+            raise
+        except Exception:
+            # Unknown state mid-transaction - never hand this connection out again
+            self._discard()
+            raise
+    
+    def close(self):
+        with self._lock:
+            if self.server is not None:
+                try:
+                    self.server.quit()
+                except Exception:
+                    pass
+                self.server = None
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_smtp_session(host: str, port: int, username: Optional[str], password: Optional[str],
+                     starttls: bool = True) -> SmtpSession:
+    """Shared session per server/account, so repeated sends reuse the connection"""
+    key = (host, port, username, starttls)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None or session.password != password:
+            session = _sessions[key] = SmtpSession(host, port, username, password, starttls)
+        return session
+
+
+def _recipients(default: str) -> List[str]:
+    """RECIPIENT_EMAIL may list several addresses, separated by commas"""
+    configured = os.getenv('RECIPIENT_EMAIL') or default
+    return [r.strip() for r in configured.split(",") if r.strip()]
+
 
 # ============================================================================
 # OPTION 1: Gmail SMTP (EASIEST - No API key, just use your Gmail!)
 # ============================================================================
 
-def send_via_gmail_smtp(video_path: str, instructions_path: str = None):
+def send_via_gmail_smtp(video_path: str, instructions_path: str = None, video_url: str = None):
     """
     Send via Gmail SMTP - EASIEST option!
     
@@ -33,23 +238,23 @@ def send_via_gmail_smtp(video_path: str, instructions_path: str = None):
     Environment Variables:
     - GMAIL_ADDRESS: your-email@gmail.com
     - GMAIL_APP_PASSWORD: your 16-char app password (no spaces)
+    - RECIPIENT_EMAIL: optional, comma-separated for several recipients
+    - SMTP_HOST / SMTP_PORT / SMTP_STARTTLS: optional, default smtp.gmail.com:587 with STARTTLS
+    
+    Attachments are streamed: the video is base64-encoded chunk by chunk into
+    the SMTP DATA stream instead of being held in memory. With video_url the
+    video is linked instead of attached.
     """
     try:
         gmail_address = os.getenv('GMAIL_ADDRESS')
         gmail_password = os.getenv('GMAIL_APP_PASSWORD')
-        recipient = os.getenv('RECIPIENT_EMAIL') or gmail_address
+        recipients = _recipients(gmail_address or "")
         
         if not gmail_address or not gmail_password:
             logger.error("Gmail credentials not set. Need: GMAIL_ADDRESS, GMAIL_APP_PASSWORD")
             return False
         
-        logger.info(f"📧 Sending via Gmail to {recipient}...")
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = gmail_address
-        msg['To'] = recipient
-        msg['Subject'] = f'🎥 YouTube Video Ready: {os.path.basename(video_path)}'
+        logger.info(f"📧 Sending via Gmail to {', '.join(recipients)}...")
         
         # Email body
         video_size = os.path.getsize(video_path) / (1024 * 1024)
@@ -60,41 +265,39 @@ Your YouTube video is ready!
 💾 Size: {video_size:.1f}MB
 🎬 Format: 720p HD MP4
 
+{f"🔗 Download: {video_url}" if video_url else ""}
+
 Next Steps:
-1. Download the attached video
+1. Download the {"linked" if video_url else "attached"} video
 2. Review the content
 3. Upload to YouTube
 
 Generated by your Free YouTube Agent on Render
 """
-        msg.attach(MIMEText(body, 'plain'))
+        msg = StreamingMessage(gmail_address, recipients,
+                               f'🎥 YouTube Video Ready: {os.path.basename(video_path)}', body)
         
         # Attach video
-        logger.info(f"Attaching video ({video_size:.1f}MB)...")
-        with open(video_path, 'rb') as f:
-            part = MIMEBase('application', 'octet-stream')
-            part.set_payload(f.read())
-            encoders.encode_base64(part)
-            part.add_header('Content-Disposition', f'attachment; filename={os.path.basename(video_path)}')
-            msg.attach(part)
+        if not video_url:
+            logger.info(f"Attaching video ({video_size:.1f}MB)...")
+            msg.attach_file(video_path)
         
         # Attach instructions if provided
         if instructions_path and os.path.exists(instructions_path):
             logger.info("Attaching instructions...")
-            with open(instructions_path, 'rb') as f:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(f.read())
-                encoders.encode_base64(part)
-                part.add_header('Content-Disposition', f'attachment; filename={os.path.basename(instructions_path)}')
-                msg.attach(part)
+            msg.attach_file(instructions_path)
         
-        # Send via Gmail SMTP
-        logger.info("Connecting to Gmail SMTP...")
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(gmail_address, gmail_password)
-        server.send_message(msg)
-        server.quit()
+        # Send via Gmail SMTP (pooled session)
+        session = get_smtp_session(
+            os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+            int(os.getenv('SMTP_PORT', '587')),
+            gmail_address,
+            gmail_password,
+            os.getenv('SMTP_STARTTLS', 'true').lower() == 'true',
+        )
+        accepted = session.send(msg)
+        if len(accepted) < len(recipients):
+            logger.warning(f"Some recipients were refused: {sorted(set(recipients) - set(accepted))}")
         
         logger.info(f"✅ Email sent successfully via Gmail!")
         return True
@@ -106,6 +309,79 @@ Generated by your Free YouTube Agent on Render
         return False
 
 
+# ============================================================================
+# Attachment size limits
+# ============================================================================
+
+def attachment_budget(limit_mb: Optional[float] = None) -> int:
+    """Raw attachment bytes that still fit the message size limit once encoded"""
+    limit_mb = EMAIL_SIZE_LIMIT_MB if limit_mb is None else limit_mb
+    return int((limit_mb * 1024 * 1024 - MESSAGE_OVERHEAD_BYTES) / ENCODED_OVERHEAD)
+
+
+def fits_in_email(*paths: Optional[str]) -> bool:
+    """Whether the files, once base64-encoded, stay under the provider limit"""
+    return sum(os.path.getsize(p) for p in paths if p and os.path.exists(p)) <= attachment_budget()
+
+
+def encode_for_size(video_path: str, target_bytes: int) -> Optional[str]:
+    """Two-pass x264 re-encode aimed at target_bytes; returns the new file or None
+
+    The bitrate comes from the duration: target bits / seconds, minus the audio
+    track and a few percent of container overhead.
+    """
+    try:
+        import imageio_ffmpeg
+        
+        ffmpeg = imageio_ffmpeg.get_ffmpeg_exe()
+        # The mvhd header is enough; only decode the stream if it can't be read
+        duration = mp4_duration(video_path)
+        if duration is None:
+            _, duration = imageio_ffmpeg.count_frames_and_secs(video_path)
+        if not duration:
+            return None
+        total_kbps = target_bytes * 8 * 0.95 / duration / 1000
+        video_kbps = int(total_kbps - EMAIL_AUDIO_KBPS)
+        if video_kbps < MIN_VIDEO_KBPS:
+            logger.warning(f"{duration:.0f}s video would need {video_kbps}kbps to fit - too low")
+            return None
+        
+        output_path = os.path.splitext(video_path)[0] + "_email.mp4"
+        logger.info(f"🎞️ Re-encoding for email at {video_kbps}kbps ({duration:.0f}s, target {target_bytes / 1e6:.1f}MB)...")
+        with tempfile.TemporaryDirectory() as tmp:
+            passlog = os.path.join(tmp, "pass")
+            common = [ffmpeg, "-y", "-loglevel", "error", "-i", video_path,
+                      "-c:v", "libx264", "-preset", "medium", "-b:v", f"{video_kbps}k", "-passlogfile", passlog]
+            subprocess.run(common + ["-pass", "1", "-an", "-f", "mp4", os.devnull], check=True, timeout=1800)
+            subprocess.run(common + ["-pass", "2", "-c:a", "aac", "-b:a", f"{EMAIL_AUDIO_KBPS}k",
+                                     "-movflags", "+faststart", output_path], check=True, timeout=1800)
+        
+        if os.path.getsize(output_path) > target_bytes:
+            logger.warning("Re-encoded video still exceeds the email limit")
+            os.remove(output_path)
+            return None
+        return output_path
+        
+    except Exception as e:
+        logger.error(f"Email re-encode failed: {e}")
+        return None
+
+
+def _video_download_url(video_path: str) -> Optional[str]:
+    """URL from a finished upload (delivery manifest), or upload the video now"""
+    from delivery import manifest_path_for, upload_file
+    
+    try:
+        with open(manifest_path_for(video_path), "r", encoding="utf-8") as f:
+            url = json.load(f).get("video_url")
+        if url:
+            return url
+    except (OSError, ValueError):
+        pass
+    logger.info("🚚 Uploading video to send a download link instead...")
+    return upload_file(video_path)
+
+
 # ============================================================================
 # MASTER FUNCTION - This is what main_free.py imports!
 # ============================================================================
@@ -123,7 +399,28 @@ def send_video_email(video_path: str, instructions_path: str = None):
     # Try Gmail SMTP
     if os.getenv('GMAIL_ADDRESS'):
         logger.info("Using Gmail SMTP...")
-        return send_via_gmail_smtp(video_path, instructions_path)
+        
+        # Check the size before reading or encoding anything
+        if fits_in_email(video_path, instructions_path):
+            return send_via_gmail_smtp(video_path, instructions_path)
+        
+        size_mb = os.path.getsize(video_path) / (1024 * 1024)
+        logger.warning(f"Video is {size_mb:.1f}MB - too large for the {EMAIL_SIZE_LIMIT_MB:.0f}MB email limit")
+        budget = attachment_budget()
+        if instructions_path and os.path.exists(instructions_path):
+            budget -= os.path.getsize(instructions_path)
+        smaller = encode_for_size(video_path, budget)
+        if smaller:
+            try:
+                return send_via_gmail_smtp(smaller, instructions_path)
+            finally:
+                os.remove(smaller)
+        
+        video_url = _video_download_url(video_path)
+        if not video_url:
+            logger.error("❌ Video too large to email and upload failed")
+            return False
+        return send_via_gmail_smtp(video_path, instructions_path, video_url=video_url)
     else:
         logger.error("No email service configured!")
         logger.error("Set GMAIL_ADDRESS and GMAIL_APP_PASSWORD environment variables")
@@ -135,5 +432,5 @@ if __name__ == "__main__":
     print("\nTo use Gmail SMTP:")
     print("1. Set GMAIL_ADDRESS environment variable")
     print("2. Set GMAIL_APP_PASSWORD environment variable")
-    print("3. Set RECIPIENT_EMAIL environment variable (optional)")
+    print("3. Set RECIPIENT_EMAIL environment variable (optional, comma-separated)")
     print("4. Set OUTPUT_DELIVERY=email")
\ No newline at end of file
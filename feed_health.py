@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Feed Health Tracking
+Per-feed latency, failure rate, last success and topic yield, persisted in
+SQLite. A circuit breaker skips feeds that keep failing for a growing back-off
+window, and slow or low-yield feeds are polled only every Nth cycle.
+"""
+
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from config_free import FreeConfig
+from logger import get_logger
+from sqlite_store import connect
+
+logger = get_logger(__name__)
+
+# Weight of the newest sample in the latency/failure/yield moving averages
+EWMA_ALPHA = 0.3
+# Successful polls before the yield average is trusted for scheduling
+MIN_YIELD_SAMPLES = 3
+# Slow and low-yield feeds are polled at most this many cycles apart
+MAX_STRIDE = 8
+# The breaker's back-off doubles per failure up to this
+MAX_COOLDOWN_SECONDS = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_health (
+    url TEXT PRIMARY KEY,
+    polls INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    failure_rate REAL NOT NULL DEFAULT 0,
+    latency_ewma REAL,
+    yield_ewma REAL,
+    yield_samples INTEGER NOT NULL DEFAULT 0,
+    stride INTEGER NOT NULL DEFAULT 1,
+    skip_remaining INTEGER NOT NULL DEFAULT 0,
+    open_until REAL,
+    last_success REAL,
+    last_failure REAL,
+    last_error TEXT
+);
+"""
+
+
+def _ewma(previous: Optional[float], sample: float) -> float:
+    return sample if previous is None else EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * previous
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds") if timestamp else None
+
+
+class FeedHealth:
+    """Per-feed statistics with a circuit breaker and adaptive polling stride"""
+
+    def __init__(self, db_path: Optional[str] = None, breaker_threshold: Optional[int] = None,
+                 breaker_cooldown: Optional[float] = None, slow_seconds: Optional[float] = None,
+                 low_yield: Optional[float] = None):
+        self.db_path = db_path or FreeConfig.FEED_HEALTH_DB_PATH
+        self.breaker_threshold = FreeConfig.FEED_BREAKER_THRESHOLD if breaker_threshold is None else breaker_threshold
+        self.breaker_cooldown = (FreeConfig.FEED_BREAKER_COOLDOWN_MINUTES * 60
+                                 if breaker_cooldown is None else breaker_cooldown)
+        self.slow_seconds = FreeConfig.FEED_SLOW_SECONDS if slow_seconds is None else slow_seconds
+        self.low_yield = FreeConfig.FEED_LOW_YIELD if low_yield is None else low_yield
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA)
+
+    def select(self, feeds: List[str], now: Optional[float] = None, advance: bool = True) -> List[str]:
+        """Feeds to poll this cycle; skipped feeds count down towards their next turn
+
+        Only the scheduled poller advances the countdown - on-demand readers
+        pass advance=False so extra reads don't shorten a feed's back-off.
+        """
+        now = now or time.time()
+        selected = []
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for url in feeds:
+                row = conn.execute("SELECT open_until, skip_remaining FROM feed_health WHERE url = ?",
+                                   (url,)).fetchone()
+                if row is None:
+                    selected.append(url)
+                elif row["open_until"] and row["open_until"] > now:
+                    logger.debug(f"Circuit open for {url} until {_iso(row['open_until'])}")
+                elif row["skip_remaining"] > 0:
+                    if advance:
+                        conn.execute("UPDATE feed_health SET skip_remaining = skip_remaining - 1 WHERE url = ?",
+                                     (url,))
+                else:
+                    selected.append(url)  # closed, or half-open after the back-off expired
+            conn.execute("COMMIT")
+        if len(selected) < len(feeds):
+            logger.info(f"Polling {len(selected)}/{len(feeds)} feeds (rest open-circuit or backed off)")
+        return selected
+
+    def _stride(self, latency: float, yield_avg: Optional[float], samples: int) -> int:
+        """Cycles between polls: doubled for a slow feed, doubled or quadrupled for a low yield"""
+        stride = 1
+        if latency > self.slow_seconds:
+            stride *= 2
+        if yield_avg is not None and samples >= MIN_YIELD_SAMPLES and yield_avg < self.low_yield:
+            stride *= 4 if yield_avg < self.low_yield / 4 else 2
+        return min(stride, MAX_STRIDE)
+
+    def record_success(self, url: str, latency: float, yielded: Optional[int] = None,
+                       now: Optional[float] = None, scheduled: bool = True):
+        """Close the breaker and update averages; `yielded` is None for a 304 (nothing new to judge)
+
+        Yield and stride belong to the scheduled poller, which counts new entries.
+        On-demand readers pass scheduled=False: their read still counts towards
+        latency and failure rate, but not towards the yield or the poll countdown.
+        """
+        now = now or time.time()
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM feed_health WHERE url = ?", (url,)).fetchone()
+            row = dict(row) if row else {"failure_rate": 0.0, "latency_ewma": None, "yield_ewma": None,
+                                         "yield_samples": 0, "stride": 1, "skip_remaining": 0}
+            latency_avg = _ewma(row["latency_ewma"], latency)
+            yield_avg, samples = row["yield_ewma"], row["yield_samples"]
+            if scheduled:
+                if yielded is not None:
+                    yield_avg, samples = _ewma(yield_avg, yielded), samples + 1
+                stride = self._stride(latency_avg, yield_avg, samples)
+                skip_remaining = stride - 1
+            else:
+                stride, skip_remaining = row["stride"], row["skip_remaining"]
+            conn.execute("INSERT OR IGNORE INTO feed_health (url) VALUES (?)", (url,))
+            conn.execute(
+                "UPDATE feed_health SET polls = polls + 1, consecutive_failures = 0, failure_rate = ?, "
+                "latency_ewma = ?, yield_ewma = ?, yield_samples = ?, stride = ?, skip_remaining = ?, "
+                "open_until = NULL, last_success = ? WHERE url = ?",
+                (_ewma(row["failure_rate"], 0.0), latency_avg, yield_avg, samples, stride, skip_remaining,
+                 now, url),
+            )
+            conn.execute("COMMIT")
+
+    def record_failure(self, url: str, error, latency: Optional[float] = None, now: Optional[float] = None):
+        """Count a failure; past the threshold the breaker opens for a doubling back-off"""
+        now = now or time.time()
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR IGNORE INTO feed_health (url) VALUES (?)", (url,))
+            row = conn.execute("SELECT * FROM feed_health WHERE url = ?", (url,)).fetchone()
+            consecutive = row["consecutive_failures"] + 1
+            open_until = None
+            if consecutive >= self.breaker_threshold:
+                cooldown = min(self.breaker_cooldown * 2 ** (consecutive - self.breaker_threshold),
+                               MAX_COOLDOWN_SECONDS)
+                open_until = now + cooldown
+                logger.warning(f"⛔ Circuit open for {url} after {consecutive} failures "
+                               f"(retry in {cooldown / 60:.0f} min)")
+            conn.execute(
+                "UPDATE feed_health SET polls = polls + 1, failures = failures + 1, consecutive_failures = ?, "
+                "failure_rate = ?, latency_ewma = ?, open_until = ?, last_failure = ?, last_error = ? WHERE url = ?",
+                (consecutive, _ewma(row["failure_rate"] if row["polls"] else None, 1.0),
+                 _ewma(row["latency_ewma"], latency) if latency is not None else row["latency_ewma"],
+                 open_until, now, str(error)[:200], url),
+            )
+            conn.execute("COMMIT")
+
+    def report(self, now: Optional[float] = None) -> List[Dict]:
+        """Per-feed stats for status output, worst failure rate first"""
+        now = now or time.time()
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT * FROM feed_health ORDER BY failure_rate DESC, url").fetchall()
+        report = []
+        for row in rows:
+            if row["open_until"] and row["open_until"] > now:
+                state = "open"
+            elif row["consecutive_failures"] >= self.breaker_threshold:
+                state = "half-open"
+            else:
+                state = "closed"
+            report.append({
+                "url": row["url"],
+                "state": state,
+                "polls": row["polls"],
+                "failures": row["failures"],
+                "failure_rate": round(row["failure_rate"], 3),
+                "latency_seconds": round(row["latency_ewma"], 3) if row["latency_ewma"] is not None else None,
+                "avg_yield": round(row["yield_ewma"], 2) if row["yield_ewma"] is not None else None,
+                "poll_every": row["stride"],
+                "last_success": _iso(row["last_success"]),
+                "last_error": row["last_error"],
+                "open_until": _iso(row["open_until"]) if state == "open" else None,
+            })
+        return report
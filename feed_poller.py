@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Background Feed Poller
+Refreshes the tech RSS feeds on a jittered interval in automated mode,
+ingesting only entries it hasn't seen, into a rolling scored topic store
+that create_video reads instantly instead of researching on the critical path.
+"""
+
+import os
+import json
+import math
+import time
+import random
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from config_free import FreeConfig
+from feed_health import FeedHealth
+from feed_reader import read_feed
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Entry IDs remembered per feed - comfortably more than any feed returns at once
+SEEN_IDS_PER_FEED = 500
+
+
+class TopicStore:
+    """Rolling set of recent headlines, scored by cross-feed mentions and recency"""
+
+    def __init__(self, max_age_hours: Optional[float] = None, half_life_hours: float = 12,
+                 max_topics: int = 200):
+        self.max_age = (FreeConfig.TOPIC_STORE_MAX_AGE_HOURS if max_age_hours is None else max_age_hours) * 3600
+        self.half_life = half_life_hours * 3600
+        self.max_topics = max_topics
+        self.topics: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(title: str) -> str:
+        return " ".join(title.lower().split())
+
+    def add(self, title: str, feed: str, rank: int = 0, now: Optional[float] = None):
+        """Count one mention; `rank` is the entry's position in its feed (0 = top)"""
+        now = now or time.time()
+        with self._lock:
+            topic = self.topics.setdefault(self._key(title), {
+                "title": title, "first_seen": now, "last_seen": now, "mentions": 0, "feeds": [], "best_rank": rank,
+            })
+            topic["mentions"] += 1
+            topic["last_seen"] = now
+            topic["best_rank"] = min(topic["best_rank"], rank)
+            if feed not in topic["feeds"]:
+                topic["feeds"].append(feed)
+
+    def score(self, topic: Dict, now: Optional[float] = None) -> float:
+        """Mentions across feeds, a bonus for top-of-feed entries, halved every half-life"""
+        age = (now or time.time()) - topic["first_seen"]
+        weight = len(topic["feeds"]) + 0.25 * (topic["mentions"] - 1) + 1 / (1 + topic["best_rank"])
+        return weight * math.pow(0.5, age / self.half_life)
+
+    def ranked(self, limit: int = 10, now: Optional[float] = None) -> List[str]:
+        now = now or time.time()
+        with self._lock:
+            topics = sorted(self.topics.values(), key=lambda t: self.score(t, now), reverse=True)
+            return [t["title"] for t in topics[:limit]]
+
+    def prune(self, now: Optional[float] = None):
+        """Drop topics past max age, then the lowest scored beyond max_topics"""
+        now = now or time.time()
+        with self._lock:
+            for key in [k for k, t in self.topics.items() if now - t["last_seen"] > self.max_age]:
+                del self.topics[key]
+            if len(self.topics) > self.max_topics:
+                ordered = sorted(self.topics, key=lambda k: self.score(self.topics[k], now))
+                for key in ordered[:len(self.topics) - self.max_topics]:
+                    del self.topics[key]
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {"topics": list(self.topics.values())}
+
+    def load(self, data: Dict):
+        with self._lock:
+            for topic in data.get("topics", []):
+                self.topics[self._key(topic["title"])] = topic
+
+
+class FeedPoller:
+    """Polls feeds on its own thread; conditional GETs plus entry-ID dedup"""
+
+    def __init__(self, feeds: Optional[List[str]] = None, interval: Optional[float] = None,
+                 jitter: Optional[float] = None, state_path: Optional[str] = None,
+                 entries_per_feed: int = 5, store: Optional[TopicStore] = None,
+                 health: Optional[FeedHealth] = None):
+        from content_research_free import TECH_FEEDS
+
+        self.feeds = feeds or TECH_FEEDS
+        self.interval = FreeConfig.FEED_POLL_INTERVAL_MINUTES * 60 if interval is None else interval
+        self.jitter = FreeConfig.FEED_POLL_JITTER if jitter is None else jitter
+        self.state_path = state_path or FreeConfig.TOPIC_STORE_PATH
+        self.entries_per_feed = entries_per_feed
+        self.store = store or TopicStore()
+        self.health = health or FeedHealth()
+        self.feed_state: Dict[str, Dict] = {}  # url -> {"etag", "modified", "seen": [ids]}
+        self.last_poll: Optional[float] = None
+        self.thread = None
+        self._stop = threading.Event()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.store.load(state.get("store", {}))
+        self.feed_state = state.get("feeds", {})
+        self.last_poll = state.get("last_poll")
+        self.store.prune()
+        logger.info(f"Loaded {len(self.store)} stored topics from {self.state_path}")
+
+    def save(self):
+        """Persist the topic store and per-feed cursors"""
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"store": self.store.to_dict(), "feeds": self.feed_state, "last_poll": self.last_poll}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def poll_feed(self, url: str) -> Optional[int]:
+        """Fetch one feed (conditional GET) and ingest unseen entries
+
+        Returns the new topic count, or None if the feed was not modified.
+        """
+        from content_research_free import is_tech_title
+
+        state = self.feed_state.setdefault(url, {"etag": None, "modified": None, "seen": []})
+        feed = read_feed(url, self.entries_per_feed, etag=state["etag"], modified=state["modified"])
+        if feed["status"] == 304:
+            return None
+        state["etag"] = feed.get("etag")
+        state["modified"] = feed.get("modified")
+
+        seen = set(state["seen"])
+        added = 0
+        for rank, entry in enumerate(feed["entries"]):
+            entry_id = entry.get("id") or entry.get("link") or entry.get("title")
+            if not entry_id or entry_id in seen:
+                continue
+            state["seen"].append(entry_id)
+            seen.add(entry_id)
+            title = entry.get("title")
+            if title and is_tech_title(title):
+                self.store.add(title, url, rank)
+                added += 1
+        state["seen"] = state["seen"][-SEEN_IDS_PER_FEED:]
+        return added
+
+    def poll_once(self) -> int:
+        added = 0
+        for url in self.health.select(self.feeds):
+            if self._stop.is_set():
+                break
+            started = time.monotonic()
+            try:
+                count = self.poll_feed(url)
+            except Exception as e:
+                self.health.record_failure(url, e, time.monotonic() - started)
+                logger.warning(f"Feed poll failed for {url}: {e}")
+                continue
+            self.health.record_success(url, time.monotonic() - started, count)
+            added += count or 0
+        self.store.prune()
+        self.last_poll = time.time()
+        try:
+            self.save()  # a killed process loses at most the poll in progress
+        except OSError as e:
+            logger.warning(f"Could not save the topic store: {e}")
+        logger.info(f"📰 Feed poll: {added} new topics, {len(self.store)} in store")
+        return added
+
+    def next_delay(self) -> float:
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.next_delay())
+
+    def start(self):
+        if self.thread:
+            return
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="feed-poller", daemon=True)
+        self.thread.start()
+        logger.info(f"Feed poller started ({len(self.feeds)} feeds every ~{self.interval / 60:.0f} min)")
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+        self.save()
+
+    def ready_topics(self, limit: int = 10) -> List[str]:
+        """Ranked topics if a poll finished recently enough to trust, else []"""
+        if self.last_poll is None or time.time() - self.last_poll > 2 * self.interval * (1 + self.jitter):
+            return []
+        return self.store.ranked(limit)
+
+    def status(self) -> Dict:
+        return _status(len(self.store), self.last_poll)
+
+
+def _status(topics: int, last_poll: Optional[float]) -> Dict:
+    return {
+        "topics": topics,
+        "last_poll": datetime.fromtimestamp(last_poll).isoformat(timespec="seconds") if last_poll else None,
+    }
+
+
+def saved_status(state_path: Optional[str] = None) -> Optional[Dict]:
+    """Poller status from its last saved state, for processes that don't run it (e.g. --mode status)"""
+    try:
+        with open(state_path or FreeConfig.TOPIC_STORE_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return _status(len(state.get("store", {}).get("topics", [])), state.get("last_poll"))
@@ -4,11 +4,9 @@ Free uploader utility
 
 Provides zero-cost delivery by uploading generated files to transfer.sh
 and returning a public download URL. No accounts, no API keys.
+The upload itself goes through the pooled provider in delivery.py.
 """
 
-import os
-import mimetypes
-import requests
 from pathlib import Path
 from logger import get_logger
 
@@ -16,6 +14,8 @@ logger = get_logger(__name__)
 
 TRANSFER_SH_BASE = "https://transfer.sh"
 
+_uploader = None
+
 def upload_to_transfer_sh(file_path: str, custom_name: str | None = None) -> str | None:
     """Upload a file to transfer.sh and return a public URL.
 
@@ -26,29 +26,20 @@ def upload_to_transfer_sh(file_path: str, custom_name: str | None = None) -> str
     Returns:
         The public download URL, or None if upload failed.
     """
+    global _uploader
+    from delivery import HedgedUploader, TransferShProvider
+
     try:
         path = Path(file_path)
         if not path.exists() or not path.is_file():
             logger.error(f"File not found for upload: {file_path}")
             return None
 
-        name = custom_name if custom_name else path.name
-        url = f"{TRANSFER_SH_BASE}/{name}"
-
-        mime_type, _ = mimetypes.guess_type(str(path))
-        headers = {"Content-Type": mime_type or "application/octet-stream"}
-
-        logger.info(f"Uploading to transfer.sh: {name}")
-        with open(path, "rb") as f:
-            resp = requests.put(url, data=f, headers=headers, timeout=300)
-            if resp.status_code in (200, 201):
-                public_url = resp.text.strip()
-                logger.info(f"Uploaded successfully: {public_url}")
-                return public_url
-            else:
-                logger.error(f"Upload failed ({resp.status_code}): {resp.text[:200]}")
-                return None
+        if _uploader is None:
+            _uploader = HedgedUploader([TransferShProvider(TRANSFER_SH_BASE, timeout=300)])
+        result = _uploader.upload(str(path), custom_name)
+        return result["url"] if result else None
 
     except Exception as e:
         logger.error(f"Error uploading to transfer.sh: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Health & Metrics Server
+Serves /health, /ready and /metrics for platform health checks.
+Runs on a daemon thread and only reads snapshots, so it never blocks rendering.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from config_free import FreeConfig
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Stage latency histogram buckets (seconds) - renders take minutes on free CPUs
+LATENCY_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class AgentMetrics:
+    """Thread-safe counters and stage latency histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Dict] = {}
+        self.last_run: Optional[Dict] = None
+        self._listeners: List[Callable[[str, float], None]] = []
+
+    def add_listener(self, callback: Callable[[str, float], None]):
+        """Call callback(stage, seconds) for every stage observation"""
+        self._listeners.append(callback)
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        """Increment a counter, optionally one labelled series of it (e.g. provider="s3")"""
+        if labels:
+            name += "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage: str, seconds: float):
+        """Record a stage latency observation"""
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = {"buckets": [0] * len(LATENCY_BUCKETS), "count": 0, "sum": 0.0}
+                self.histograms[stage] = hist
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    hist["buckets"][i] += 1
+            hist["count"] += 1
+            hist["sum"] += seconds
+        for callback in self._listeners:
+            try:
+                callback(stage, seconds)
+            except Exception as e:
+                logger.warning(f"Metrics listener failed for {stage}: {e}")
+
+    @contextmanager
+    def time_stage(self, stage: str):
+        """Time a pipeline stage and record it in its histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def record_run(self, outcome: str, duration: float, video_path: Optional[str] = None):
+        """Record the outcome of a full video run"""
+        self.inc(f"runs_{outcome}_total")
+        with self._lock:
+            self.last_run = {
+                "outcome": outcome,
+                "duration_seconds": round(duration, 3),
+                "video": video_path,
+                "finished_at": datetime.now().isoformat(),
+            }
+
+    def snapshot(self) -> Dict:
+        """Return a consistent copy of all metrics"""
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "counters": dict(self.counters),
+                "histograms": {
+                    stage: {"buckets": list(h["buckets"]), "count": h["count"], "sum": h["sum"]}
+                    for stage, h in self.histograms.items()
+                },
+                "last_run": dict(self.last_run) if self.last_run else None,
+            }
+
+    def render_prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        snap = self.snapshot()
+        lines = [
+            "# TYPE agent_uptime_seconds gauge",
+            f"agent_uptime_seconds {snap['uptime_seconds']}",
+        ]
+        typed = set()
+        for name, value in sorted(snap["counters"].items()):
+            base = name.partition("{")[0]
+            if base not in typed:
+                typed.add(base)
+                lines.append(f"# TYPE agent_{base} counter")
+            lines.append(f"agent_{name} {value}")
+        if snap["histograms"]:
+            lines.append("# TYPE agent_stage_latency_seconds histogram")
+        for stage, hist in sorted(snap["histograms"].items()):
+            for bound, count in zip(LATENCY_BUCKETS, hist["buckets"]):
+                lines.append(f'agent_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'agent_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist["count"]}')
+            lines.append(f'agent_stage_latency_seconds_sum{{stage="{stage}"}} {hist["sum"]:.6f}')
+            lines.append(f'agent_stage_latency_seconds_count{{stage="{stage}"}} {hist["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics instance shared by all modules
+metrics = AgentMetrics()
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    """Request handler - reads only snapshots, never touches the render path"""
+
+    server_version = "FreeAgentHealth/1.0"
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        try:
+            if path in ("/health", "/healthz", "/"):
+                self._send_json(200, {"status": "ok", "uptime_seconds": round(time.time() - metrics.started_at, 3)})
+            elif path in ("/ready", "/readyz"):
+                readiness = self.server.readiness_probe() if self.server.readiness_probe else {"ready": True}
+                self._send_json(200 if readiness.get("ready") else 503, readiness)
+            elif path == "/metrics":
+                if "format=json" in query:
+                    self._send_json(200, metrics.snapshot())
+                else:
+                    self._send(200, metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            else:
+                self._send_json(404, {"error": "not found"})
+        except Exception as e:
+            logger.warning(f"Health endpoint error on {path}: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def _send_json(self, status: int, payload: Dict):
+        self._send(status, json.dumps(payload, default=str).encode("utf-8"), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Health checks hit every few seconds - keep them out of the main log
+        logger.debug(f"health: {format % args}")
+
+
+class HealthServer:
+    """Non-blocking HTTP server for liveness, readiness and metrics"""
+
+    def __init__(self, port: Optional[int] = None, host: str = "0.0.0.0",
+                 readiness_probe: Optional[Callable[[], Dict]] = None):
+        self.host = host
+        self.port = FreeConfig.HEALTH_PORT if port is None else port
+        self.readiness_probe = readiness_probe
+        self.httpd = None
+        self.thread = None
+
+    def start(self) -> bool:
+        """Start serving on a daemon thread"""
+        if self.httpd:
+            logger.warning("Health server is already running")
+            return True
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _HealthHandler)
+            self.httpd.daemon_threads = True
+            self.httpd.readiness_probe = self.readiness_probe
+            self.port = self.httpd.server_address[1]
+            self.thread = threading.Thread(target=self.httpd.serve_forever, name="health-server", daemon=True)
+            self.thread.start()
+            logger.info(f"Health server listening on {self.host}:{self.port} (/health, /ready, /metrics)")
+            return True
+        except OSError as e:
+            logger.error(f"Failed to start health server on port {self.port}: {e}")
+            self.httpd = None
+            return False
+
+    def stop(self):
+        """Stop the server"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        logger.info("Health server stopped")
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Persistent Job Store
+SQLite-backed queue of scheduled slots, so a sleeping or restarted free-tier
+worker can detect missed runs and catch up instead of silently losing them.
+"""
+
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from config_free import FreeConfig
+from logger import get_logger
+from sqlite_store import connect
+
+logger = get_logger(__name__)
+
+# Catch-up policies for slots missed while the worker was down
+CATCHUP_ONCE = "once"  # run the most recent missed slot, skip the rest
+CATCHUP_ALL = "all"    # run every missed slot
+CATCHUP_SKIP = "skip"  # record missed slots as skipped
+
+SCHEDULE_INTERVAL_DAYS = {"daily": 1, "weekly": 7, "monthly": 30}
+
+# Back-off before a failed job becomes claimable again (multiplied by attempts)
+RETRY_BACKOFF = timedelta(minutes=5)
+
+# Durations kept per stage; estimates only read the most recent ones
+STAGE_HISTORY_ROWS = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    slot_at TEXT NOT NULL,
+    available_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    claimed_at TEXT,
+    finished_at TEXT,
+    outcome TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    UNIQUE(name, slot_at)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_slot ON jobs(status, slot_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_name_slot ON jobs(name, slot_at);
+CREATE TABLE IF NOT EXISTS stage_durations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stage_durations_stage ON stage_durations(stage, id);
+"""
+
+
+class JobStore:
+    """SQLite record of scheduled slots, claims, attempts and outcomes"""
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: Optional[int] = None):
+        self.db_path = db_path or FreeConfig.JOB_DB_PATH
+        self.max_attempts = max_attempts or FreeConfig.JOB_MAX_ATTEMPTS
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA)
+
+    def enqueue(self, name: str, slot_at: datetime) -> Optional[int]:
+        """Record a slot as pending; returns None if the slot is already known"""
+        now = datetime.now().isoformat()
+        with connect(self.db_path) as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO jobs (name, slot_at, available_at, status, created_at) "
+                "VALUES (?, ?, ?, 'pending', ?)",
+                (name, slot_at.isoformat(timespec="seconds"), now, now),
+            )
+            if cur.rowcount == 0:
+                return None
+            logger.info(f"Queued job {name} for slot {slot_at:%Y-%m-%d %H:%M}")
+            return cur.lastrowid
+
+    def record_skipped(self, name: str, slot_at: datetime, reason: str):
+        """Record a slot that will not be run"""
+        now = datetime.now().isoformat()
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (name, slot_at, available_at, status, finished_at, outcome, created_at) "
+                "VALUES (?, ?, ?, 'skipped', ?, ?, ?)",
+                (name, slot_at.isoformat(timespec="seconds"), now, now, reason, now),
+            )
+
+    def claim(self, worker_id: str, name: Optional[str] = None) -> Optional[Dict]:
+        """Atomically claim the oldest pending job whose name has no run in progress
+
+        Two slots of the same job never render at once, whatever JOB_WORKERS is.
+        """
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                query = ("SELECT * FROM jobs WHERE status = 'pending' AND available_at <= ? "
+                         "AND name NOT IN (SELECT name FROM jobs WHERE status = 'running')")
+                params = [datetime.now().isoformat()]
+                if name:
+                    query += " AND name = ?"
+                    params.append(name)
+                row = conn.execute(query + " ORDER BY slot_at LIMIT 1", params).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, claimed_by = ?, claimed_at = ? "
+                    "WHERE id = ?",
+                    (worker_id, datetime.now().isoformat(), row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def complete(self, job_id: int, outcome: str = "success"):
+        """Mark a claimed job as succeeded"""
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'succeeded', finished_at = ?, outcome = ?, error = NULL WHERE id = ?",
+                (datetime.now().isoformat(), outcome, job_id),
+            )
+
+    def fail(self, job_id: int, error: str):
+        """Mark a claimed job as failed; it goes back to pending while attempts remain"""
+        now = datetime.now()
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            retry = row is not None and row["attempts"] < self.max_attempts
+            available_at = now + RETRY_BACKOFF * (row["attempts"] if row else 1)
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, available_at = ?, error = ? WHERE id = ?",
+                ("pending" if retry else "failed", now.isoformat(), available_at.isoformat(), error[:500], job_id),
+            )
+        if retry:
+            logger.warning(f"Job {job_id} failed, will retry: {error}")
+        else:
+            logger.error(f"Job {job_id} failed permanently: {error}")
+
+    def recover_interrupted(self) -> int:
+        """Return jobs left 'running' by a previous process to the queue"""
+        with connect(self.db_path) as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+                "error = 'interrupted by restart' WHERE status = 'running'",
+                (self.max_attempts,),
+            )
+        if cur.rowcount:
+            logger.warning(f"Recovered {cur.rowcount} job(s) interrupted by a restart")
+        return cur.rowcount
+
+    def last_slot(self, name: str) -> Optional[datetime]:
+        """Most recent slot recorded for a job"""
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT MAX(slot_at) AS slot FROM jobs WHERE name = ?", (name,)).fetchone()
+        return datetime.fromisoformat(row["slot"]) if row and row["slot"] else None
+
+    def missed_slots(self, name: str, time_str: str, schedule_type: str = "daily",
+                     now: Optional[datetime] = None) -> List[datetime]:
+        """Slots that should have fired since the last recorded one"""
+        now = now or datetime.now()
+        last = self.last_slot(name)
+        if last is None:
+            return []
+
+        interval = timedelta(days=SCHEDULE_INTERVAL_DAYS.get(schedule_type, 1))
+        hour, minute = map(int, time_str.split(":"))
+        slot = last.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        while slot <= last:
+            slot += interval
+
+        missed = []
+        while slot <= now:
+            missed.append(slot)
+            slot += interval
+        return missed
+
+    def apply_catchup(self, name: str, missed: List[datetime], policy: Optional[str] = None) -> int:
+        """Queue missed slots according to the catch-up policy; returns jobs queued"""
+        policy = (policy or FreeConfig.CATCHUP_POLICY).lower()
+        if not missed:
+            return 0
+
+        if policy == CATCHUP_ALL:
+            to_run, to_skip = missed, []
+        elif policy == CATCHUP_SKIP:
+            to_run, to_skip = [], missed
+        else:
+            if policy != CATCHUP_ONCE:
+                logger.warning(f"Unknown catch-up policy '{policy}', using '{CATCHUP_ONCE}'")
+            to_run, to_skip = missed[-1:], missed[:-1]
+
+        for slot in to_skip:
+            self.record_skipped(name, slot, f"missed ({policy})")
+        queued = sum(1 for slot in to_run if self.enqueue(name, slot) is not None)
+        logger.info(f"Missed {len(missed)} slot(s) of {name}: queued {queued}, skipped {len(to_skip)} ({policy})")
+        return queued
+
+    def record_stage_duration(self, stage: str, seconds: float):
+        """Keep a history of pipeline stage durations for lead-time estimates (last STAGE_HISTORY_ROWS)"""
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO stage_durations (stage, seconds, recorded_at) VALUES (?, ?, ?)",
+                (stage, seconds, datetime.now().isoformat()),
+            )
+            conn.execute(
+                "DELETE FROM stage_durations WHERE stage = ? AND id NOT IN "
+                "(SELECT id FROM stage_durations WHERE stage = ? ORDER BY id DESC LIMIT ?)",
+                (stage, stage, STAGE_HISTORY_ROWS),
+            )
+            conn.execute("COMMIT")
+
+    def stage_duration_estimate(self, stage: str, percentile: float = 0.9, window: int = 20) -> Optional[float]:
+        """Percentile of the most recent durations of a stage, None without history"""
+        with connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT seconds FROM stage_durations WHERE stage = ? ORDER BY id DESC LIMIT ?",
+                (stage, window),
+            ).fetchall()
+        if not rows:
+            return None
+        durations = sorted(row["seconds"] for row in rows)
+        index = min(len(durations) - 1, int(round(percentile * (len(durations) - 1))))
+        return durations[index]
+
+    def next_available(self) -> Optional[datetime]:
+        """When the earliest pending job becomes claimable (ignoring jobs blocked by a running one)"""
+        with connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT MIN(available_at) AS at FROM jobs WHERE status = 'pending' "
+                "AND name NOT IN (SELECT name FROM jobs WHERE status = 'running')"
+            ).fetchone()
+        return datetime.fromisoformat(row["at"]) if row and row["at"] else None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        """Most recent jobs, newest slot first"""
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY slot_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+class JobWorkerPool:
+    """Small pool of threads draining the persistent job queue"""
+
+    def __init__(self, store: JobStore, handlers: Dict[str, Callable[[Dict], object]], workers: Optional[int] = None):
+        self.store = store
+        self.handlers = handlers
+        self.worker_count = max(1, workers or FreeConfig.JOB_WORKERS)
+        self.running = False
+        self.threads: List[threading.Thread] = []
+        self._wakeup = threading.Condition()
+        self._pending_signal = False
+
+    def start(self):
+        """Start the worker threads"""
+        if self.running:
+            return
+        self.running = True
+        for i in range(self.worker_count):
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{i}"
+            thread = threading.Thread(target=self._work, args=(worker_id,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"Job worker pool started with {self.worker_count} worker(s)")
+
+    def stop(self, timeout: float = 5):
+        """Stop the workers; a job in progress finishes on its own thread"""
+        with self._wakeup:
+            self.running = False
+            self._wakeup.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+
+    def notify(self):
+        """Wake idle workers after new jobs were queued"""
+        with self._wakeup:
+            self._pending_signal = True
+            self._wakeup.notify_all()
+
+    def submit(self, name: str, slot_at: Optional[datetime] = None) -> Optional[int]:
+        """Queue a job and wake the workers"""
+        job_id = self.store.enqueue(name, slot_at or datetime.now().replace(microsecond=0))
+        self.notify()
+        return job_id
+
+    def _work(self, worker_id: str):
+        while self.running:
+            try:
+                job = self.store.claim(worker_id, None)
+            except Exception as e:
+                logger.error(f"Failed to claim job: {e}")
+                job = None
+
+            if job is None:
+                next_at = self.store.next_available()
+                timeout = 60 if next_at is None else min(max((next_at - datetime.now()).total_seconds(), 0.1), 60)
+                with self._wakeup:
+                    if self.running and not self._pending_signal:
+                        self._wakeup.wait(timeout)
+                    self._pending_signal = False
+                continue
+
+            self._run(job)
+            self.notify()  # slots of the same job may have been waiting for this one
+
+    def _run(self, job: Dict):
+        handler = self.handlers.get(job["name"])
+        if handler is None:
+            self.store.fail(job["id"], f"no handler for job {job['name']}")
+            return
+
+        logger.info(f"Running job {job['name']} (slot {job['slot_at']}, attempt {job['attempts']})")
+        try:
+            result = handler(job)
+            if result:
+                self.store.complete(job["id"], str(result))
+            else:
+                self.store.fail(job["id"], "handler reported failure")
+        except Exception as e:
+            self.store.fail(job["id"], str(e))
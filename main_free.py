@@ -9,20 +9,31 @@ import sys
 import time
 import json
 import shutil
+import signal
+import threading
 import argparse
-from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-# Import free modules
-from content_research_free import FreeContentResearcher
-from video_generator_free import FreeVideoGenerator
+# Import free modules (the heavy research/video modules load on first use)
 from logger import get_logger
 from scheduler import VideoScheduler
+from health_server import HealthServer, metrics
+from job_store import JobStore, JobWorkerPool
+from artifact_catalog import ArtifactCatalog
+from blob_store import BlobStore
+from topic_history import TopicHistory
+from config_free import FreeConfig
 
 # Initialize logger first
 logger = get_logger(__name__)
 
+# Job queue name for the scheduled daily video
+DAILY_VIDEO_JOB = "daily_video"
+
+# Fallback per-stage durations (seconds) until there is run history
+STAGE_DURATION_DEFAULTS = {"research": 30, "script": 120, "render": 300, "delivery": 120}
+
 # Try to import email delivery (optional)
 try:
     from email_delivery import send_video_email
@@ -31,65 +42,122 @@ except ImportError as e:
     EMAIL_AVAILABLE = False
     logger.warning(f"Email delivery not available: {e}")
 
-def upload_to_transfer_sh(file_path: str, max_days: int = 14) -> str:
-    """Upload with multiple fallback options"""
-    import requests
+def upload_to_transfer_sh(file_path: str) -> str:
+    """Upload to the free file hosts (hedged across file.io, 0x0.st, transfer.sh)
+
+    Links expire after UPLOAD_EXPIRY_DAYS on hosts that support it.
+    """
+    from delivery import upload_file
     
     if not os.path.exists(file_path):
         return None
     
-    filename = os.path.basename(file_path)
-    
-    # Try 1: file.io (most reliable)
-    try:
-        logger.info(f"📤 Uploading {filename} to file.io...")
-        with open(file_path, 'rb') as f:
-            response = requests.post(
-                'https://file.io',
-                files={'file': (filename, f)},
-                data={'expires': '14d'},
-                timeout=30
-            )
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    url = result.get('link')
-                    logger.info(f"✅ file.io URL: {url}")
-                    logger.info("⚠️ One-time download only!")
-                    return url
-    except Exception as e:
-        logger.warning(f"file.io failed: {e}")
-    
-    # Try 2: 0x0.st
-    try:
-        logger.info(f"📤 Trying 0x0.st...")
-        with open(file_path, 'rb') as f:
-            response = requests.post(
-                'https://0x0.st',
-                files={'file': (filename, f)},
-                timeout=30
-            )
-            if response.status_code == 200:
-                url = response.text.strip()
-                logger.info(f"✅ 0x0.st URL: {url}")
-                return url
-    except Exception as e:
-        logger.warning(f"0x0.st failed: {e}")
-    
-    logger.error("All upload services failed")
-    return None
+    return upload_file(file_path)
 
 class FreeYouTubeTechAgent:
     """Free YouTube video agent using only free resources"""
     
     def __init__(self):
-        self.content_researcher = FreeContentResearcher()
-        self.video_generator = FreeVideoGenerator()
+        self._content_researcher = None
+        self._video_generator = None
         self.scheduler = VideoScheduler()
+        self.health_server = None
+        self.job_store = None
+        self.job_workers = None
+        self._delivery_queue = None
+        self._catalog = None
+        self._blob_store = None
+        self._topic_history = None
+        self.feed_poller = None
+        self._deadlines = {}  # video path -> slot deadline, until its delivery completes
+        self._stop_event = threading.Event()
         self.output_dir = "output"
         self.videos_dir = "videos"
         self._setup_directories()
     
+    @property
+    def content_researcher(self):
+        """Researcher is built on first use - loading the model is the slowest startup step"""
+        if self._content_researcher is None:
+            from content_research_free import FreeContentResearcher
+            self._content_researcher = FreeContentResearcher()
+        return self._content_researcher
+    
+    @property
+    def video_generator(self):
+        """Video generator is built on first use (imports moviepy, PIL and gTTS)"""
+        if self._video_generator is None:
+            from video_generator_free import FreeVideoGenerator
+            self._video_generator = FreeVideoGenerator(self.blob_store)
+        return self._video_generator
+    
+    @property
+    def delivery_queue(self):
+        """Background delivery queue, started on first use (picks up unfinished deliveries)"""
+        if self._delivery_queue is None:
+            from delivery import DeliveryQueue
+            self._delivery_queue = DeliveryQueue(self.output_dir, on_update=self._on_delivery_update)
+            self._delivery_queue.start()
+        return self._delivery_queue
+    
+    def _on_delivery_update(self, video_path: str, manifest_path: str, manifest: Dict):
+        """Catalog every manifest change; measure deadline lateness once delivery completes"""
+        self.catalog.record_delivery(video_path, manifest_path, manifest)
+        if manifest.get("status") == "complete":
+            deadline = self._deadlines.pop(video_path, None)
+            if deadline is not None:
+                self._record_lateness(deadline, datetime.fromisoformat(manifest["delivered_at"]))
+    
+    @staticmethod
+    def _record_lateness(deadline: datetime, delivered_at: datetime):
+        lateness = (delivered_at - deadline).total_seconds()
+        metrics.observe("deadline_lateness", max(lateness, 0))
+        logger.info(f"⏰ Delivered {abs(lateness):.0f}s {'after' if lateness > 0 else 'before'} the deadline")
+    
+    @property
+    def catalog(self):
+        """Artifact catalog (videos rendered before it existed are imported once)"""
+        if self._catalog is None:
+            self._catalog = ArtifactCatalog()
+            self._catalog.adopt_existing(self.output_dir)
+        return self._catalog
+    
+    @property
+    def blob_store(self) -> Optional[BlobStore]:
+        """Shared content-addressed store for slides, narration and videos"""
+        if self._blob_store is None and FreeConfig.BLOB_STORE_ENABLED:
+            self._blob_store = BlobStore(os.path.join(self.output_dir, "blobs"))
+        return self._blob_store
+    
+    @property
+    def topic_history(self) -> TopicHistory:
+        """Topics already turned into videos (loaded into memory once)"""
+        if self._topic_history is None:
+            self._topic_history = TopicHistory()
+        return self._topic_history
+    
+    def research_topics(self) -> List[str]:
+        """Ranked topics from the background poller if it is fresh, else fetch feeds now"""
+        with metrics.time_stage("research"):
+            if self.feed_poller:
+                topics = self.feed_poller.ready_topics()
+                if topics:
+                    logger.info(f"📰 Using {len(topics)} ranked topics from the background feed poller")
+                    return topics
+            return self.content_researcher.get_trending_tech_topics()
+    
+    def choose_topic(self, trending_topics: List[str]) -> str:
+        """Highest-ranked topic not already covered, falling back to fallback topics"""
+        chosen = self.topic_history.pick_unseen(trending_topics)
+        if chosen is None:
+            logger.info("All trending topics were covered before, trying fallback topics")
+            fallback = self.content_researcher._get_fallback_topics()
+            chosen = self.topic_history.pick_unseen(fallback)
+            if chosen is None:
+                chosen = self.topic_history.least_similar(trending_topics + fallback)
+                logger.warning(f"Every topic was covered before, using the least similar: {chosen}")
+        return chosen
+    
     def _setup_directories(self):
         """Create necessary directories"""
         os.makedirs(self.output_dir, exist_ok=True)
@@ -99,12 +167,27 @@ class FreeYouTubeTechAgent:
     
     def create_video(self, topic: Optional[str] = None, video_length: int = 60) -> Optional[str]:
         """Create a complete video using only free resources"""
+        run_started = time.perf_counter()
+        video_path = None
+        try:
+            staged = self.prepare_video(topic, video_length)
+            if staged:
+                video_path = self.deliver_video(staged)
+            return video_path
+        finally:
+            outcome = "success" if video_path else "failure"
+            metrics.record_run(outcome, time.perf_counter() - run_started, video_path)
+    
+    def prepare_video(self, topic: Optional[str] = None, video_length: int = 60,
+                      trending_topics: Optional[List[str]] = None) -> Optional[Dict]:
+        """Research, script, render and write instructions - everything before delivery"""
         try:
             logger.info("🆓 Starting FREE video creation process...")
             
             # Step 1: Research trending topics (RSS feeds)
-            logger.info("📰 Researching trending topics...")
-            trending_topics = self.content_researcher.get_trending_tech_topics()
+            if trending_topics is None:
+                logger.info("📰 Researching trending topics...")
+                trending_topics = self.research_topics()
             
             if not trending_topics:
                 logger.error("❌ No trending topics found")
@@ -114,8 +197,9 @@ class FreeYouTubeTechAgent:
             
             # Step 2: Generate video script
             logger.info("🤖 Generating video script...")
-            chosen_topic = topic if topic else trending_topics[0]
-            script = self.content_researcher.generate_video_script(chosen_topic, video_length)
+            chosen_topic = topic if topic else self.choose_topic(trending_topics)
+            with metrics.time_stage("script"):
+                script = self.content_researcher.generate_video_script(chosen_topic, video_length)
             
             if not script:
                 logger.error("❌ Script generation failed")
@@ -127,7 +211,8 @@ class FreeYouTubeTechAgent:
             logger.info("🎬 Creating video...")
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             video_filename = f"free_tech_video_{timestamp}.mp4"
-            video_path = self.video_generator.generate_video_from_script(script, video_filename)
+            with metrics.time_stage("render"):
+                video_path = self.video_generator.generate_video_from_script(script, video_filename)
             
             if not video_path or not os.path.exists(video_path):
                 logger.error("❌ Video creation failed")
@@ -147,52 +232,29 @@ class FreeYouTubeTechAgent:
             instructions_path = self.generate_upload_instructions(video_path, video_idea)
             
             logger.info(f"✅ Upload instructions created: {instructions_path}")
-
-            # Optional: deliver via email or transfer.sh
-            delivery_method = os.getenv("OUTPUT_DELIVERY", "local").lower()
-            
-            if delivery_method == "email":
-                logger.info("📧 Delivering files via email...")
-                if EMAIL_AVAILABLE:
-                    try:
-                        if send_video_email(video_path, instructions_path):
-                            logger.info("✅ Email sent successfully!")
-                            logger.info("📬 Check your inbox for the video!")
-                        else:
-                            logger.error("❌ Email delivery failed")
-                            logger.warning("💡 Video saved locally, check output folder")
-                    except Exception as e:
-                        logger.error(f"Email error: {e}")
-                        logger.warning("💡 Video saved locally, check output folder")
-                else:
-                    logger.error("❌ Email delivery not configured")
-                    logger.info("💡 Install email_delivery.py to enable email delivery")
+            self.catalog.register_run(video_path, chosen_topic)
+            self.topic_history.record(chosen_topic, video_path)
             
-            elif delivery_method == "transfer_sh":
-                logger.info("🚚 Delivering files via transfer.sh (no disk required)...")
-                video_url = upload_to_transfer_sh(video_path)
-                instr_url = upload_to_transfer_sh(instructions_path)
-
-                # Save a small delivery manifest next to files
-                manifest = {
-                    "video_file": os.path.basename(video_path),
-                    "video_url": video_url,
-                    "instructions_file": os.path.basename(instructions_path),
-                    "instructions_url": instr_url,
-                    "created_at": datetime.now().isoformat(),
-                }
-                manifest_path = video_path.replace('.mp4', '_delivery.json')
-                with open(manifest_path, 'w', encoding='utf-8') as mf:
-                    json.dump(manifest, mf, indent=2)
-                logger.info(f"📦 Delivery manifest saved: {manifest_path}")
-                if video_url:
-                    logger.info(f"🔗 Video download URL: {video_url}")
-                if instr_url:
-                    logger.info(f"🔗 Instructions download URL: {instr_url}")
+            return {
+                "topic": chosen_topic,
+                "video_path": video_path,
+                "instructions_path": instructions_path,
+                "trending_topics": trending_topics,
+                "prepared_at": datetime.now().isoformat(),
+            }
             
-            else:
-                logger.info("💾 Files saved locally (no remote delivery)")
-                logger.info("💡 Set OUTPUT_DELIVERY=email to enable email delivery")
+        except Exception as e:
+            logger.error(f"❌ Video creation failed: {str(e)}")
+            return None
+    
+    def deliver_video(self, staged: Dict) -> Optional[str]:
+        """Deliver a prepared video and clean up old files"""
+        video_path = staged["video_path"]
+        instructions_path = staged["instructions_path"]
+        try:
+            # Optional: deliver via email or transfer.sh (in the background - the
+            # queue records the "delivery" stage once uploads actually finish)
+            self._deliver_outputs(video_path, instructions_path)
             
             # Step 5: Cleanup old files
             self._cleanup_old_files()
@@ -204,9 +266,35 @@ class FreeYouTubeTechAgent:
             return video_path
             
         except Exception as e:
-            logger.error(f"❌ Video creation failed: {str(e)}")
+            logger.error(f"❌ Video delivery failed: {str(e)}")
             return None
     
+    def _deliver_outputs(self, video_path: str, instructions_path: str):
+        """Deliver the video and instructions using OUTPUT_DELIVERY"""
+        delivery_method = os.getenv("OUTPUT_DELIVERY", "local").lower()
+        
+        if delivery_method == "email":
+            if EMAIL_AVAILABLE:
+                logger.info("📧 Delivering files via email...")
+                self.delivery_queue.submit(video_path, instructions_path, "email")
+            else:
+                logger.error("❌ Email delivery not configured")
+                logger.info("💡 Install email_delivery.py to enable email delivery")
+        
+        elif delivery_method == "transfer_sh":
+            logger.info("🚚 Delivering files via transfer.sh (no disk required)...")
+            manifest_path = self.delivery_queue.submit(video_path, instructions_path, "transfer_sh")
+            logger.info(f"📦 Delivery manifest: {manifest_path}")
+        
+        elif delivery_method == "s3":
+            logger.info("🪣 Delivering files to object storage...")
+            manifest_path = self.delivery_queue.submit(video_path, instructions_path, "s3")
+            logger.info(f"📦 Delivery manifest: {manifest_path}")
+        
+        else:
+            logger.info("💾 Files saved locally (no remote delivery)")
+            logger.info("💡 Set OUTPUT_DELIVERY=email to enable email delivery")
+    
     def generate_upload_instructions(self, video_path: str, metadata: Dict) -> str:
         """Generate instructions for manual YouTube upload"""
         instructions = f"""
@@ -260,88 +348,267 @@ Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         """Run in automated mode (creates videos but doesn't upload)"""
         logger.info("Starting free automated mode...")
         
-        def create_and_prepare_video():
+        def create_and_prepare_video(job: Optional[Dict] = None):
             try:
                 logger.info("Creating new video...")
-                video_path = self.create_video()
+                if FreeConfig.PREPRODUCTION_ENABLED and job:
+                    video_path = self.create_video_for_deadline(datetime.fromisoformat(job["slot_at"]))
+                else:
+                    video_path = self.create_video()
                 
                 if video_path:
                     logger.info("🎉 VIDEO READY!")
                     logger.info(f"📁 Video: {video_path}")
                     
-                    delivery_method = os.getenv("OUTPUT_DELIVERY", "local").lower()
-                    if delivery_method == "email":
-                        logger.info("📧 Video emailed to you!")
-                    elif delivery_method == "transfer_sh":
-                        manifest_path = video_path.replace('.mp4', '_delivery.json')
-                        if os.path.exists(manifest_path):
-                            with open(manifest_path, 'r', encoding='utf-8') as mf:
-                                manifest = json.load(mf)
-                            logger.info("🔗 Delivery URLs:")
-                            logger.info(f"   Video: {manifest.get('video_url')}")
-                            logger.info(f"   Instructions: {manifest.get('instructions_url')}")
+                    if os.getenv("OUTPUT_DELIVERY", "local").lower() in ("email", "transfer_sh", "s3"):
+                        logger.info("📬 Delivery queued - URLs are logged and saved to the manifest when it completes")
                     
                     logger.info("🔄 Next video will be created at the next scheduled time")
                     self._cleanup_old_files()
                 else:
                     logger.error("Failed to create video")
+                
+                if FreeConfig.PREPRODUCTION_ENABLED:
+                    # Stage durations changed - move tomorrow's start accordingly
+                    schedule_preproduction()
+                return video_path
                     
             except Exception as e:
                 logger.error(f"Error in automated video creation: {e}")
+                return None
+        
+        # Serve /health, /ready and /metrics for the platform health checks
+        if FreeConfig.HEALTH_SERVER_ENABLED:
+            self.health_server = HealthServer(readiness_probe=self.get_readiness)
+            self.health_server.start()
+        
+        # Keep ranked topics warm so research is off the critical path
+        if FreeConfig.FEED_POLLER_ENABLED:
+            from feed_poller import FeedPoller
+            self.feed_poller = FeedPoller()
+            self.feed_poller.start()
+        
+        # Persistent queue: scheduled slots survive restarts and spin-downs
+        self.job_store = JobStore()
+        self.job_workers = JobWorkerPool(self.job_store, {DAILY_VIDEO_JOB: create_and_prepare_video})
+        self.job_store.recover_interrupted()
+        metrics.add_listener(self.job_store.record_stage_duration)
         
         # Schedule daily video creation
         schedule_time = os.getenv('VIDEO_UPLOAD_TIME', '09:00')
-        logger.info(f"Scheduling daily video creation at {schedule_time}")
         
-        self.scheduler.schedule_daily(create_and_prepare_video, schedule_time)
+        def enqueue_scheduled_slot():
+            self.enqueue_scheduled_slot(schedule_time)
+        
+        def schedule_preproduction():
+            lead = self.estimate_lead_time() + FreeConfig.TOPIC_REFRESH_WINDOW_MINUTES * 60
+            self.scheduler.schedule_ahead_of_deadline(enqueue_scheduled_slot, schedule_time, lead)
+            return lead
         
-        # Create first video immediately
-        logger.info("Creating first video immediately...")
-        create_and_prepare_video()
+        if FreeConfig.PREPRODUCTION_ENABLED:
+            logger.info(f"Scheduling daily video delivery by {schedule_time}")
+            lead = schedule_preproduction()
+        else:
+            logger.info(f"Scheduling daily video creation at {schedule_time}")
+            lead = 0
+            self.scheduler.schedule_daily(enqueue_scheduled_slot, schedule_time)
+        
+        missed = self.job_store.missed_slots(DAILY_VIDEO_JOB, schedule_time)
+        upcoming = self._next_deadline(schedule_time)
+        if lead and datetime.now() >= upcoming - timedelta(seconds=lead):
+            # Booted inside the pre-production window - today's start time has already passed
+            self.job_workers.submit(DAILY_VIDEO_JOB, upcoming)
+        elif self.job_store.last_slot(DAILY_VIDEO_JOB) is None:
+            # First boot - create first video immediately
+            logger.info("Creating first video immediately...")
+            self.job_workers.submit(DAILY_VIDEO_JOB)
+        if missed:
+            logger.info(f"Detected {len(missed)} missed slot(s) while the worker was down")
+            self.job_store.apply_catchup(DAILY_VIDEO_JOB, missed)
+        
+        self.job_workers.start()
         
         logger.info("Free automated mode started successfully!")
         logger.info("The agent will create videos daily and prepare them for manual upload.")
         logger.info("Check the output folder for new videos and upload instructions.")
         
+        # Platforms stop the service with SIGTERM - shut down as cleanly as on Ctrl+C
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._handle_sigterm)
+        
         # Keep the scheduler running
         try:
             self.scheduler.start()
+            self.scheduler.join()
         except KeyboardInterrupt:
-            logger.info("Stopping free automated mode...")
-            self.scheduler.stop()
+            self.shutdown()
+    
+    def _handle_sigterm(self, signum, frame):
+        logger.info("Received SIGTERM")
+        self.shutdown()
     
-    def _cleanup_old_files(self, keep_count: int = 5):
-        """Clean up old video files to save space"""
+    def shutdown(self):
+        """Stop the scheduler and background threads, saving their state (Ctrl+C or SIGTERM)"""
+        if self._stop_event.is_set():
+            return
+        logger.info("Stopping free automated mode...")
+        self._stop_event.set()
+        self.scheduler.stop()
+        if self.job_workers:
+            self.job_workers.stop()
+        if self._delivery_queue:
+            self._delivery_queue.stop()
+        if self.feed_poller:
+            self.feed_poller.stop()
+        if self.health_server:
+            self.health_server.stop()
+    
+    def estimate_lead_time(self) -> float:
+        """Seconds from research to finished delivery, from recent stage durations"""
+        lead = FreeConfig.PREPRODUCTION_MARGIN_MINUTES * 60
+        for stage, default in STAGE_DURATION_DEFAULTS.items():
+            estimate = self.job_store.stage_duration_estimate(stage) if self.job_store else None
+            lead += estimate if estimate is not None else default
+        return lead
+    
+    def create_video_for_deadline(self, deadline: datetime) -> Optional[str]:
+        """Pre-produce a video so that it is delivered by the deadline"""
+        run_started = time.perf_counter()
+        video_path = None
         try:
-            video_files = []
-            for ext in ['*.mp4', '*.avi', '*.mov']:
-                video_files.extend(Path(self.output_dir).glob(ext))
+            logger.info(f"⏰ Pre-producing video for {deadline:%Y-%m-%d %H:%M}")
+            staged = self.prepare_video()
+            if not staged:
+                return None
             
-            video_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+            # Once only enough time to re-produce remains, check for newer topics
+            refresh_at = deadline - timedelta(seconds=self.estimate_lead_time())
+            if self._wait_until(refresh_at):
+                staged = self._refresh_staged_video(staged)
             
-            if len(video_files) > keep_count:
-                for old_file in video_files[keep_count:]:
-                    old_file.unlink()
-                    for suffix in ['.json', '_metadata.json', '_upload_instructions.txt']:
-                        meta_file = old_file.with_suffix(suffix)
-                        if meta_file.exists():
-                            meta_file.unlink()
-                    logger.info(f"Cleaned up old file: {old_file}")
-                    
+            delivery_estimate = self.job_store.stage_duration_estimate("delivery") if self.job_store else None
+            deliver_at = deadline - timedelta(seconds=delivery_estimate or STAGE_DURATION_DEFAULTS["delivery"])
+            self._wait_until(deliver_at)
+            if self._stop_event.is_set():
+                return None
+            
+            # Lateness is measured when the queued delivery completes, not when it is queued
+            self._deadlines[staged["video_path"]] = deadline
+            video_path = self.deliver_video(staged)
+            manifest_path = ArtifactCatalog.sidecar_paths(staged["video_path"])["delivery_manifest"]
+            if not video_path or not os.path.exists(manifest_path):
+                # Failed or kept locally - nothing will report completion later
+                self._deadlines.pop(staged["video_path"], None)
+                if video_path:
+                    self._record_lateness(deadline, datetime.now())
+            return video_path
+        finally:
+            outcome = "success" if video_path else "failure"
+            metrics.record_run(outcome, time.perf_counter() - run_started, video_path)
+    
+    def _refresh_staged_video(self, staged: Dict) -> Dict:
+        """Re-produce the staged video if newer trending topics appeared"""
+        trending_topics = self.research_topics()
+        new_topics = [t for t in trending_topics if t not in staged["trending_topics"]]
+        new_topic = self.topic_history.pick_unseen(new_topics)
+        if not new_topic:
+            logger.info("No newer trending topics, keeping the pre-staged video")
+            return staged
+        
+        logger.info(f"🔄 Newer trending topic found, re-producing: {new_topic}")
+        refreshed = self.prepare_video(new_topic, trending_topics=trending_topics)
+        if not refreshed:
+            logger.warning("Refresh failed, keeping the pre-staged video")
+            return staged
+        
+        # Same cleanup as retention: catalogued files, then the blob references
+        self.catalog.discard_run(staged["video_path"])
+        if self.blob_store is not None:
+            self.blob_store.release(staged["video_path"])
+            self.blob_store.gc()
+        self.topic_history.forget_video(staged["video_path"])
+        return refreshed
+    
+    def _wait_until(self, when: datetime) -> bool:
+        """Sleep until a wall-clock time; False if it already passed or we are stopping"""
+        remaining = (when - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return False
+        return not self._stop_event.wait(remaining)
+    
+    def enqueue_scheduled_slot(self, time_str: str, now: Optional[datetime] = None) -> Optional[int]:
+        """Queue the slot a schedule trigger stands for"""
+        if FreeConfig.PREPRODUCTION_ENABLED:
+            # Pre-production fires ahead of the deadline it works towards
+            slot = self._next_deadline(time_str, now)
+        else:
+            # The daily trigger fires at (or, if the loop was busy, just after) its own slot
+            slot = self._next_deadline(time_str, now) - timedelta(days=1)
+        return self.job_workers.submit(DAILY_VIDEO_JOB, slot)
+    
+    @staticmethod
+    def _next_deadline(time_str: str, now: Optional[datetime] = None) -> datetime:
+        """Next occurrence of an HH:MM time of day, strictly after now"""
+        hour, minute = map(int, time_str.split(":"))
+        now = now or datetime.now()
+        deadline = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return deadline if deadline > now else deadline + timedelta(days=1)
+    
+    def _cleanup_old_files(self, keep_count: Optional[int] = None):
+        """Drop the oldest runs beyond KEEP_VIDEO_COUNT or the OUTPUT_MAX_MB byte budget"""
+        if not FreeConfig.CLEANUP_OLD_FILES:
+            return
+        try:
+            removed = self.catalog.enforce_retention(keep_count=keep_count)
+            if self.blob_store is not None:
+                for video_path in removed:
+                    self.blob_store.release(video_path)
+                self.blob_store.gc()
         except Exception as e:
             logger.warning(f"Error during cleanup: {e}")
     
+    def get_readiness(self) -> Dict:
+        """Readiness details for the /ready endpoint"""
+        schedule_info = self.scheduler.get_schedule_info()
+        last_run = metrics.snapshot()["last_run"]
+        return {
+            "ready": self.scheduler.is_running(),
+            "model_loaded": self._content_researcher is not None and self._content_researcher.model is not None,
+            "last_run": last_run,
+            "next_run": schedule_info["next_upload"],
+            "schedule": schedule_info,
+            "job_queue": self.job_store.counts() if self.job_store else None,
+        }
+    
     def get_status(self) -> Dict:
         """Get agent status"""
-        video_files = list(Path(self.output_dir).glob("*.mp4"))
+        catalog_stats = self.catalog.stats()
+        latest = self.catalog.latest_run()
+        job_store = self.job_store
+        if job_store is None and os.path.exists(FreeConfig.JOB_DB_PATH):
+            job_store = JobStore()
+        feed_health = None
+        if os.path.exists(FreeConfig.FEED_HEALTH_DB_PATH):
+            from feed_health import FeedHealth
+            feed_health = FeedHealth()
+        if self.feed_poller:
+            feed_poller = self.feed_poller.status()
+        else:
+            from feed_poller import saved_status
+            feed_poller = saved_status()
         
         return {
             "status": "running",
             "mode": "free",
-            "videos_created": len(video_files),
-            "latest_video": str(video_files[0]) if video_files else None,
+            "videos_created": catalog_stats["runs"],
+            "output_bytes": catalog_stats["bytes"],
+            "latest_video": latest["video_path"] if latest else None,
             "scheduler_active": self.scheduler.is_running(),
             "next_run": self.scheduler.get_next_run_time(),
+            "job_queue": job_store.counts() if job_store else {},
+            "blob_store": self.blob_store.stats() if self.blob_store else None,
+            "feed_poller": feed_poller,
+            "feeds": feed_health.report() if feed_health else [],
             "free_features": {
                 "content_research": "RSS feeds + Hugging Face",
                 "video_generation": "Local TTS + OpenCV",
@@ -367,6 +634,10 @@ def main():
         if video_path:
             print(f"\n🎉 VIDEO CREATED SUCCESSFULLY!")
             print(f"📁 Video file: {video_path}")
+            if agent._delivery_queue:
+                print("⏳ Waiting for delivery to finish...")
+                agent._delivery_queue.wait(include_retries=False)
+                agent._delivery_queue.stop()
         else:
             print("❌ Failed to create video")
             sys.exit(1)
@@ -385,12 +656,30 @@ def main():
         print("=" * 50)
         print(f"Status: {status['status']}")
         print(f"Mode: {status['mode']}")
-        print(f"Videos Created: {status['videos_created']}")
+        print(f"Videos Created: {status['videos_created']} ({status['output_bytes'] / (1024 * 1024):.1f}MB)")
         print(f"Scheduler Active: {status['scheduler_active']}")
         if status['next_run']:
             print(f"Next Scheduled Run: {status['next_run']}")
         if status['latest_video']:
             print(f"Latest Video: {status['latest_video']}")
+        if status['job_queue']:
+            jobs = ", ".join(f"{state}={count}" for state, count in sorted(status['job_queue'].items()))
+            print(f"Job Queue: {jobs}")
+        blobs = status['blob_store']
+        if blobs and blobs['blobs']:
+            print(f"Blob Store: {blobs['blobs']} blobs, {blobs['stored_bytes'] / (1024 * 1024):.1f}MB, "
+                  f"dedup {blobs['write_dedup_ratio']:.2f}x writes / {blobs['storage_dedup_ratio']:.2f}x storage")
+        poller = status['feed_poller']
+        if poller:
+            print(f"Feed Poller: {poller['topics']} topics, last poll {poller['last_poll'] or 'never'}")
+        
+        if status['feeds']:
+            print("\n📰 FEEDS:")
+            for feed in status['feeds']:
+                latency = f"{feed['latency_seconds']:.2f}s" if feed['latency_seconds'] is not None else "n/a"
+                avg_yield = f"{feed['avg_yield']:.1f}" if feed['avg_yield'] is not None else "n/a"
+                print(f"  {feed['url']}: {feed['state']}, {feed['failure_rate']:.0%} failures, "
+                      f"latency {latency}, yield {avg_yield}, polled every {feed['poll_every']} cycle(s)")
         
         print("\n🆓 FREE FEATURES:")
         for feature, description in status['free_features'].items():
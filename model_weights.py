@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Model Weights
+Converts the script model once into a local safetensors directory (optionally
+stored as float16/bfloat16), then loads it by mapping the file and pointing
+the parameters straight at the mapped pages - no deserialization, no private
+heap copy, and processes on the same host share the page cache.
+
+Usage:
+    python model_weights.py prepare [--model NAME] [--dtype float32|bfloat16|float16]
+"""
+
+import os
+import re
+import json
+import time
+import struct
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from config_free import FreeConfig
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+WEIGHTS_FILE = "model.safetensors"
+MARKER_FILE = "prepared.json"
+DTYPES = ("float32", "bfloat16", "float16")
+
+# safetensors dtype tags -> torch dtype names
+_SAFETENSORS_DTYPES = {"F32": "float32", "F16": "float16", "BF16": "bfloat16", "F64": "float64",
+                       "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool"}
+
+
+def prepared_path(model_name: str, dtype: str, weights_dir: Optional[str] = None) -> str:
+    """Where the converted copy of model_name in dtype lives"""
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "--", model_name.strip("/"))
+    return os.path.join(weights_dir or FreeConfig.AI_WEIGHTS_DIR, f"{slug}-{dtype}")
+
+
+def is_prepared(path: str) -> bool:
+    return os.path.exists(os.path.join(path, MARKER_FILE)) and os.path.exists(os.path.join(path, WEIGHTS_FILE))
+
+
+def prepare_weights(model_name: str, dtype: str = "float32", weights_dir: Optional[str] = None) -> str:
+    """One-time conversion: load the model normally, cast, save as a single safetensors file
+    keyed by module names (so loading needs no checkpoint key mapping)"""
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}")
+    path = prepared_path(model_name, dtype, weights_dir)
+    if is_prepared(path):
+        return path
+    start = time.perf_counter()
+    logger.info(f"Preparing memory-mapped weights for {model_name} ({dtype})...")
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=getattr(torch, dtype))
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tmp_path = path + ".tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    save_mapped_weights(model, os.path.join(tmp_path, WEIGHTS_FILE))
+    model.config.save_pretrained(tmp_path)
+    if getattr(model, "generation_config", None) is not None:
+        model.generation_config.save_pretrained(tmp_path)
+    tokenizer.save_pretrained(tmp_path)
+    with open(os.path.join(tmp_path, MARKER_FILE), "w", encoding="utf-8") as f:
+        json.dump({"source": model_name, "dtype": dtype, "prepared_at": time.time()}, f)
+    os.replace(tmp_path, path)
+    logger.info(f"Prepared {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def save_mapped_weights(model, weights_path: str):
+    """The state dict under module names in one safetensors file; tied tensors are stored
+    once and their other names recorded as aliases"""
+    from safetensors.torch import save_file
+
+    tensors, aliases, seen = {}, {}, {}
+    for name, tensor in model.state_dict().items():
+        key = (tensor.data_ptr(), tensor.dtype, tuple(tensor.shape))
+        if key in seen:
+            aliases[name] = seen[key]
+        else:
+            seen[key] = name
+            tensors[name] = tensor.contiguous()
+    save_file(tensors, weights_path, metadata={"aliases": json.dumps(aliases)})
+
+
+def _read_header(weights_path: str):
+    with open(weights_path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    metadata = header.pop("__metadata__", None) or {}
+    return 8 + header_size, header, json.loads(metadata.get("aliases", "{}"))
+
+
+def map_state_dict(weights_path: str) -> Dict:
+    """Tensors that are views into a private (copy-on-write) mapping of a safetensors file
+
+    Pages are read on first touch and stay shared in the page cache; nothing
+    is ever written back to the file.
+    """
+    import torch
+
+    data_start, header, aliases = _read_header(weights_path)
+    storage = torch.UntypedStorage.from_file(weights_path, shared=False, nbytes=os.path.getsize(weights_path))
+    state = {}
+    for name, info in header.items():
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        begin, end = info["data_offsets"]
+        offset = data_start + begin
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        tensor = torch.empty(0, dtype=dtype)
+        if offset % itemsize == 0:
+            tensor.set_(storage, offset // itemsize, info["shape"])
+        else:  # not addressable in whole elements - copy this one
+            raw = torch.empty(0, dtype=torch.uint8).set_(storage, offset, (end - begin,))
+            tensor = raw.clone().view(dtype).reshape(info["shape"])
+        state[name] = tensor
+    for alias, name in aliases.items():
+        state[alias] = state[name]
+    return state
+
+
+@contextmanager
+def _parameters_on_meta():
+    """Create module parameters on the meta device (no allocation, no init) while
+    buffers such as rotary frequencies are still computed for real.
+
+    Uses torch's parameter registration hook rather than patching nn.Module, and
+    only acts on the calling thread - models built elsewhere meanwhile are untouched."""
+    import torch
+    from torch.nn.modules.module import register_module_parameter_registration_hook
+
+    owner = threading.get_ident()
+
+    def to_meta(module, name, param):
+        if param is not None and not param.is_meta and threading.get_ident() == owner:
+            return torch.nn.Parameter(param.to("meta"), requires_grad=param.requires_grad)
+        return None
+
+    handle = register_module_parameter_registration_hook(to_meta)
+    try:
+        yield
+    finally:
+        handle.remove()
+
+
+def load_mapped(path: str):
+    """Model from a prepare_weights directory with its parameters mapped, not loaded"""
+    import torch
+    from transformers import AutoConfig, AutoModelForCausalLM
+
+    with open(os.path.join(path, MARKER_FILE), "r", encoding="utf-8") as f:
+        dtype = getattr(torch, json.load(f)["dtype"])
+    config = AutoConfig.from_pretrained(path)
+    with _parameters_on_meta():
+        model = AutoModelForCausalLM.from_config(config, torch_dtype=dtype)
+    state = map_state_dict(os.path.join(path, WEIGHTS_FILE))
+    model.load_state_dict(state, strict=False, assign=True)
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"weights missing from {path}: {missing[:5]}")
+    model.eval()
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare memory-mapped script model weights")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prepare = sub.add_parser("prepare", help="Convert the model once into data/models")
+    prepare.add_argument("--model", default=FreeConfig.AI_MODEL_NAME)
+    prepare.add_argument("--dtype", default=FreeConfig.AI_WEIGHTS_DTYPE, choices=DTYPES)
+    args = parser.parse_args()
+    print(prepare_weights(args.model, args.dtype))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Background Music Mixer
+Streams the narration and a music bed through ffmpeg decode pipes, loops or
+trims the music to the video length, and ducks it under the narration with
+block-wise NumPy gain curves. The result is one pre-mixed WAV for the encoder;
+memory stays at a few blocks however long the music file or the video is.
+"""
+
+import math
+import wave
+import subprocess
+from typing import Dict, Optional, Tuple
+import numpy as np
+from config_free import FreeConfig
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+MIX_RATE = 44100
+MIX_CHANNELS = 2
+# Narration level is measured per window; the music gain ramps over one window when speech starts
+WINDOW_SECONDS = 0.02
+WINDOWS_PER_BLOCK = 50
+# Narration windows louder than this (RMS) count as speech
+SPEECH_THRESHOLD_DB = -40.0
+# After speech stops the music stays ducked this long, then recovers over RELEASE_SECONDS
+HOLD_SECONDS = 0.25
+RELEASE_SECONDS = 0.5
+FADE_OUT_SECONDS = 1.5
+
+
+def _gain(db: float) -> float:
+    return 10 ** (db / 20)
+
+
+def _decoder(path: str, duration: float, channels: int, loop: bool = False) -> subprocess.Popen:
+    """ffmpeg writing `duration` seconds of path as float PCM at MIX_RATE to a pipe"""
+    import imageio_ffmpeg
+
+    command = [imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error"]
+    if loop:
+        command += ["-stream_loop", "-1"]
+    command += ["-i", path, "-t", f"{duration:.3f}", "-f", "f32le",
+                "-ac", str(channels), "-ar", str(MIX_RATE), "-"]
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+
+def _read_block(decoder: Optional[subprocess.Popen], frames: int, channels: int) -> Tuple[np.ndarray, int]:
+    """Next `frames` samples from a decoder, zero-padded once it runs out, and how many were decoded"""
+    block = np.zeros((frames, channels), dtype=np.float32)
+    if decoder is None:
+        return block, 0
+    data = decoder.stdout.read(frames * channels * 4)
+    decoded = len(data) // (channels * 4)
+    block[:decoded] = np.frombuffer(data[:decoded * channels * 4], dtype=np.float32).reshape(-1, channels)
+    return block, decoded
+
+
+class Ducker:
+    """Sidechain gain for the music from the narration level, carried across blocks"""
+
+    def __init__(self, duck_db: float, rate: int = MIX_RATE):
+        self.window = round(WINDOW_SECONDS * rate)
+        self.duck = _gain(duck_db)
+        self.threshold = _gain(SPEECH_THRESHOLD_DB)
+        self.windows_done = 0
+        self.last_speech = -math.inf  # window index where narration was last heard
+        self.level = 1.0  # music gain at the end of the previous block
+        self.ducked_windows = 0
+
+    def gains(self, narration: np.ndarray) -> np.ndarray:
+        """Per-sample music gain for a block of mono narration whose length is a whole number of windows"""
+        windows = len(narration) // self.window
+        rms = np.sqrt(np.mean(np.square(narration.reshape(windows, -1)), axis=1))
+        index = self.windows_done + np.arange(windows)
+        last = np.maximum.accumulate(np.where(rms > self.threshold, index, self.last_speech))
+        since = (index - last) * WINDOW_SECONDS  # seconds since speech; 0 while speaking
+        recovery = np.clip((since - HOLD_SECONDS) / RELEASE_SECONDS, 0.0, 1.0)
+        targets = self.duck + (1 - self.duck) * recovery
+        # Linear ramps between window ends, starting from where the previous block left off
+        ends = np.arange(windows + 1) * self.window
+        curve = np.interp(np.arange(1, len(narration) + 1), ends, np.concatenate([[self.level], targets]))
+        self.windows_done += windows
+        self.last_speech = last[-1]
+        self.level = targets[-1]
+        self.ducked_windows += int(np.count_nonzero(recovery < 1))
+        return curve.astype(np.float32)
+
+
+def mix_music(narration_path: Optional[str], music_path: str, output_path: str, duration: float,
+              music_db: Optional[float] = None, duck_db: Optional[float] = None) -> Dict:
+    """Write narration plus the music bed, looped or trimmed to `duration`, as a 16-bit WAV
+
+    The music plays at music_db and drops a further duck_db while the narration
+    speaks, fading out over the last FADE_OUT_SECONDS. Raises if the music
+    cannot be decoded.
+    """
+    music_gain = _gain(FreeConfig.MUSIC_VOLUME_DB if music_db is None else music_db)
+    ducker = Ducker(FreeConfig.MUSIC_DUCK_DB if duck_db is None else duck_db)
+    total = round(duration * MIX_RATE)
+    block_frames = ducker.window * WINDOWS_PER_BLOCK
+    fade_start = total - round(FADE_OUT_SECONDS * MIX_RATE)
+
+    # Narration is decoded as mono (TTS is mono; an upmix would lower its level) and centred in the mix
+    music = _decoder(music_path, duration, MIX_CHANNELS, loop=True)
+    narration = _decoder(narration_path, duration, 1) if narration_path else None
+    written = 0
+    try:
+        with wave.open(output_path, "wb") as out:
+            out.setnchannels(MIX_CHANNELS)
+            out.setsampwidth(2)
+            out.setframerate(MIX_RATE)
+            while written < total:
+                voice, _ = _read_block(narration, block_frames, 1)
+                bed, decoded = _read_block(music, block_frames, MIX_CHANNELS)
+                if written == 0 and not decoded:
+                    raise ValueError(f"no audio decoded from {music_path}")
+                gain = ducker.gains(voice) * music_gain
+                # Fade the bed out at the end of the video
+                position = written + np.arange(block_frames)
+                gain *= np.clip((total - position) / max(total - fade_start, 1), 0.0, 1.0)
+                mixed = voice + bed * gain[:, None]
+                frames = min(block_frames, total - written)
+                out.writeframes((np.clip(mixed[:frames], -1.0, 1.0) * 32767).astype("<i2").tobytes())
+                written += frames
+    finally:
+        for decoder in (music, narration):
+            if decoder is not None:
+                decoder.kill()
+                decoder.wait()
+    ducked = min(ducker.ducked_windows * WINDOW_SECONDS, duration)
+    logger.info(f"🎵 Music bed mixed: {duration:.1f}s, ducked under narration for {ducked:.1f}s")
+    return {"path": output_path, "seconds": written / MIX_RATE, "ducked_seconds": ducked}
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Object Storage Delivery
+Durable delivery to any S3-compatible bucket (AWS S3, Cloudflare R2, Backblaze
+B2, MinIO): SigV4-signed requests, parallel multipart uploads, ETag-based skip
+of unchanged objects and presigned download URLs for the manifest.
+"""
+
+import os
+import hmac
+import time
+import hashlib
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit, parse_qsl
+from xml.etree import ElementTree
+from config_free import FreeConfig
+from health_server import metrics
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# S3 rejects parts under 5 MiB (except the last) and more than 10,000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+MAX_PRESIGN_SECONDS = 7 * 24 * 3600
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+class ObjectStorageError(Exception):
+    """Non-success response from the object store"""
+
+
+def _uri_encode(value: str, safe: str = "") -> str:
+    return quote(value, safe="-_.~" + safe)
+
+
+class SigV4Signer:
+    """AWS Signature Version 4 for S3, for request headers or presigned URLs"""
+
+    def __init__(self, access_key: str, secret_key: str, region: str = "us-east-1", service: str = "s3"):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _signing_key(self, date: str) -> bytes:
+        key = ("AWS4" + self.secret_key).encode("utf-8")
+        for part in (date, self.region, self.service, "aws4_request"):
+            key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+        return key
+
+    def _signature(self, method: str, url: str, headers: Dict[str, str], payload_hash: str,
+                   amz_date: str, query: Optional[List[Tuple[str, str]]] = None) -> Tuple[str, str]:
+        """(signed header names, hex signature) for one request"""
+        parts = urlsplit(url)
+        params = query if query is not None else parse_qsl(parts.query, keep_blank_values=True)
+        canonical_query = "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(params))
+        canonical_headers = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+        signed_headers = ";".join(sorted(canonical_headers))
+        canonical_request = "\n".join([
+            method,
+            _uri_encode(parts.path or "/", safe="/"),
+            canonical_query,
+            "".join(f"{k}:{canonical_headers[k]}\n" for k in sorted(canonical_headers)),
+            signed_headers,
+            payload_hash,
+        ])
+        scope = f"{amz_date[:8]}/{self.region}/{self.service}/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+        signature = hmac.new(self._signing_key(amz_date[:8]), string_to_sign.encode("utf-8"),
+                             hashlib.sha256).hexdigest()
+        return signed_headers, signature
+
+    def sign_headers(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                     payload_hash: str = UNSIGNED_PAYLOAD, now: Optional[datetime] = None) -> Dict[str, str]:
+        """Headers for the request, including x-amz-date and Authorization"""
+        amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        signed = dict(headers or {})
+        signed["host"] = urlsplit(url).netloc
+        signed["x-amz-date"] = amz_date
+        signed["x-amz-content-sha256"] = payload_hash
+        signed_headers, signature = self._signature(method, url, signed, payload_hash, amz_date)
+        signed["Authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{amz_date[:8]}/{self.region}/{self.service}/aws4_request, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del signed["host"]  # requests sets it from the URL
+        return signed
+
+    def presign(self, method: str, url: str, expires: int, now: Optional[datetime] = None) -> str:
+        """Query-string signed URL, valid for `expires` seconds"""
+        amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True) + [
+            ("X-Amz-Algorithm", "AWS4-HMAC-SHA256"),
+            ("X-Amz-Credential", f"{self.access_key}/{amz_date[:8]}/{self.region}/{self.service}/aws4_request"),
+            ("X-Amz-Date", amz_date),
+            ("X-Amz-Expires", str(min(expires, MAX_PRESIGN_SECONDS))),
+            ("X-Amz-SignedHeaders", "host"),
+        ]
+        _, signature = self._signature(method, url, {"host": parts.netloc}, UNSIGNED_PAYLOAD, amz_date, query)
+        encoded = "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in query)
+        return f"{parts.scheme}://{parts.netloc}{_uri_encode(parts.path, safe='/')}?{encoded}&X-Amz-Signature={signature}"
+
+
+def multipart_etag(file_path: str, part_size: int) -> Tuple[str, str]:
+    """(expected S3 ETag, sha256) for a file uploaded with this part size, in one read"""
+    sha256 = hashlib.sha256()
+    part_digests = []
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(part_size), b""):
+            sha256.update(block)
+            part_digests.append(hashlib.md5(block).digest())
+    if len(part_digests) <= 1:
+        etag = (part_digests[0] if part_digests else hashlib.md5(b"").digest()).hex()
+    else:
+        etag = f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+    return etag, sha256.hexdigest()
+
+
+class ObjectStorageUploader:
+    """Upload files to an S3-compatible bucket; same result shape as HedgedUploader"""
+
+    name = "s3"
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str,
+                 region: str = "us-east-1", prefix: str = "", part_size: int = 8 * 1024 * 1024,
+                 concurrency: int = 4, presign_expires: int = MAX_PRESIGN_SECONDS, timeout: float = 60):
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.concurrency = max(concurrency, 1)
+        self.presign_expires = min(presign_expires, MAX_PRESIGN_SECONDS)
+        self.timeout = timeout
+        self.signer = SigV4Signer(access_key, secret_key, region)
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency + 2)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def object_url(self, key: str) -> str:
+        """Path-style URL, which every S3-compatible service accepts"""
+        return f"{self.endpoint}/{self.bucket}/{key}"
+
+    def _request(self, method: str, key: str, params: Optional[Dict[str, str]] = None,
+                 body: bytes = b"", headers: Optional[Dict[str, str]] = None, ok=(200,)):
+        url = self.object_url(key)
+        if params:
+            url += "?" + "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" if v != "" else _uri_encode(k)
+                                  for k, v in params.items())
+        payload_hash = hashlib.sha256(body).hexdigest()
+        signed = self.signer.sign_headers(method, url, headers, payload_hash)
+        response = self.session.request(method, url, data=body, headers=signed, timeout=self.timeout)
+        if response.status_code not in ok:
+            raise ObjectStorageError(f"{method} {key}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+    def head(self, key: str) -> Optional[Dict[str, str]]:
+        """ETag and stored sha256 of an object, or None if it doesn't exist"""
+        response = self._request("HEAD", key, ok=(200, 404))
+        if response.status_code == 404:
+            return None
+        return {"etag": response.headers.get("ETag", "").strip('"'),
+                "sha256": response.headers.get("x-amz-meta-sha256")}
+
+    def upload(self, file_path: str, remote_name: Optional[str] = None) -> Optional[Dict]:
+        """Upload unless an identical object exists; returns {url, etag, skipped, ...} or None"""
+        start = time.perf_counter()
+        key = self.prefix + (remote_name or os.path.basename(file_path))
+        size = os.path.getsize(file_path)
+        try:
+            etag, sha256 = multipart_etag(file_path, self.part_size)
+            existing = self.head(key)
+            skipped = bool(existing) and (existing["etag"] == etag or existing["sha256"] == sha256)
+            if skipped:
+                logger.info(f"⏭️ {key} already stored (ETag {etag}), skipping upload")
+            else:
+                headers = {"Content-Type": mimetypes.guess_type(file_path)[0] or "application/octet-stream",
+                           "x-amz-meta-sha256": sha256}
+                if size <= self.part_size:
+                    with open(file_path, "rb") as f:
+                        response = self._request("PUT", key, body=f.read(), headers=headers)
+                    etag = response.headers.get("ETag", etag).strip('"')
+                else:
+                    etag = self._multipart_upload(file_path, key, size, headers)
+                metrics.inc("s3_uploaded_bytes_total", size)
+        except Exception as e:
+            logger.error(f"Object storage upload of {key} failed: {e}")
+            metrics.inc("upload_failure_total", provider=self.name)
+            return None
+
+        seconds = time.perf_counter() - start
+        expires_at = datetime.now() + timedelta(seconds=self.presign_expires)
+        return {
+            "url": self.signer.presign("GET", self.object_url(key), self.presign_expires),
+            "provider": self.name,
+            "bytes": size,
+            "seconds": seconds,
+            "sha256": sha256,
+            "verified": "checksum",  # S3 rejects a payload that doesn't match its signed SHA-256
+            "etag": etag,
+            "key": key,
+            "skipped": skipped,
+            "url_expires_at": expires_at.isoformat(timespec="seconds"),
+        }
+
+    def _multipart_upload(self, file_path: str, key: str, size: int, headers: Dict[str, str]) -> str:
+        part_size = max(self.part_size, -(-size // MAX_PARTS))
+        response = self._request("POST", key, {"uploads": ""}, headers=headers)
+        upload_id = ElementTree.fromstring(response.content).findtext("{*}UploadId")
+        parts = -(-size // part_size)
+        logger.info(f"⬆️ {key}: {parts} parts of {part_size / (1024 * 1024):.0f}MiB, {self.concurrency} at a time")
+
+        def send_part(number: int) -> str:
+            with open(file_path, "rb") as f:
+                f.seek((number - 1) * part_size)
+                body = f.read(part_size)
+            part = self._request("PUT", key, {"partNumber": str(number), "uploadId": upload_id}, body=body)
+            return part.headers["ETag"]
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="s3-part") as pool:
+                etags = list(pool.map(send_part, range(1, parts + 1)))
+            manifest = "".join(f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>"
+                               for n, etag in enumerate(etags, start=1))
+            body = f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>".encode("utf-8")
+            response = self._request("POST", key, {"uploadId": upload_id}, body=body)
+            if b"<Error>" in response.content:
+                raise ObjectStorageError(f"complete {key}: {response.text[:200]}")
+            result = ElementTree.fromstring(response.content)
+            return (result.findtext("{*}ETag") or "").strip('"')
+        except Exception:
+            try:
+                self._request("DELETE", key, {"uploadId": upload_id}, ok=(200, 204, 404))
+            except Exception as e:
+                logger.warning(f"Could not abort multipart upload {upload_id}: {e}")
+            raise
+
+
+_object_storage = None
+_object_storage_lock = threading.Lock()
+
+
+def get_object_storage() -> Optional[ObjectStorageUploader]:
+    """Shared uploader built from the S3_* settings (None when not configured)"""
+    global _object_storage
+    with _object_storage_lock:
+        if _object_storage is None:
+            if not (FreeConfig.S3_ENDPOINT and FreeConfig.S3_BUCKET):
+                logger.error("Object storage not configured. Need: S3_ENDPOINT, S3_BUCKET, S3_ACCESS_KEY, S3_SECRET_KEY")
+                return None
+            _object_storage = ObjectStorageUploader(
+                FreeConfig.S3_ENDPOINT, FreeConfig.S3_BUCKET, FreeConfig.S3_ACCESS_KEY, FreeConfig.S3_SECRET_KEY,
+                region=FreeConfig.S3_REGION, prefix=FreeConfig.S3_PREFIX, part_size=FreeConfig.S3_PART_SIZE,
+                concurrency=FreeConfig.S3_CONCURRENCY, presign_expires=FreeConfig.S3_PRESIGN_EXPIRES,
+            )
+        return _object_storage
@@ -1,6 +1,5 @@
 import schedule
-import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import threading
 from typing import Callable, Optional
 import os
@@ -8,6 +7,12 @@ from logger import get_logger
 
 logger = get_logger(__name__)
 
+# Upper bound on a single idle wait, so wall-clock jumps (suspend, NTP) are picked up
+MAX_IDLE_SECONDS = 3600
+
+# Tag of the daily job that starts pre-production ahead of the upload deadline
+PREPRODUCTION_TAG = "preproduction"
+
 class VideoScheduler:
     def __init__(self):
         # Read scheduler configuration from environment variables with sensible defaults
@@ -15,23 +20,31 @@ class VideoScheduler:
         self.schedule_type = os.getenv("UPLOAD_SCHEDULE", "daily").lower()
         self.running = False
         self.thread = None
+        # Timer thread sleeps on this until the next job is due, stop() or a new job
+        self._wakeup = threading.Condition()
+        self._schedule_changed = False
+        # Held while a job runs, so a long render can't overlap the next slot
+        self._run_lock = threading.Lock()
+        self.preproduction_start = None
         logger.info(f"Scheduler initialized with {self.schedule_type} uploads at {self.upload_time}")
     
     def schedule_upload(self, upload_function: Callable):
         """Schedule the upload function based on configuration"""
         logger.info(f"Setting up {self.schedule_type} schedule for uploads at {self.upload_time}")
         
+        job = self._background_job(upload_function)
         if self.schedule_type == 'daily':
-            schedule.every().day.at(self.upload_time).do(upload_function)
+            schedule.every().day.at(self.upload_time).do(job)
         elif self.schedule_type == 'weekly':
-            schedule.every().week.at(self.upload_time).do(upload_function)
+            schedule.every().week.at(self.upload_time).do(job)
         elif self.schedule_type == 'monthly':
             # For monthly, we'll schedule for the 1st of each month
-            schedule.every(30).days.at(self.upload_time).do(upload_function)
+            schedule.every(30).days.at(self.upload_time).do(job)
         else:
             logger.error(f"Invalid schedule type: {self.schedule_type}")
             return False
         
+        self._notify_schedule_changed()
         return True
 
     def schedule_daily(self, upload_function: Callable, time_str: Optional[str] = None) -> bool:
@@ -41,12 +54,34 @@ class VideoScheduler:
         self.schedule_type = 'daily'
         logger.info(f"Setting up daily schedule at {self.upload_time}")
         try:
-            schedule.every().day.at(self.upload_time).do(upload_function)
+            schedule.every().day.at(self.upload_time).do(self._background_job(upload_function))
+            self._notify_schedule_changed()
             return True
         except Exception as e:
             logger.error(f"Failed to schedule daily job: {e}")
             return False
     
+    def schedule_ahead_of_deadline(self, upload_function: Callable, deadline_str: str,
+                                   lead_seconds: float) -> Optional[str]:
+        """Schedule a daily job lead_seconds before the HH:MM deadline, replacing the previous one"""
+        try:
+            deadline = datetime.combine(date.today(), datetime.strptime(deadline_str, "%H:%M").time())
+            start_time = (deadline - timedelta(seconds=lead_seconds)).strftime("%H:%M:%S")
+            schedule.clear(PREPRODUCTION_TAG)
+            schedule.every().day.at(start_time).do(self._background_job(upload_function)).tag(PREPRODUCTION_TAG)
+        except Exception as e:
+            logger.error(f"Failed to schedule pre-production: {e}")
+            return None
+        
+        self.upload_time = deadline_str
+        self.schedule_type = 'daily'
+        if start_time != self.preproduction_start:
+            logger.info(f"Pre-production starts daily at {start_time} for the {deadline_str} deadline "
+                        f"(lead {lead_seconds / 60:.1f} min)")
+        self.preproduction_start = start_time
+        self._notify_schedule_changed()
+        return start_time
+
     def start(self):
         """Start the scheduler in a background thread"""
         if self.running:
@@ -60,35 +95,76 @@ class VideoScheduler:
     
     def stop(self):
         """Stop the scheduler"""
-        self.running = False
+        with self._wakeup:
+            self.running = False
+            self._wakeup.notify_all()
         if self.thread:
             self.thread.join(timeout=5)
         logger.info("Scheduler stopped")
 
+    def join(self):
+        """Block until the scheduler is stopped"""
+        if self.thread:
+            self.thread.join()
+
     def is_running(self) -> bool:
         """Return whether the scheduler is currently running."""
         return self.running
     
     def _run_scheduler(self):
-        """Run the scheduler loop"""
+        """Run the scheduler loop, sleeping until the next job is due"""
         logger.info("Scheduler loop started")
         
         while self.running:
             try:
                 schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                idle = schedule.idle_seconds()
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
-                time.sleep(60)  # Wait a minute before retrying
+                idle = 60  # Wait a minute before retrying
+            
+            timeout = MAX_IDLE_SECONDS if idle is None else min(max(idle, 0), MAX_IDLE_SECONDS)
+            with self._wakeup:
+                if self.running and not self._schedule_changed:
+                    self._wakeup.wait(timeout)
+                self._schedule_changed = False
+
+    def _notify_schedule_changed(self):
+        """Wake the timer thread so it recomputes the next due time"""
+        with self._wakeup:
+            self._schedule_changed = True
+            self._wakeup.notify_all()
+
+    def _background_job(self, upload_function: Callable) -> Callable:
+        """Wrap a job so it runs off the timer thread and never overlaps itself"""
+        def launch():
+            if not self._run_lock.acquire(blocking=False):
+                logger.warning("Previous scheduled run still in progress, skipping this slot")
+                return
+            
+            def run():
+                try:
+                    upload_function()
+                except Exception as e:
+                    logger.error(f"Scheduled job failed: {e}")
+                finally:
+                    self._run_lock.release()
+            
+            threading.Thread(target=run, name="scheduled-job", daemon=True).start()
+        
+        return launch
+
+    def is_job_running(self) -> bool:
+        """Return whether a scheduled job is currently executing."""
+        return self._run_lock.locked()
     
     def get_next_run_time(self) -> Optional[datetime]:
         """Get the next scheduled run time"""
         if not schedule.jobs:
             return None
         
-        # Get the next run time from the first job
-        next_run = schedule.jobs[0].next_run
-        return next_run
+        # Earliest next run across all jobs
+        return schedule.next_run()
     
     def get_schedule_info(self) -> dict:
         """Get current schedule information"""
@@ -97,6 +173,7 @@ class VideoScheduler:
         return {
             'schedule_type': self.schedule_type,
             'upload_time': self.upload_time,
+            'preproduction_start': self.preproduction_start,
             'running': self.running,
             'next_upload': next_run.strftime('%Y-%m-%d %H:%M:%S') if next_run else 'Not scheduled',
             'jobs_count': len(schedule.jobs)
@@ -114,22 +191,25 @@ class VideoScheduler:
     def clear_schedule(self):
         """Clear all scheduled jobs"""
         schedule.clear()
+        self._notify_schedule_changed()
         logger.info("All scheduled jobs cleared")
     
     def add_custom_schedule(self, interval: int, unit: str, upload_function: Callable):
         """Add a custom schedule (for testing or flexibility)"""
         logger.info(f"Adding custom schedule: every {interval} {unit}")
         
+        job = self._background_job(upload_function)
         if unit == 'minutes':
-            schedule.every(interval).minutes.do(upload_function)
+            schedule.every(interval).minutes.do(job)
         elif unit == 'hours':
-            schedule.every(interval).hours.do(upload_function)
+            schedule.every(interval).hours.do(job)
         elif unit == 'days':
-            schedule.every(interval).days.do(upload_function)
+            schedule.every(interval).days.do(job)
         else:
             logger.error(f"Invalid unit: {unit}")
             return False
         
+        self._notify_schedule_changed()
         return True
 
 # Global scheduler instance
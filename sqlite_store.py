@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+SQLite Store
+Connection helper shared by the agent's SQLite files (jobs, artifacts, blobs,
+feed health, topic history): WAL mode, dict-like rows and explicit transactions.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(db_path: str):
+    """Short-lived connection in autocommit mode - writers use BEGIN IMMEDIATE/COMMIT"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        yield conn
+    finally:
+        conn.close()
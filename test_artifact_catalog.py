@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Artifact catalog tests: retention by count and bytes, sidecars, durations
+"""
+
+import subprocess
+from datetime import datetime, timedelta
+
+import pytest
+
+from artifact_catalog import ArtifactCatalog, mp4_duration
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return ArtifactCatalog(str(tmp_path / "artifacts.db"))
+
+
+def _render(tmp_path, name, size):
+    video = tmp_path / f"{name}.mp4"
+    video.write_bytes(b"\0" * size)
+    (tmp_path / f"{name}_upload_instructions.txt").write_text("instructions")
+    (tmp_path / f"{name}_delivery.json").write_text("{}")
+    return str(video)
+
+
+def _register(catalog, tmp_path, count, size=1000):
+    videos = []
+    for i in range(count):
+        video = _render(tmp_path, f"video_{i}", size)
+        catalog.register_run(video, f"topic {i}", created_at=datetime(2026, 1, 1) + timedelta(days=i))
+        videos.append(video)
+    return videos
+
+
+def test_retention_by_count_removes_sidecars(catalog, tmp_path):
+    videos = _register(catalog, tmp_path, 4)
+
+    removed = catalog.enforce_retention(keep_count=2, max_bytes=0)
+
+    assert removed == videos[:2]
+    assert sorted(p.name for p in tmp_path.glob("video_*")) == sorted(
+        f"video_{i}{suffix}" for i in (2, 3) for suffix in (".mp4", "_upload_instructions.txt", "_delivery.json"))
+    assert catalog.stats()["runs"] == 2
+    assert catalog.latest_run()["video_path"] == videos[3]
+
+
+def test_retention_by_byte_budget_keeps_pending_deliveries(catalog, tmp_path):
+    videos = _register(catalog, tmp_path, 3, size=10_000)
+    catalog.record_delivery(videos[0], str(tmp_path / "video_0_delivery.json"),
+                            {"method": "transfer_sh", "status": "retrying"})
+    per_run = catalog.stats()["bytes"] // 3
+
+    removed = catalog.enforce_retention(keep_count=10, max_bytes=per_run * 2)
+
+    assert removed == [videos[1]]  # oldest run is still being delivered
+    assert catalog.stats()["bytes"] == per_run * 2
+
+
+def test_delivery_urls_are_recorded(catalog, tmp_path):
+    video = _register(catalog, tmp_path, 1)[0]
+    catalog.record_delivery(video, str(tmp_path / "video_0_delivery.json"),
+                            {"method": "transfer_sh", "status": "complete", "video_url": "https://host/v",
+                             "video_sha256": "abc", "instructions_url": "https://host/i"})
+
+    urls = {a["kind"]: a["url"] for a in catalog.artifacts(video)}
+    assert urls["video"] == "https://host/v"
+    assert urls["instructions"] == "https://host/i"
+    assert catalog.latest_run()["delivery_status"] == "complete"
+
+
+def test_adopts_existing_videos_once(catalog, tmp_path):
+    _render(tmp_path, "old_a", 100)
+    _render(tmp_path, "old_b", 100)
+
+    assert catalog.adopt_existing(str(tmp_path)) == 2
+    assert catalog.adopt_existing(str(tmp_path)) == 0
+    assert catalog.stats()["runs"] == 2
+
+
+def test_mp4_duration_reads_header(tmp_path):
+    import imageio_ffmpeg
+
+    path = tmp_path / "clip.mp4"
+    subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", "testsrc=size=64x64:rate=10:duration=3", str(path)], check=True)
+    assert mp4_duration(str(path)) == pytest.approx(3.0, abs=0.1)
+    assert mp4_duration(str(tmp_path / "missing.mp4")) is None
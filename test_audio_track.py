@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Narration track tests: header-based durations and frame-level concatenation
+"""
+
+import subprocess
+
+import imageio_ffmpeg
+import pytest
+
+from audio_track import concat_mp3, iter_frames, mp3_duration
+
+FFMPEG = imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def _tone(path, seconds, rate=24000, channels=1, bitrate="32k"):
+    """An MP3 like gTTS writes (ID3 tag, Info frame, CBR frames)"""
+    subprocess.run([FFMPEG, "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=f=440:d={seconds}:r={rate}",
+                    "-ac", str(channels), "-b:a", bitrate, str(path)], check=True)
+    return str(path)
+
+
+def _decoded_seconds(path, rate=24000):
+    """Playing time as ffmpeg decodes it"""
+    pcm = subprocess.run([FFMPEG, "-v", "error", "-i", str(path), "-f", "s16le", "-ac", "1", "-ar", str(rate), "-"],
+                         check=True, capture_output=True).stdout
+    return len(pcm) / 2 / rate
+
+
+def test_duration_comes_from_frame_headers(tmp_path):
+    path = _tone(tmp_path / "a.mp3", 1.5)
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data.startswith(b"ID3")
+    duration = mp3_duration(path)
+    assert duration == pytest.approx(_decoded_seconds(path), abs=0.1)
+    assert duration == pytest.approx(1.5, abs=0.1)
+    assert all(frame["sample_rate"] == 24000 and frame["channels"] == 1 for _, frame in iter_frames(data))
+
+
+def test_clips_and_silence_are_joined_frame_by_frame(tmp_path):
+    first = _tone(tmp_path / "a.mp3", 1.5)
+    second = _tone(tmp_path / "b.mp3", 2.0)
+    track = str(tmp_path / "track.mp3")
+    durations = concat_mp3([(first, 5), (str(tmp_path / "missing.mp3"), 1.0), (second, 10)], track)
+
+    assert durations[0] == pytest.approx(mp3_duration(first))
+    assert durations[1] == pytest.approx(1.0, abs=0.03)
+    assert durations[2] == pytest.approx(mp3_duration(second))
+    assert mp3_duration(track) == pytest.approx(sum(durations))
+    assert _decoded_seconds(track) == pytest.approx(sum(durations), abs=0.1)
+    with open(track, "rb") as f:
+        assert f.read(2) == b"\xff\xf3"  # copied frames only: no tags, no stale Info frame
+
+
+def test_mixed_formats_are_reencoded_in_one_pass(tmp_path):
+    first = _tone(tmp_path / "a.mp3", 1.0)
+    second = _tone(tmp_path / "b.mp3", 1.0, rate=44100, channels=2, bitrate="128k")
+    track = str(tmp_path / "track.mp3")
+    durations = concat_mp3([(first, 5), (None, 0.5), (second, 5)], track)
+
+    assert durations[1] == 0.5
+    with open(track, "rb") as f:
+        formats = {(frame["sample_rate"], frame["channels"]) for _, frame in iter_frames(f.read())}
+    assert formats == {(24000, 1)}
+    assert _decoded_seconds(track) == pytest.approx(sum(durations), abs=0.15)
+
+
+def test_video_gets_one_narration_track(tmp_path, monkeypatch):
+    from config_free import FreeConfig
+    from video_generator_free import FreeVideoGenerator
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FreeConfig, "BLOB_STORE_ENABLED", False)
+    clips = {"Hook": _tone(tmp_path / "hook.mp3", 1.0), "Point two": _tone(tmp_path / "two.mp3", 1.5)}
+    generator = FreeVideoGenerator()
+    monkeypatch.setattr(generator, "get_audio", lambda text, path: clips.get(text, path))
+    script = {"hook": {"text": "Hook", "duration": 5},
+              "segments": [{"text": "Point one", "duration": 1}, {"text": "Point two", "duration": 10}]}
+
+    output = str(tmp_path / "output" / "video.mp4")
+    assert generator.create_short_form_video(script, output)
+    expected = mp3_duration(clips["Hook"]) + 1.0 + mp3_duration(clips["Point two"])
+    assert _decoded_seconds(output) == pytest.approx(expected, abs=0.2)
+
+
+def test_failed_slide_is_silenced_and_the_rest_stays_in_sync(tmp_path, monkeypatch):
+    import numpy as np
+    from config_free import FreeConfig
+    from video_generator_free import FreeVideoGenerator
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FreeConfig, "BLOB_STORE_ENABLED", False)
+    clips = {"Hook": _tone(tmp_path / "hook.mp3", 1.0), "Broken": _tone(tmp_path / "broken.mp3", 1.0),
+             "Point two": _tone(tmp_path / "two.mp3", 1.0)}
+    generator = FreeVideoGenerator()
+    monkeypatch.setattr(generator, "get_audio", lambda text, path: clips[text])
+    render = generator.create_video_segment
+    monkeypatch.setattr(generator, "create_video_segment",
+                        lambda text, *args, **kw: None if text == "Broken" else render(text, *args, **kw))
+    script = {"hook": {"text": "Hook", "duration": 5},
+              "segments": [{"text": "Broken", "duration": 5}, {"text": "Point two", "duration": 5}]}
+
+    output = str(tmp_path / "output" / "video.mp4")
+    assert generator.create_short_form_video(script, output)
+    pcm = subprocess.run([FFMPEG, "-v", "error", "-i", output, "-f", "s16le", "-ac", "1", "-ar", "24000", "-"],
+                         check=True, capture_output=True).stdout
+    audio = np.abs(np.frombuffer(pcm, dtype="<i2") / 32767)
+    hook, middle = mp3_duration(clips["Hook"]), mp3_duration(clips["Broken"])
+    level = [audio[int(start * 24000):int(end * 24000)].max()
+             for start, end in ((0.2, hook - 0.2), (hook + 0.2, hook + middle - 0.2), (hook + middle + 0.2, 2.8))]
+    assert level[0] > 0.05 and level[1] < 0.01 and level[2] > 0.05  # narration kept around the silenced slide
+    assert len(audio) / 24000 == pytest.approx(3 * hook, abs=0.2)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Blob store tests: dedup, reference counting, GC and generator reuse
+"""
+
+import os
+from datetime import timedelta
+
+import pytest
+
+from blob_store import BlobStore, content_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs"))
+
+
+def _file(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_identical_content_is_stored_once(store, tmp_path):
+    first = store.put_file(_file(tmp_path, "a.mp3", b"narration" * 100), content_key("tts", "hi"), "run1")
+    second = store.put_file(_file(tmp_path, "b.mp3", b"narration" * 100), content_key("tts", "hi"), "run2")
+
+    assert first == second
+    assert not (tmp_path / "a.mp3").exists()  # moved, not copied
+    stats = store.stats()
+    assert stats["blobs"] == 1
+    assert stats["write_dedup_ratio"] == pytest.approx(2.0)
+    assert stats["storage_dedup_ratio"] == pytest.approx(2.0)
+
+
+def test_lookup_reuses_keyed_content(store, tmp_path):
+    key = content_key("slide", "Thanks for watching!")
+    assert store.lookup(key, "run1") is None
+    path = store.put_file(_file(tmp_path, "s.png", b"png"), key, "run1")
+
+    assert store.lookup(key, "run2") == path
+    assert store.stats()["hits"] == 1
+
+
+def test_kept_source_is_hard_linked_to_blob(store, tmp_path):
+    video = _file(tmp_path, "video_1.mp4", b"mp4" * 1000)
+    blob = store.put_file(video, owner=video, keep_source=True)
+    assert os.path.samefile(blob, video)
+
+    # Identical render later: the new file becomes a link to the existing blob
+    again = _file(tmp_path, "video_2.mp4", b"mp4" * 1000)
+    assert store.put_file(again, owner=again, keep_source=True) == blob
+    assert os.path.samefile(blob, again)
+    assert store.stats()["written_bytes"] == 3000
+
+
+def test_gc_keeps_referenced_and_recently_used_keyed_blobs(store, tmp_path):
+    cta = store.put_file(_file(tmp_path, "cta.mp3", b"cta"), content_key("tts", "cta"), "run1")
+    video = _file(tmp_path, "video.mp4", b"video")
+    video_blob = store.put_file(video, owner="run1", keep_source=True)
+
+    assert store.gc()["removed"] == 0  # still referenced
+    store.release("run1")
+    assert store.gc()["removed"] == 1  # unkeyed video goes right away
+    assert os.path.exists(cta) and not os.path.exists(video_blob)
+
+    assert store.gc(grace=timedelta(0))["removed"] == 1
+    assert not os.path.exists(cta)
+    assert store.lookup(content_key("tts", "cta")) is None
+
+
+def test_generator_reuses_narration_and_slides(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from video_generator_free import FreeVideoGenerator
+
+    generator = FreeVideoGenerator(BlobStore(str(tmp_path / "blobs")))
+    calls = []
+
+    def fake_tts(text, output_path, max_retries=3):
+        calls.append(text)
+        with open(output_path, "wb") as f:
+            f.write(text.encode() * 50)
+        return True
+
+    monkeypatch.setattr(generator, "generate_audio", fake_tts)
+    for run in ("run1", "run2"):
+        generator._owner = run
+        audio = generator.get_audio("Subscribe for more!", str(tmp_path / "temp" / "h_0.mp3"))
+        slide = generator.get_slide("Subscribe for more!")
+
+    assert calls == ["Subscribe for more!"]
+    assert os.path.dirname(os.path.dirname(audio)) == str(tmp_path / "blobs")
+    assert slide.endswith(".png") and os.listdir(tmp_path / "temp") == []
+    assert generator.blob_store.stats()["write_dedup_ratio"] == pytest.approx(2.0)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Delivery tests against local HTTP stand-ins for the free file hosts
+"""
+
+import json
+import time
+import base64
+import socket
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from config_free import FreeConfig
+from delivery import (CHUNK_SIZE, DeliveryQueue, FileIoProvider, HedgedUploader, ResumableUploadProvider,
+                      TransferShProvider, ZeroXZeroProvider, _ChunkBody, _UploadBody, manifest_path_for)
+
+
+class StandInHost:
+    """Local file host: `delay` seconds before answering, `status` to fail, `lost` bytes dropped in storage"""
+
+    def __init__(self, style: str, delay: float = 0.0, status: int = 200, lost: int = 0):
+        self.style = style
+        self.delay = delay
+        self.status = status
+        self.lost = lost
+        self.requests = []
+        self.stored = {}  # link path -> stored size, answered on HEAD
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def _handle(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                host.requests.append({"method": self.command, "path": self.path, "body": body,
+                                      "headers": dict(self.headers), "connection": self.client_address})
+                time.sleep(host.delay)
+                if host.status != 200:
+                    payload = b"error"
+                elif host.style == "fileio":
+                    payload = json.dumps({"success": True, "link": f"{host.url}/d/abc"}).encode()
+                else:
+                    link = f"/d{self.path if self.command == 'PUT' else '/xyz'}"
+                    if self.command == "POST":  # keep just the multipart `file` field
+                        body = body.split(b'name="file"', 1)[1].split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+                    host.stored[link] = len(body) - host.lost
+                    payload = f"{host.url}{link}\n".encode()
+                self.send_response(host.status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_HEAD(self):
+                size = host.stored.get(self.path)
+                self.send_response(404 if size is None else 200)
+                self.send_header("Content-Length", str(size or 0))
+                self.end_headers()
+
+            do_POST = _handle
+            do_PUT = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"\x00\x01video" * 5000)
+    return path
+
+
+@pytest.fixture
+def hosts():
+    created = []
+
+    def make(*args, **kwargs):
+        host = StandInHost(*args, **kwargs)
+        created.append(host)
+        return host
+
+    yield make
+    for host in created:
+        host.close()
+
+
+def test_primary_success_does_not_touch_backup(video_file, hosts, monkeypatch):
+    monkeypatch.setattr(FreeConfig, "UPLOAD_EXPIRY_DAYS", 3)
+    primary, backup = hosts("fileio"), hosts("text")
+    uploader = HedgedUploader([FileIoProvider(primary.url), ZeroXZeroProvider(backup.url)], latency_budget=1)
+
+    result = uploader.upload(str(video_file))
+
+    assert result["provider"] == "file.io"
+    assert result["url"] == f"{primary.url}/d/abc"
+    assert backup.requests == []
+    # Multipart body carries the file and the expiry field
+    body = primary.requests[0]["body"]
+    assert video_file.read_bytes() in body
+    assert b'name="expires"\r\n\r\n3d\r\n' in body
+
+
+def test_slow_primary_is_hedged(video_file, hosts):
+    primary, backup = hosts("fileio", delay=3), hosts("text")
+    uploader = HedgedUploader([FileIoProvider(primary.url), ZeroXZeroProvider(backup.url)], latency_budget=0.2)
+
+    start = time.perf_counter()
+    result = uploader.upload(str(video_file))
+    elapsed = time.perf_counter() - start
+
+    assert result["provider"] == "0x0.st"
+    assert elapsed < 2
+    assert len(backup.requests) == 1
+
+
+def test_failed_primary_falls_back_without_waiting(video_file, hosts):
+    primary, backup = hosts("fileio", status=500), hosts("put")
+    uploader = HedgedUploader([FileIoProvider(primary.url), TransferShProvider(backup.url)], latency_budget=10)
+
+    start = time.perf_counter()
+    result = uploader.upload(str(video_file), "renamed.mp4")
+
+    assert time.perf_counter() - start < 2
+    assert result["url"] == f"{backup.url}/d/renamed.mp4"
+    assert backup.requests[0]["body"] == video_file.read_bytes()
+    assert backup.requests[0]["headers"]["Max-Days"] == str(FreeConfig.UPLOAD_EXPIRY_DAYS)
+    assert uploader.get_stats()["file.io"]["failures"] == 1
+    assert result["verified"] == "size"  # HEAD on the link reported the full size
+
+
+def test_truncated_copy_is_rejected(video_file, hosts):
+    primary, backup = hosts("put", lost=100), hosts("fileio")
+    uploader = HedgedUploader([TransferShProvider(primary.url), FileIoProvider(backup.url)], latency_budget=10)
+
+    result = uploader.upload(str(video_file))
+
+    assert result["provider"] == "file.io"
+    # file.io links are single-download, so nothing confirms the stored copy
+    assert result["verified"] == "none"
+    assert result["sha256"] == hashlib.sha256(video_file.read_bytes()).hexdigest()
+
+
+def test_all_providers_failing_returns_none(video_file, hosts):
+    first, second = hosts("fileio", status=503), hosts("text", status=500)
+    uploader = HedgedUploader([FileIoProvider(first.url), ZeroXZeroProvider(second.url)], latency_budget=1)
+
+    assert uploader.upload(str(video_file)) is None
+
+
+def test_sessions_are_pooled_and_throughput_recorded(video_file, hosts):
+    host = hosts("text")
+    uploader = HedgedUploader([ZeroXZeroProvider(host.url)], latency_budget=1)
+
+    for _ in range(3):
+        assert uploader.upload(str(video_file))
+
+    # Keep-alive: all three uploads reused one client connection
+    assert len({r["connection"] for r in host.requests}) == 1
+    stats = uploader.get_stats()["0x0.st"]
+    assert stats["uploads"] == 3
+    assert stats["throughput_bps"] > 0
+
+
+class StandInTus:
+    """Local tus 1.0 server that can drop connections mid-chunk or corrupt chunks"""
+
+    def __init__(self, drop_patches=(), corrupt_patches=(), fail_patches=()):
+        self.uploads = {}
+        self.patches = []
+        self.creates = 0
+        self.drop_patches = set(drop_patches)
+        self.corrupt_patches = set(corrupt_patches)
+        self.fail_patches = set(fail_patches)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status, headers=None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                server.creates += 1
+                upload_id = str(len(server.uploads) + 1)
+                server.uploads[upload_id] = {"length": int(self.headers["Upload-Length"]), "data": bytearray(),
+                                             "metadata": self.headers.get("Upload-Metadata", "")}
+                self._reply(201, {"Location": f"/files/{upload_id}"})
+
+            def do_HEAD(self):
+                upload = server.uploads.get(self.path.rsplit("/", 1)[-1])
+                if upload is None:
+                    return self._reply(404)
+                self._reply(200, {"Upload-Offset": str(len(upload["data"])),
+                                  "Upload-Length": str(upload["length"])})
+
+            def do_PATCH(self):
+                upload = server.uploads[self.path.rsplit("/", 1)[-1]]
+                index = len(server.patches)
+                length = int(self.headers["Content-Length"])
+                server.patches.append(length)
+                if int(self.headers["Upload-Offset"]) != len(upload["data"]):
+                    self.rfile.read(length)
+                    return self._reply(409)
+                if index in server.fail_patches:
+                    self.rfile.read(length)
+                    return self._reply(500)
+                if index in server.drop_patches:
+                    # Keep what arrived before the drop, like real tus servers do
+                    upload["data"] += self.rfile.read(length // 2)
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                chunk = bytearray(self.rfile.read(length))
+                if index in server.corrupt_patches:
+                    chunk[0] ^= 0xFF
+                algorithm, checksum = self.headers["Upload-Checksum"].split(" ")
+                if algorithm != "sha256" or base64.b64decode(checksum) != hashlib.sha256(chunk).digest():
+                    return self._reply(460)
+                upload["data"] += chunk
+                self._reply(204, {"Upload-Offset": str(len(upload["data"]))})
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/files"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def large_file(tmp_path):
+    path = tmp_path / "long.mp4"
+    path.write_bytes(bytes(range(256)) * 1024)  # 256 KiB -> 8 chunks of 32 KiB
+    return path
+
+
+def _tus_uploader(server, state_dir, retries=5):
+    provider = ResumableUploadProvider(server.url, chunk_size=32 * 1024, state_dir=str(state_dir),
+                                       max_chunk_retries=retries)
+    provider.retry_delay = 0.01
+    return HedgedUploader([provider], latency_budget=5)
+
+
+def test_resumable_upload_survives_connection_drops(large_file, tmp_path):
+    server = StandInTus(drop_patches={1, 4}, corrupt_patches={6})
+    try:
+        result = _tus_uploader(server, tmp_path / "state").upload(str(large_file))
+    finally:
+        server.close()
+
+    data = large_file.read_bytes()
+    assert bytes(server.uploads["1"]["data"]) == data
+    assert result["sha256"] == hashlib.sha256(data).hexdigest()
+    assert result["verified"] == "checksum"
+    assert server.creates == 1
+    assert list((tmp_path / "state").glob("*.json")) == []
+
+
+def test_resumable_upload_continues_after_restart(large_file, tmp_path):
+    state_dir = tmp_path / "state"
+    server = StandInTus(fail_patches={3, 4})
+    try:
+        # First process gives up on chunk 3 - its state stays on disk
+        assert _tus_uploader(server, state_dir, retries=1).upload(str(large_file)) is None
+        assert len(list(state_dir.glob("*.json"))) == 1
+        sent_before = len(server.patches)
+
+        # "Restarted" process picks up the persisted upload instead of starting over
+        result = _tus_uploader(server, state_dir).upload(str(large_file))
+    finally:
+        server.close()
+
+    assert result is not None
+    assert server.creates == 1
+    assert bytes(server.uploads["1"]["data"]) == large_file.read_bytes()
+    assert sum(server.patches[sent_before:]) == large_file.stat().st_size - 3 * 32 * 1024
+
+
+def test_tus_progress_moves_within_a_chunk(tmp_path):
+    path = tmp_path / "chunk.bin"
+    path.write_bytes(b"\x01" * (3 * CHUNK_SIZE + 10))
+    body = _UploadBody(str(path), threading.Event())
+    chunk = _ChunkBody(path.read_bytes(), 1000, body)
+
+    seen = []
+    for piece in chunk:
+        seen.append((len(piece), body.bytes_sent))
+
+    # The stall check sees the chunk advance, not just the chunk boundary
+    assert [size for size, _ in seen] == [CHUNK_SIZE] * 3 + [10]
+    assert [sent for _, sent in seen] == [1000, 1000 + CHUNK_SIZE, 1000 + 2 * CHUNK_SIZE, 1000 + 3 * CHUNK_SIZE]
+    assert body.bytes_sent == 1000 + len(chunk)
+
+
+def _run_artifacts(tmp_path):
+    video = tmp_path / "tech_video_1.mp4"
+    video.write_bytes(b"\x00video" * 2000)
+    instructions = tmp_path / "tech_video_1_upload_instructions.txt"
+    instructions.write_text("upload me")
+    return str(video), str(instructions)
+
+
+def test_delivery_queue_uploads_artifacts_concurrently(tmp_path, hosts):
+    host = hosts("put", delay=0.5)
+    video, instructions = _run_artifacts(tmp_path)
+    queue = DeliveryQueue(str(tmp_path), HedgedUploader([TransferShProvider(host.url)], latency_budget=5))
+    queue.start()
+    try:
+        start = time.perf_counter()
+        manifest_path = queue.submit(video, instructions, "transfer_sh")
+        assert time.perf_counter() - start < 0.2  # submit never blocks on the network
+        assert queue.wait(timeout=5)
+        elapsed = time.perf_counter() - start
+    finally:
+        queue.stop()
+
+    manifest = json.loads(open(manifest_path).read())
+    assert manifest_path == manifest_path_for(video)
+    assert manifest["status"] == "complete"
+    assert manifest["video_url"] == f"{host.url}/d/tech_video_1.mp4"
+    assert manifest["instructions_url"].endswith("tech_video_1_upload_instructions.txt")
+    assert manifest["video_sha256"] == hashlib.sha256(open(video, "rb").read()).hexdigest()
+    assert manifest["video_verified"] == "size"
+    assert elapsed < 0.9  # both 0.5s uploads ran at once
+
+
+def test_delivery_queue_retries_only_failed_artifacts(tmp_path, hosts):
+    host = hosts("put", status=500)
+    video, instructions = _run_artifacts(tmp_path)
+    queue = DeliveryQueue(str(tmp_path), HedgedUploader([TransferShProvider(host.url)], latency_budget=5),
+                          max_attempts=3, retry_delay=0.3)
+    queue.start()
+    try:
+        manifest_path = queue.submit(video, instructions, "transfer_sh")
+        assert queue.wait(timeout=5, include_retries=False)
+        manifest = json.loads(open(manifest_path).read())
+        assert manifest["status"] == "retrying"
+        assert manifest["attempts"] == 1
+
+        host.status = 200
+        assert queue.wait(timeout=5)
+    finally:
+        queue.stop()
+
+    manifest = json.loads(open(manifest_path).read())
+    assert manifest["status"] == "complete"
+    assert manifest["attempts"] == 2
+    assert "next_attempt_at" not in manifest
+
+
+def test_delivery_queue_resumes_pending_manifests(tmp_path, hosts):
+    host = hosts("put")
+    video, instructions = _run_artifacts(tmp_path)
+    manifest_path = manifest_path_for(video)
+    with open(manifest_path, "w") as f:
+        json.dump({"method": "transfer_sh", "status": "pending", "attempts": 1,
+                   "video_file": "tech_video_1.mp4", "video_url": "https://already.example/v",
+                   "instructions_file": "tech_video_1_upload_instructions.txt"}, f)
+
+    queue = DeliveryQueue(str(tmp_path), HedgedUploader([TransferShProvider(host.url)], latency_budget=5))
+    queue.start()
+    try:
+        assert queue.wait(timeout=5)
+    finally:
+        queue.stop()
+
+    manifest = json.loads(open(manifest_path).read())
+    assert manifest["status"] == "complete"
+    assert manifest["video_url"] == "https://already.example/v"
+    # Only the missing artifact was sent
+    assert [r["path"] for r in host.requests] == ["/tech_video_1_upload_instructions.txt"]
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Email delivery tests against a local SMTP stand-in
+"""
+
+import email
+import socket
+import tracemalloc
+from email.header import decode_header, make_header
+
+import pytest
+
+import email_delivery
+from benchmark_free import SmtpStandIn
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    stand_in = SmtpStandIn()
+    monkeypatch.setenv("GMAIL_ADDRESS", "agent@example.com")
+    monkeypatch.setenv("GMAIL_APP_PASSWORD", "app-password")
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(stand_in.port))
+    monkeypatch.setenv("SMTP_STARTTLS", "false")
+    monkeypatch.delenv("RECIPIENT_EMAIL", raising=False)
+    yield stand_in
+    stand_in.close()
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / "tech_video_1.mp4"
+    path.write_bytes(bytes(range(256)) * 4000 + b".\r\n.leading dot")
+    return path
+
+
+def test_streamed_message_is_valid_mime_for_all_recipients(smtp, video_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("RECIPIENT_EMAIL", "one@example.com, two@example.com")
+    instructions = tmp_path / "tech_video_1_upload_instructions.txt"
+    instructions.write_text("Upload at 9:00\n.\nDone")
+
+    assert email_delivery.send_via_gmail_smtp(str(video_file), str(instructions))
+
+    assert len(smtp.messages) == 1  # one DATA transfer for both recipients
+    received = smtp.messages[0]
+    assert received["to"] == ["one@example.com", "two@example.com"]
+    msg = email.message_from_bytes(received["data"])
+    assert str(make_header(decode_header(msg["Subject"]))) == "🎥 YouTube Video Ready: tech_video_1.mp4"
+    body, video, instr = msg.get_payload()
+    assert "Your YouTube video is ready!" in body.get_payload(decode=True).decode("utf-8")
+    assert video.get_filename() == "tech_video_1.mp4"
+    assert video.get_payload(decode=True) == video_file.read_bytes()
+    assert instr.get_payload(decode=True) == instructions.read_bytes()
+
+
+def test_session_is_reused_and_reopened_when_dropped(smtp, video_file):
+    assert email_delivery.send_via_gmail_smtp(str(video_file))
+    assert email_delivery.send_via_gmail_smtp(str(video_file))
+    assert smtp.connections == 1
+
+    session = email_delivery.get_smtp_session("127.0.0.1", smtp.port, "agent@example.com", "app-password", False)
+    session.server.sock.shutdown(socket.SHUT_RDWR)  # idle connection dropped
+    assert email_delivery.send_via_gmail_smtp(str(video_file))
+    assert smtp.connections == 2
+    assert len(smtp.messages) == 3
+
+
+def test_attachment_is_never_held_in_memory(smtp, tmp_path, monkeypatch):
+    sink = SmtpStandIn(keep_data=False)  # the stand-in's own buffers would count too
+    monkeypatch.setenv("SMTP_PORT", str(sink.port))
+    big = tmp_path / "big.mp4"
+    big.write_bytes(b"\x07" * (8 * 1024 * 1024))
+
+    tracemalloc.start()
+    try:
+        assert email_delivery.send_via_gmail_smtp(str(big))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        sink.close()
+
+    assert sink.messages[0]["size"] > 8 * 1024 * 1024
+    assert peak < 1024 * 1024
+
+
+@pytest.fixture
+def rendered_video(tmp_path):
+    """4s test pattern with audio at a deliberately high bitrate (~2MB)"""
+    import subprocess
+    import imageio_ffmpeg
+
+    path = tmp_path / "tech_video_2.mp4"
+    subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "testsrc=size=640x360:rate=24:duration=4",
+                    "-f", "lavfi", "-i", "sine=frequency=440:duration=4",
+                    "-vf", "noise=alls=40:allf=t", "-c:v", "libx264", "-b:v", "4M", "-c:a", "aac", "-shortest",
+                    str(path)], check=True)
+    return path
+
+
+def _video_part(received):
+    parts = email.message_from_bytes(received["data"]).get_payload()
+    return next((p for p in parts if (p.get_filename() or "").endswith(".mp4")), None), parts[0]
+
+
+def test_oversized_video_is_reencoded_to_fit(smtp, rendered_video, monkeypatch):
+    import imageio_ffmpeg
+
+    def decode_stream(path):
+        raise AssertionError("duration should come from the mp4 header")
+
+    monkeypatch.setattr(imageio_ffmpeg, "count_frames_and_secs", decode_stream)
+    monkeypatch.setattr(email_delivery, "EMAIL_SIZE_LIMIT_MB", 1.0)
+    budget = email_delivery.attachment_budget()
+    assert rendered_video.stat().st_size > budget
+
+    assert email_delivery.send_video_email(str(rendered_video))
+
+    video, _ = _video_part(smtp.messages[0])
+    assert video.get_filename() == "tech_video_2_email.mp4"
+    assert len(video.get_payload(decode=True)) <= budget
+    assert len(smtp.messages[0]["data"]) <= 1024 * 1024
+    assert not (rendered_video.parent / "tech_video_2_email.mp4").exists()
+
+
+def test_video_too_long_to_reencode_is_sent_as_link(smtp, rendered_video, monkeypatch):
+    monkeypatch.setattr(email_delivery, "EMAIL_SIZE_LIMIT_MB", 0.1)
+    manifest = rendered_video.parent / "tech_video_2_delivery.json"
+    manifest.write_text('{"video_url": "https://files.example/tech_video_2.mp4"}')
+
+    assert email_delivery.send_video_email(str(rendered_video))
+
+    video, body = _video_part(smtp.messages[0])
+    assert video is None
+    assert "https://files.example/tech_video_2.mp4" in body.get_payload(decode=True).decode("utf-8")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Feed health tests: breaker, adaptive stride, persisted stats
+"""
+
+from feed_health import FeedHealth
+
+FEED = "https://example.com/rss"
+OTHER = "https://example.org/rss"
+
+
+def make_health(tmp_path, **kw):
+    params = dict(breaker_threshold=3, breaker_cooldown=600, slow_seconds=5, low_yield=0.5)
+    params.update(kw)
+    return FeedHealth(str(tmp_path / "health.db"), **params)
+
+
+def test_breaker_opens_backs_off_and_closes(tmp_path):
+    health = make_health(tmp_path)
+    now = 1_000_000.0
+    for i in range(3):
+        assert health.select([FEED], now=now) == [FEED]
+        health.record_failure(FEED, "HTTP 503", now=now)
+    assert health.select([FEED, OTHER], now=now + 599) == [OTHER]
+
+    # Half-open after the cooldown; another failure doubles the window
+    assert health.select([FEED], now=now + 601) == [FEED]
+    health.record_failure(FEED, "HTTP 503", now=now + 601)
+    assert health.select([FEED], now=now + 601 + 1199) == []
+    assert health.select([FEED], now=now + 601 + 1201) == [FEED]
+
+    health.record_success(FEED, 0.2, 3, now=now + 2000)
+    report = health.report(now=now + 2000)[0]
+    assert report["state"] == "closed" and report["failures"] == 4 and report["polls"] == 5
+    assert health.select([FEED], now=now + 2001) == [FEED]
+
+
+def test_slow_and_low_yield_feeds_are_polled_less_often(tmp_path):
+    health = make_health(tmp_path)
+    for _ in range(3):
+        health.record_success(FEED, 0.1, 0)  # nothing matching, three times
+    health.record_success(OTHER, 9.0, 4)  # slow but useful
+
+    polled = {FEED: 0, OTHER: 0}
+    for _ in range(8):
+        for url in health.select([FEED, OTHER]):
+            polled[url] += 1
+            health.record_success(url, 9.0 if url == OTHER else 0.1, 0 if url == FEED else 4)
+    assert polled == {FEED: 2, OTHER: 4}
+
+
+def test_not_modified_keeps_yield_and_stats_persist(tmp_path):
+    health = make_health(tmp_path)
+    health.record_success(FEED, 1.0, 4)
+    health.record_success(FEED, 3.0, None)  # 304: latency counts, yield does not
+    health.record_failure(FEED, "timed out", 2.0)
+
+    report = make_health(tmp_path).report()[0]
+    assert report["avg_yield"] == 4
+    assert report["latency_seconds"] == round(0.3 * 2.0 + 0.7 * (0.3 * 3.0 + 0.7 * 1.0), 3)
+    assert report["failure_rate"] == 0.3
+    assert report["last_error"] == "timed out" and report["last_success"] is not None
+    assert report["state"] == "closed"
+
+
+def test_read_only_select_leaves_the_stride_alone(tmp_path):
+    health = make_health(tmp_path)
+    for _ in range(3):
+        health.record_success(FEED, 0.1, 0)  # low yield: polled every 4th cycle
+
+    for _ in range(5):
+        assert health.select([FEED], advance=False) == []  # on-demand research doesn't count down
+    assert [health.select([FEED]) for _ in range(4)] == [[], [], [], [FEED]]
+
+
+def test_on_demand_reads_leave_yield_and_stride_to_the_poller(tmp_path):
+    health = make_health(tmp_path)
+    for _ in range(3):
+        health.record_success(FEED, 0.1, 0)  # poller: nothing new, polled every 4th cycle
+    for _ in range(3):
+        health.record_success(FEED, 0.3, 5, scheduled=False)  # research read five matches
+
+    report = health.report()[0]
+    assert report["avg_yield"] == 0 and report["poll_every"] == 4
+    assert report["polls"] == 6 and report["latency_seconds"] > 0.1
+    assert [health.select([FEED]) for _ in range(4)] == [[], [], [], [FEED]]
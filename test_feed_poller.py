@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Feed poller tests against a local RSS server
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from feed_health import FeedHealth
+from feed_poller import FeedPoller, TopicStore
+
+
+class StandInFeed:
+    """Serves `items` as RSS 2.0 with an ETag; answers 304 when it matches"""
+
+    def __init__(self):
+        self.items = []
+        self.requests = []
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = f'"{len(feed.items)}"'
+                feed.requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                items = "".join(f"<item><title>{title}</title><guid>{guid}</guid></item>"
+                                for guid, title in reversed(feed.items))
+                body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{items}</channel></rss>'
+                payload = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/rss"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def feeds():
+    created = [StandInFeed(), StandInFeed()]
+    yield created
+    for feed in created:
+        feed.close()
+
+
+def test_incremental_polls_ingest_only_new_entries(feeds, tmp_path):
+    first, second = feeds
+    first.items = [("a1", "Python 4 software release"), ("a2", "Cooking with garlic")]
+    second.items = [("b1", "Python 4 Software Release")]
+    poller = FeedPoller([first.url, second.url], interval=60, state_path=str(tmp_path / "store.json"),
+                        health=FeedHealth(str(tmp_path / "health.db")))
+
+    assert poller.poll_once() == 2  # the non-tech headline is ignored
+    assert poller.ready_topics() == ["Python 4 software release"]  # mentioned by both feeds
+
+    assert poller.poll_once() == 0
+    assert first.requests[-1] == '"2"'  # conditional GET, answered 304
+
+    first.items.append(("a3", "New AI startup raises funding"))
+    assert poller.poll_once() == 1
+    assert set(poller.ready_topics()) == {"Python 4 software release", "New AI startup raises funding"}
+
+
+def test_store_is_persisted_on_stop(feeds, tmp_path):
+    feeds[0].items = [("a1", "Cloud security outage explained")]
+    state = str(tmp_path / "store.json")
+    health = FeedHealth(str(tmp_path / "health.db"))
+    poller = FeedPoller([feeds[0].url], interval=60, state_path=state, health=health)
+    poller.start()
+    deadline = time.time() + 10
+    while poller.last_poll is None and time.time() < deadline:  # let the first poll finish
+        time.sleep(0.01)
+    poller.stop()
+
+    restored = FeedPoller([feeds[0].url], interval=60, state_path=state, health=health)
+    assert restored.ready_topics() == ["Cloud security outage explained"]
+    assert restored.poll_once() == 0  # entry IDs survived the restart
+
+
+def test_scores_favor_cross_feed_and_recent_topics():
+    store = TopicStore(max_age_hours=48, half_life_hours=12)
+    now = 1_000_000.0
+    store.add("Old single-feed story", "f1", now=now - 24 * 3600)
+    store.add("Fresh story", "f1", rank=3, now=now)
+    store.add("Big story", "f1", now=now - 3600)
+    store.add("Big story", "f2", now=now - 3600)
+    assert store.ranked(now=now) == ["Big story", "Fresh story", "Old single-feed story"]
+
+    store.prune(now=now + 47 * 3600)
+    assert len(store) == 2
+    store.prune(now=now + 49 * 3600)
+    assert len(store) == 0
+
+
+def test_jittered_interval_stays_within_bounds(tmp_path):
+    poller = FeedPoller([], interval=100, jitter=0.2, state_path=str(tmp_path / "s.json"),
+                        health=FeedHealth(str(tmp_path / "health.db")))
+    delays = [poller.next_delay() for _ in range(200)]
+    assert min(delays) >= 80 and max(delays) <= 120 and len(set(delays)) > 1
+
+
+def test_every_poll_is_persisted(feeds, tmp_path):
+    feeds[0].items = [("a1", "Python 4 software release")]
+    state = str(tmp_path / "store.json")
+    health = FeedHealth(str(tmp_path / "health.db"))
+    FeedPoller([feeds[0].url], interval=60, state_path=state, health=health).poll_once()  # never stopped
+
+    restored = FeedPoller([feeds[0].url], interval=60, state_path=state, health=health)
+    assert restored.ready_topics() == ["Python 4 software release"]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Streaming feed reader tests against a local feed server
+"""
+
+import pytest
+
+from benchmark_free import FeedStandIn, synthetic_feed
+from feed_reader import read_feed
+
+
+@pytest.fixture
+def server():
+    stand_in = FeedStandIn({
+        "/rss": synthetic_feed(300),
+        "/atom": synthetic_feed(300, atom=True),
+        "/broken": synthetic_feed(20, malformed=True),
+        "/small": synthetic_feed(3),
+    })
+    yield stand_in
+    stand_in.close()
+
+
+def test_stops_reading_after_the_first_entries(server):
+    feed = read_feed(server.url + "/rss", limit=5)
+    assert feed["parser"] == "stream" and feed["stopped_early"]
+    assert [e["title"] for e in feed["entries"]] == [f"AI startup story {i}" for i in range(5)]
+    assert feed["entries"][0] == {"title": "AI startup story 0", "id": "story-0", "link": "https://example.com/0"}
+    assert feed["bytes_read"] < len(server.documents["/rss"]) / 10
+    assert feed["etag"]
+
+
+def test_atom_entries_use_id_and_alternate_link(server):
+    feed = read_feed(server.url + "/atom", limit=2)
+    assert feed["entries"][1] == {"title": "AI startup story 1", "id": "urn:story:1", "link": "https://example.com/1"}
+
+
+def test_malformed_feed_falls_back_to_feedparser(server):
+    feed = read_feed(server.url + "/broken", limit=5)
+    assert feed["parser"] == "feedparser"
+    assert len(feed["entries"]) == 5 and feed["entries"][0]["title"].startswith("AI startup story 0")
+
+
+def test_short_feed_and_errors(server):
+    feed = read_feed(server.url + "/small", limit=5)
+    assert len(feed["entries"]) == 3 and not feed["stopped_early"]
+    with pytest.raises(ValueError, match="HTTP 404"):
+        read_feed(server.url + "/missing", limit=5)
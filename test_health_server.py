@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Health server tests on an ephemeral port
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from health_server import HealthServer, metrics
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.headers["Content-Type"], response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["Content-Type"], e.read().decode()
+
+
+@pytest.fixture
+def server():
+    state = {"ready": False}
+    health = HealthServer(port=0, host="127.0.0.1", readiness_probe=lambda: dict(state))
+    assert health.start()
+    yield f"http://127.0.0.1:{health.port}", state
+    health.stop()
+
+
+def test_health_is_always_ok(server):
+    url, _ = server
+    status, content_type, body = _get(url + "/health")
+    assert status == 200 and content_type == "application/json"
+    assert json.loads(body)["status"] == "ok"
+
+
+def test_ready_follows_the_probe(server):
+    url, state = server
+    status, _, body = _get(url + "/ready")
+    assert status == 503 and json.loads(body) == {"ready": False}
+
+    state["ready"] = True
+    status, _, body = _get(url + "/ready")
+    assert status == 200 and json.loads(body)["ready"] is True
+
+
+def test_metrics_in_prometheus_text_format(server):
+    url, _ = server
+    metrics.inc("test_health_requests_total", 2)
+    metrics.inc("test_health_failure_total", provider="s3")
+    metrics.inc("test_health_failure_total", provider="transfer_sh")
+    metrics.observe("test_health_stage", 0.3)
+
+    status, content_type, body = _get(url + "/metrics")
+    assert status == 200 and content_type.startswith("text/plain")
+    lines = body.splitlines()
+    assert "# TYPE agent_uptime_seconds gauge" in lines
+    assert "agent_test_health_requests_total 2" in lines
+    assert lines.count("# TYPE agent_test_health_failure_total counter") == 1
+    assert 'agent_test_health_failure_total{provider="s3"} 1' in lines
+    assert 'agent_test_health_failure_total{provider="transfer_sh"} 1' in lines
+    assert 'agent_stage_latency_seconds_bucket{stage="test_health_stage",le="0.5"} 1' in lines
+    assert 'agent_stage_latency_seconds_count{stage="test_health_stage"} 1' in lines
+
+    _, content_type, body = _get(url + "/metrics?format=json")
+    assert content_type == "application/json"
+    assert json.loads(body)["counters"]["test_health_requests_total"] == 2
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Job store tests: catch-up policies, restart recovery and non-overlapping runs
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import job_store
+from job_store import JobStore, JobWorkerPool
+from sqlite_store import connect
+
+NOW = datetime(2026, 5, 10, 12, 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"), max_attempts=3)
+
+
+def test_missed_slots_since_the_last_recorded_one(store):
+    assert store.missed_slots("daily_video", "09:00", now=NOW) == []  # nothing recorded yet
+    store.enqueue("daily_video", datetime(2026, 5, 7, 9, 0))
+    assert store.missed_slots("daily_video", "09:00", now=NOW) == [
+        datetime(2026, 5, 8, 9, 0), datetime(2026, 5, 9, 9, 0), datetime(2026, 5, 10, 9, 0)]
+
+
+@pytest.mark.parametrize("policy, queued, skipped", [
+    ("once", [datetime(2026, 5, 10, 9, 0)], 2),
+    ("all", [datetime(2026, 5, 8, 9, 0), datetime(2026, 5, 9, 9, 0), datetime(2026, 5, 10, 9, 0)], 0),
+    ("skip", [], 3),
+])
+def test_catchup_policies(store, policy, queued, skipped):
+    store.record_skipped("daily_video", datetime(2026, 5, 7, 9, 0), "seed")
+    missed = store.missed_slots("daily_video", "09:00", now=NOW)
+
+    assert store.apply_catchup("daily_video", missed, policy) == len(queued)
+    pending = [datetime.fromisoformat(job["slot_at"]) for job in store.recent() if job["status"] == "pending"]
+    assert sorted(pending) == queued
+    assert store.counts().get("skipped", 0) == skipped + 1
+    assert store.missed_slots("daily_video", "09:00", now=NOW) == []
+
+
+def test_recover_interrupted_requeues_running_jobs(store):
+    store.enqueue("daily_video", datetime(2026, 5, 9, 9, 0))
+    store.enqueue("daily_video", datetime(2026, 5, 10, 9, 0))
+    first = store.claim("w1")
+    assert store.counts() == {"running": 1, "pending": 1}
+
+    assert store.recover_interrupted() == 1
+    assert store.counts() == {"pending": 2}
+    again = store.claim("w2")
+    assert again["id"] == first["id"] and again["attempts"] == 2
+
+
+def test_recover_interrupted_fails_jobs_out_of_attempts(store):
+    store.enqueue("daily_video", datetime(2026, 5, 10, 9, 0))
+    for _ in range(3):
+        store.claim("w1")
+        store.recover_interrupted()
+    assert store.counts() == {"failed": 1}
+
+
+def test_same_job_is_never_claimed_twice_at_once(store):
+    store.enqueue("daily_video", datetime(2026, 5, 9, 9, 0))
+    store.enqueue("daily_video", datetime(2026, 5, 10, 9, 0))
+    store.enqueue("other", datetime(2026, 5, 10, 9, 0))
+
+    first = store.claim("w1")
+    assert first["name"] == "daily_video"
+    assert store.claim("w2")["name"] == "other"  # the second daily_video slot waits
+    assert store.claim("w3") is None
+    store.complete(first["id"])
+    assert store.claim("w3")["slot_at"] == "2026-05-10T09:00:00"
+
+
+def test_worker_pool_renders_one_slot_at_a_time(store):
+    active, overlaps, done = [], [], threading.Event()
+
+    def render(job):
+        active.append(job["id"])
+        overlaps.append(len(active))
+        time.sleep(0.2)
+        active.remove(job["id"])
+        if len(overlaps) == 2:
+            done.set()
+        return "ok"
+
+    store.enqueue("daily_video", datetime(2026, 5, 9, 9, 0))
+    store.enqueue("daily_video", datetime(2026, 5, 10, 9, 0))
+    pool = JobWorkerPool(store, {"daily_video": render}, workers=2)
+    pool.start()
+    try:
+        assert done.wait(5)
+    finally:
+        pool.stop()
+    assert overlaps == [1, 1]
+
+
+def test_stage_history_is_trimmed(store, monkeypatch):
+    monkeypatch.setattr(job_store, "STAGE_HISTORY_ROWS", 5)
+    for seconds in range(12):
+        store.record_stage_duration("render", float(seconds))
+    store.record_stage_duration("delivery", 1.0)
+
+    with connect(store.db_path) as conn:
+        rows = conn.execute("SELECT stage, seconds FROM stage_durations ORDER BY id").fetchall()
+    assert [row["seconds"] for row in rows if row["stage"] == "render"] == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert store.stage_duration_estimate("render", percentile=1.0) == 11.0
+    assert store.stage_duration_estimate("delivery") == 1.0
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Agent tests: pre-production lead time, deadline lateness, refresh cleanup, shutdown and status
+"""
+
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from config_free import FreeConfig
+from health_server import metrics
+from job_store import JobStore, JobWorkerPool
+from feed_poller import FeedPoller
+from feed_health import FeedHealth
+from main_free import DAILY_VIDEO_JOB, STAGE_DURATION_DEFAULTS, FreeYouTubeTechAgent, main
+
+DEADLINE = datetime(2026, 5, 10, 9, 0)
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FreeConfig, "CATALOG_DB_PATH", str(tmp_path / "data" / "artifacts.db"))
+    monkeypatch.setattr(FreeConfig, "TOPIC_DB_PATH", str(tmp_path / "data" / "topics.db"))
+    monkeypatch.setattr(FreeConfig, "PREPRODUCTION_MARGIN_MINUTES", 10)
+    return FreeYouTubeTechAgent()
+
+
+def _lateness():
+    hist = metrics.snapshot()["histograms"].get("deadline_lateness", {"count": 0, "sum": 0})
+    return hist["count"], hist["sum"]
+
+
+def _staged(agent, tmp_path, name, topic):
+    catalog = agent.catalog  # opened before the files exist, so nothing is adopted
+    video = tmp_path / "output" / f"{name}.mp4"
+    video.write_bytes(b"\0" * 1000)
+    instructions = tmp_path / "output" / f"{name}_upload_instructions.txt"
+    instructions.write_text("instructions")
+    catalog.register_run(str(video), topic)
+    agent.topic_history.record(topic, str(video))
+    return {"topic": topic, "video_path": str(video), "instructions_path": str(instructions),
+            "trending_topics": [topic]}
+
+
+def test_lead_time_falls_back_to_stage_defaults(agent, tmp_path):
+    assert agent.estimate_lead_time() == 10 * 60 + sum(STAGE_DURATION_DEFAULTS.values())
+
+    agent.job_store = JobStore(str(tmp_path / "jobs.db"))
+    assert agent.estimate_lead_time() == 10 * 60 + sum(STAGE_DURATION_DEFAULTS.values())
+    agent.job_store.record_stage_duration("render", 50.0)
+    expected = 10 * 60 + sum(STAGE_DURATION_DEFAULTS.values()) - STAGE_DURATION_DEFAULTS["render"] + 50
+    assert agent.estimate_lead_time() == expected
+
+
+def test_lateness_is_measured_when_the_delivery_completes(agent, tmp_path):
+    video = str(tmp_path / "output" / "video.mp4")
+    agent._deadlines[video] = DEADLINE
+    count, total = _lateness()
+
+    agent._on_delivery_update(video, video + ".json", {"status": "pending"})
+    assert _lateness() == (count, total)
+
+    delivered = DEADLINE + timedelta(seconds=30)
+    agent._on_delivery_update(video, video + ".json", {"status": "complete", "delivered_at": delivered.isoformat()})
+    assert _lateness() == (count + 1, pytest.approx(total + 30))
+    assert video not in agent._deadlines
+
+    agent._on_delivery_update(video, video + ".json", {"status": "complete", "delivered_at": delivered.isoformat()})
+    assert _lateness()[0] == count + 1  # recorded once per slot
+
+
+def test_refresh_discards_the_replaced_run(agent, tmp_path, monkeypatch):
+    monkeypatch.setattr(FreeConfig, "BLOB_STORE_ENABLED", True)
+    old = _staged(agent, tmp_path, "old", "Old topic")
+    agent.blob_store.put_file(old["video_path"], owner=old["video_path"], keep_source=True)
+    monkeypatch.setattr(agent, "research_topics", lambda: ["Old topic", "Quantum networking"])
+    monkeypatch.setattr(agent, "prepare_video", lambda topic, trending_topics: _staged(agent, tmp_path, "new", topic))
+
+    refreshed = agent._refresh_staged_video(old)
+
+    assert refreshed["topic"] == "Quantum networking"
+    assert sorted(p.name for p in (tmp_path / "output").glob("*.*")) == ["new.mp4", "new_upload_instructions.txt"]
+    assert agent.catalog.stats() == {"runs": 1, "bytes": agent.catalog.latest_run()["total_bytes"]}
+    assert agent.blob_store.stats()["blobs"] == 0
+    assert not agent.topic_history.is_seen("Old topic")
+
+
+@pytest.mark.parametrize("preproduction, fired_at, slot", [
+    (False, datetime(2026, 10, 19, 9, 0, 0, 300000), datetime(2026, 10, 19, 9, 0)),  # the slot that fired
+    (False, datetime(2026, 10, 19, 9, 4), datetime(2026, 10, 19, 9, 0)),  # loop was busy for a few minutes
+    (True, datetime(2026, 10, 19, 8, 10), datetime(2026, 10, 19, 9, 0)),  # ahead of the deadline
+])
+def test_scheduled_trigger_enqueues_its_own_slot(agent, tmp_path, monkeypatch, preproduction, fired_at, slot):
+    monkeypatch.setattr(FreeConfig, "PREPRODUCTION_ENABLED", preproduction)
+    store = JobStore(str(tmp_path / "jobs.db"))
+    agent.job_workers = JobWorkerPool(store, {})  # not started: the job stays queued
+
+    agent.enqueue_scheduled_slot("09:00", now=fired_at)
+
+    assert store.last_slot(DAILY_VIDEO_JOB) == slot
+    # A missed day is still found on the next restart
+    assert store.missed_slots(DAILY_VIDEO_JOB, "09:00", now=slot + timedelta(days=2, hours=1)) == [
+        slot + timedelta(days=1), slot + timedelta(days=2)]
+
+
+def test_sigterm_shuts_down_like_ctrl_c(agent, tmp_path, monkeypatch):
+    monkeypatch.setattr(FreeConfig, "HEALTH_SERVER_ENABLED", False)
+    monkeypatch.setattr(FreeConfig, "PREPRODUCTION_ENABLED", False)
+    JobStore().record_skipped(DAILY_VIDEO_JOB, agent._next_deadline("09:00"), "seed")  # not a first boot
+    agent.feed_poller = FeedPoller([], state_path=str(tmp_path / "store.json"))
+    agent.feed_poller.store.add("Rust in the kernel", "feed")
+    previous = signal.getsignal(signal.SIGTERM)
+    threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGTERM)).start()
+    try:
+        started = time.monotonic()
+        agent.run_automated_mode()  # returns once SIGTERM has stopped the scheduler
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    assert time.monotonic() - started < 10
+    assert not agent.scheduler.is_running() and not agent.job_workers.running
+    assert FeedPoller([], state_path=str(tmp_path / "store.json")).store.ranked() == ["Rust in the kernel"]
+
+
+def test_status_prints_feed_health_and_the_poller(agent, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(FreeConfig, "FEED_HEALTH_DB_PATH", str(tmp_path / "data" / "feed_health.db"))
+    monkeypatch.setattr(FreeConfig, "TOPIC_STORE_PATH", str(tmp_path / "data" / "topic_store.json"))
+    health = FeedHealth()
+    health.record_success("https://example.com/rss", 0.25, 3)
+    health.record_failure("https://example.org/rss", "HTTP 503", 1.5)
+    poller = FeedPoller([])
+    poller.store.add("Rust in the kernel", "feed")
+    poller.save()
+    monkeypatch.setattr("sys.argv", ["main_free.py", "--mode", "status"])
+
+    main()
+
+    out = capsys.readouterr().out
+    assert "Feed Poller: 1 topics, last poll never" in out
+    assert ("https://example.com/rss: closed, 0% failures, latency 0.25s, yield 3.0, "
+            "polled every 1 cycle(s)") in out
+    assert "https://example.org/rss: closed, 100% failures, latency 1.50s, yield n/a" in out
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped weight tests on tiny randomly initialised models
+"""
+
+import hashlib
+import os
+import threading
+
+import pytest
+import torch
+from transformers import AutoModelForCausalLM
+
+from benchmark_free import build_tiny_model
+from config_free import FreeConfig
+from content_research_free import FreeContentResearcher
+from model_weights import WEIGHTS_FILE, _parameters_on_meta, load_mapped, prepare_weights
+
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("models"))
+    return {name: build_tiny_model(name, root) for name in ("tiny-gpt2", "tiny-gpt-neox-bin")}
+
+
+def _file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.mark.parametrize("name", ["tiny-gpt2", "tiny-gpt-neox-bin"])
+def test_mapped_model_matches_from_pretrained(models, tmp_path, name):
+    path = prepare_weights(models[name], "float32", str(tmp_path))
+    mapped = load_mapped(path)
+    reference = AutoModelForCausalLM.from_pretrained(models[name]).eval()
+    ids = torch.tensor([[3, 17, 42, 99, 5]])
+    with torch.no_grad():
+        assert torch.allclose(mapped(ids).logits, reference(ids).logits, atol=1e-6)
+
+    # Every parameter is a view into the one mapping of the weights file
+    storages = {p.untyped_storage().data_ptr() for p in mapped.parameters()}
+    assert len(storages) == 1
+    assert prepare_weights(models[name], "float32", str(tmp_path)) == path  # converted once
+
+
+def test_tied_weights_are_stored_once_and_file_is_never_written(models, tmp_path):
+    path = prepare_weights(models["tiny-gpt2"], "float32", str(tmp_path))
+    weights = os.path.join(path, WEIGHTS_FILE)
+    before = _file_sha256(weights)
+    mapped = load_mapped(path)
+    assert mapped.lm_head.weight.data_ptr() == mapped.transformer.wte.weight.data_ptr()
+    with torch.no_grad():
+        mapped.lm_head.weight.zero_()  # copy-on-write: only this process sees it
+    assert _file_sha256(weights) == before
+
+
+def test_half_precision_copy_and_researcher_uses_mapping(models, tmp_path, monkeypatch):
+    full = prepare_weights(models["tiny-gpt2"], "float32", str(tmp_path))
+    half = prepare_weights(models["tiny-gpt2"], "bfloat16", str(tmp_path))
+    assert os.path.getsize(os.path.join(half, WEIGHTS_FILE)) < 0.6 * os.path.getsize(os.path.join(full, WEIGHTS_FILE))
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FreeConfig, "AI_MMAP_WEIGHTS", True)
+    monkeypatch.setattr(FreeConfig, "AI_WEIGHTS_DIR", str(tmp_path))
+    monkeypatch.setattr(FreeConfig, "AI_WEIGHTS_DTYPE", "bfloat16")
+    researcher = FreeContentResearcher(model_name=models["tiny-gpt2"])
+    assert researcher.model.dtype == torch.bfloat16
+    assert len({p.untyped_storage().data_ptr() for p in researcher.model.parameters()}) == 1
+    text, generated = researcher.generate_from_prefix("\nTopic: Rust\n", max_new_tokens=4, do_sample=False)
+    assert generated == 4
+
+
+def test_meta_scope_only_affects_the_constructing_thread():
+    built = {}
+    with _parameters_on_meta():
+        here = torch.nn.Linear(4, 4)
+        other = threading.Thread(target=lambda: built.setdefault("layer", torch.nn.Linear(4, 4)))
+        other.start()
+        other.join()
+    after = torch.nn.Linear(4, 4)
+
+    assert here.weight.is_meta
+    assert not built["layer"].weight.is_meta
+    assert not after.weight.is_meta
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Background music mixer tests: looping, ducking and bounded memory
+"""
+
+import subprocess
+import tracemalloc
+import wave
+
+import imageio_ffmpeg
+import numpy as np
+import pytest
+
+from music_mixer import MIX_CHANNELS, MIX_RATE, mix_music
+
+FFMPEG = imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def _audio(path, source, seconds):
+    subprocess.run([FFMPEG, "-v", "error", "-y", "-f", "lavfi", "-i", source, "-t", str(seconds), str(path)],
+                   check=True)
+    return str(path)
+
+
+def _read_wav(path):
+    with wave.open(path, "rb") as f:
+        assert (f.getframerate(), f.getnchannels(), f.getsampwidth()) == (MIX_RATE, MIX_CHANNELS, 2)
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").reshape(-1, MIX_CHANNELS)
+    return data[:, 0].astype(np.float64) / 32767
+
+
+def _band_level(signal, start, end, freq):
+    """Amplitude of the `freq` Hz component between start and end seconds"""
+    chunk = signal[int(start * MIX_RATE):int(end * MIX_RATE)]
+    spectrum = np.abs(np.fft.rfft(chunk)) * 2 / len(chunk)
+    freqs = np.fft.rfftfreq(len(chunk), 1 / MIX_RATE)
+    return spectrum[np.abs(freqs - freq) < 5].max()
+
+
+def test_music_loops_to_length_and_ducks_under_speech(tmp_path):
+    # ffmpeg's sine source is at 1/8 full scale (-18 dBFS)
+    music = _audio(tmp_path / "music.wav", "sine=f=200:r=44100,pan=stereo|c0=c0|c1=c0", 0.7)  # loops
+    voice = _audio(tmp_path / "voice.mp3", "sine=f=1000:r=24000:d=1,apad", 5)  # 1s of speech, then silence
+    output = str(tmp_path / "mix.wav")
+    result = mix_music(voice, music, output, 5.0, music_db=-6, duck_db=-12)
+
+    mixed = _read_wav(output)
+    assert len(mixed) == 5 * MIX_RATE and result["seconds"] == 5.0
+    ducked = _band_level(mixed, 0.2, 0.9, 200)
+    open_bed = _band_level(mixed, 2.0, 3.0, 200)
+    assert 20 * np.log10(open_bed) == pytest.approx(-18 - 6, abs=1.0)
+    assert 20 * np.log10(ducked / open_bed) == pytest.approx(-12, abs=1.0)
+    assert _band_level(mixed, 0.2, 0.9, 1000) == pytest.approx(1 / 8, rel=0.1)  # the narration is untouched
+    assert np.abs(mixed[-200:]).max() < 0.01  # faded out at the end
+    assert 0.5 < result["ducked_seconds"] < 2.5
+
+
+def test_memory_is_bounded_by_the_block_size(tmp_path):
+    music = _audio(tmp_path / "music.mp3", "sine=f=300:r=44100", 2)
+    tracemalloc.start()
+    try:
+        mix_music(None, music, str(tmp_path / "mix.wav"), 120.0)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 4 * 1024 * 1024  # the whole two minutes as float PCM would be 40 MB
+
+
+def test_undecodable_music_raises(tmp_path):
+    bogus = tmp_path / "music.mp3"
+    bogus.write_bytes(b"not audio")
+    with pytest.raises(ValueError):
+        mix_music(None, str(bogus), str(tmp_path / "mix.wav"), 3.0)
+
+
+def test_video_narration_is_mixed_with_the_music_bed(tmp_path, monkeypatch):
+    from config_free import FreeConfig
+    from video_generator_free import FreeVideoGenerator
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FreeConfig, "BLOB_STORE_ENABLED", False)
+    music = _audio(tmp_path / "music.mp3", "sine=f=200:r=44100", 1)
+    generator = FreeVideoGenerator()
+    monkeypatch.setattr(generator, "get_audio", lambda text, path: path)  # no narration: music only
+    script = {"hook": {"text": "Hook", "duration": 2}, "segments": []}
+    output = str(tmp_path / "output" / "video.mp4")
+    assert generator.create_short_form_video(script, output, background_music=music)
+
+    pcm = subprocess.run([FFMPEG, "-v", "error", "-i", output, "-f", "s16le", "-ac", "1", "-ar", str(MIX_RATE), "-"],
+                         check=True, capture_output=True).stdout
+    audio = np.frombuffer(pcm, dtype="<i2") / 32767
+    assert len(audio) == pytest.approx(2 * MIX_RATE, rel=0.05)
+    assert _band_level(audio, 0.2, 0.4, 200) > 0.004  # the -18 dBFS tone at MUSIC_VOLUME_DB
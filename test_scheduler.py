@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Scheduler loop tests: event-driven wakeups and no overlapping runs
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import schedule
+
+from scheduler import PREPRODUCTION_TAG, VideoScheduler
+
+
+@pytest.fixture
+def scheduler():
+    schedule.clear()
+    scheduler = VideoScheduler()
+    yield scheduler
+    scheduler.stop()
+    schedule.clear()
+
+
+def test_stop_wakes_the_idle_loop_at_once(scheduler):
+    scheduler.start()  # nothing scheduled: the loop sleeps for up to an hour
+    time.sleep(0.2)
+    started = time.monotonic()
+    scheduler.stop()
+    assert time.monotonic() - started < 1
+    assert not scheduler.thread.is_alive()
+
+
+def test_new_job_wakes_the_loop(scheduler):
+    ran = threading.Event()
+    scheduler.start()
+    time.sleep(0.2)  # idle with no jobs
+    due = (datetime.now() + timedelta(seconds=2)).strftime("%H:%M:%S")
+    assert scheduler.schedule_daily(ran.set, due)
+    assert ran.wait(5)
+
+
+def test_running_job_is_skipped_not_overlapped(scheduler):
+    release = threading.Event()
+    runs = []
+
+    def slow_job():
+        runs.append(time.monotonic())
+        release.wait(5)
+
+    scheduler.schedule_daily(slow_job, "03:00")
+    schedule.run_all()
+    time.sleep(0.1)
+    assert scheduler.is_job_running()
+    schedule.run_all()  # next slot fires while the first run is still going
+    time.sleep(0.1)
+    assert len(runs) == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while scheduler.is_job_running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    schedule.run_all()
+    time.sleep(0.1)
+    assert len(runs) == 2
+
+
+def test_preproduction_starts_lead_time_before_the_deadline(scheduler):
+    assert scheduler.schedule_ahead_of_deadline(lambda: None, "09:00", 45 * 60 + 30) == "08:14:30"
+    assert scheduler.schedule_ahead_of_deadline(lambda: None, "00:10", 20 * 60) == "23:50:00"  # previous day
+
+    jobs = schedule.get_jobs(PREPRODUCTION_TAG)
+    assert len(jobs) == 1  # rescheduling replaces the earlier start
+    assert jobs[0].next_run.strftime("%H:%M:%S") == "23:50:00"
+    assert scheduler.upload_time == "00:10"
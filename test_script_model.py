@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Script model tests on tiny randomly initialised models (no download)
+"""
+
+import pytest
+
+from benchmark_free import benchmark_model, build_tiny_model
+from config_free import FreeConfig
+from content_research_free import FreeContentResearcher
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    return build_tiny_model("tiny-llama", str(tmp_path_factory.mktemp("models")))
+
+
+def test_researcher_loads_configured_model(tiny_model, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FreeConfig, "AI_MODEL_NAME", tiny_model)
+    researcher = FreeContentResearcher()
+    assert researcher.model_name == tiny_model
+    assert researcher.tokenizer is not None
+    assert researcher.model.config.model_type == "llama"
+
+
+def test_model_benchmark_reports_latency_and_memory():
+    result = benchmark_model(["tiny-gpt2", "not-a-cached/model"], new_tokens=8, loaders=["from_pretrained"])
+    tiny, missing = result["runs"]
+    assert tiny["new_tokens"] == 8 and tiny["prompt_tokens"] > 0
+    assert tiny["first_token_seconds"] > 0 and tiny["tokens_per_second"] > 0
+    assert tiny["peak_rss_mb"] > tiny["load_rss_mb"] > 0
+    assert 0 < tiny["prefix_tokens"] < tiny["prompt_tokens"] and tiny["first_token_cached_prefix_seconds"] > 0
+    assert "error" in missing
+
+
+def test_cached_prefix_prefills_only_the_topic_suffix(tiny_model, tmp_path, monkeypatch):
+    import torch
+    from content_research_free import SCRIPT_PROMPT_PREFIX, script_prompt_suffix
+
+    monkeypatch.chdir(tmp_path)
+    researcher = FreeContentResearcher(model_name=tiny_model)
+    tokenizer, model = researcher.tokenizer, researcher.model
+    suffix = script_prompt_suffix("Rust for Python developers", 45)
+
+    prompt_ids = torch.cat([tokenizer(SCRIPT_PROMPT_PREFIX, return_tensors="pt").input_ids,
+                            tokenizer(suffix, add_special_tokens=False, return_tensors="pt").input_ids], dim=1)
+    uncached = model.generate(prompt_ids, attention_mask=torch.ones_like(prompt_ids), max_new_tokens=12,
+                              do_sample=False, pad_token_id=tokenizer.eos_token_id)
+    expected = tokenizer.decode(uncached[0, prompt_ids.shape[1]:], skip_special_tokens=True)
+
+    prefix_len = researcher._prefix_state()[0].shape[1]
+    prefilled = []
+    hook = model.register_forward_pre_hook(lambda module, args, kwargs: prefilled.append(kwargs["input_ids"].shape[1]),
+                                           with_kwargs=True)
+    try:
+        first, _ = researcher.generate_from_prefix(suffix, max_new_tokens=12, do_sample=False)
+        second, _ = researcher.generate_from_prefix(suffix, max_new_tokens=12, do_sample=False)
+    finally:
+        hook.remove()
+    assert first == second == expected
+    assert prefilled[0] == prompt_ids.shape[1] - prefix_len  # the prefix was never re-encoded
+
+
+def test_token_budget_follows_video_length(monkeypatch):
+    from content_research_free import script_token_budget
+
+    monkeypatch.setattr(FreeConfig, "TTS_RATE", 150)
+    assert script_token_budget(60) == 219  # 150 words * 1.3 + 3 lines * 8
+    assert script_token_budget(30) < script_token_budget(60) < 500
+    assert script_token_budget(60, max_segments=5) > script_token_budget(60)
+
+
+def test_generation_stops_after_the_lines_the_renderer_uses(tiny_model, tmp_path, monkeypatch):
+    import torch
+    from content_research_free import _stopping_criteria, script_token_budget
+
+    monkeypatch.chdir(tmp_path)
+    researcher = FreeContentResearcher(model_name=tiny_model)
+    tokenizer = researcher.tokenizer
+    prompt = tokenizer("Script:\n", return_tensors="pt").input_ids
+    stop = _stopping_criteria(tokenizer, prompt.shape[1], max_lines=3)
+
+    def done(text):
+        ids = torch.cat([prompt, tokenizer(text, add_special_tokens=False, return_tensors="pt").input_ids], dim=1)
+        return bool(stop(ids, None)[0])
+
+    assert not done("0:00 - Hook\n\n0:05 - First point\n0:30 - Second")
+    assert done("0:00 - Hook\n\n0:05 - First point\n0:30 - Second\n")
+
+    script = researcher.generate_video_script("Rust for Python developers", 30)
+    report = script["generation"]
+    assert report["max_new_tokens"] == script_token_budget(30)
+    assert 0 <= report["used_tokens"] and report["generated_tokens"] <= report["max_new_tokens"]
+
+
+def test_rule_based_script_wins_when_the_model_misses_the_deadline(tiny_model, tmp_path, monkeypatch):
+    import threading
+    import time
+    from health_server import metrics
+
+    monkeypatch.chdir(tmp_path)
+    researcher = FreeContentResearcher(model_name=tiny_model)
+    generate = researcher.generate_from_prefix
+    cancelled = threading.Event()
+    before = metrics.snapshot()["histograms"].get("script_ai", {"count": 0, "sum": 0.0})
+    observed, observed_sum = before["count"], before["sum"]
+
+    def slow_generate(suffix, cancel=None, **kwargs):
+        time.sleep(0.5)  # a model that is still prefilling when the deadline passes
+        text, tokens = generate(suffix, cancel=cancel, **kwargs)
+        if cancel.is_set():
+            cancelled.set()
+        return text, tokens
+
+    monkeypatch.setattr(researcher, "generate_from_prefix", slow_generate)
+    monkeypatch.setattr(FreeConfig, "AI_SCRIPT_DEADLINE_SECONDS", 0.1)
+    started = time.perf_counter()
+    script = researcher.generate_video_script("Rust for Python developers", 30)
+    assert time.perf_counter() - started < 0.5
+    report = script["generation"]
+    assert report["winner"] == "rule_based" and report["ai_timed_out"] and report["ai_seconds"] == 0.1
+    assert report["rule_based_seconds"] < 0.1 and report["used_tokens"] == 0
+    assert script["hook"]["text"] and script["segments"]
+    assert cancelled.wait(5)  # the abandoned generation was told to stop
+
+    deadline = time.monotonic() + 5
+    while metrics.snapshot()["histograms"]["script_ai"]["count"] == observed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    hist = metrics.snapshot()["histograms"]["script_ai"]
+    assert hist["count"] == observed + 1 and hist["sum"] - observed_sum >= 0.5  # its real duration
+
+
+def test_ai_script_wins_within_the_deadline(tiny_model, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    researcher = FreeContentResearcher(model_name=tiny_model)
+    monkeypatch.setattr(researcher, "generate_from_prefix",
+                        lambda suffix, **kwargs: ("0:00 - Hook line\n\n0:05 - First point\n0:30 - Second point\n", 20))
+    monkeypatch.setattr(FreeConfig, "AI_SCRIPT_DEADLINE_SECONDS", 30)
+    script = researcher.generate_video_script("Rust for Python developers", 30)
+    report = script["generation"]
+    assert report["winner"] == "ai" and not report["ai_timed_out"]
+    assert report["ai_seconds"] is not None and report["used_tokens"] > 0
+    assert script["hook"]["text"] == "Hook line"
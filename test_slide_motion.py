@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Ken Burns slide animation tests
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from slide_motion import MOTIONS, crop_windows, index_maps, ken_burns_clip
+
+
+def test_crop_windows_stay_on_the_canvas():
+    size, zoom = (320, 180), 1.2
+    for motion in MOTIONS:
+        windows = crop_windows(motion, size, zoom, 48)
+        x, y, w, h = windows.T
+        assert (x >= 0).all() and (y >= 0).all()
+        assert (x + w <= size[0] * zoom + 1e-6).all() and (y + h <= size[1] * zoom + 1e-6).all()
+        assert np.allclose(w / h, size[0] / size[1])
+
+    zoom_in = crop_windows("zoom_in", size, zoom, 48)
+    assert zoom_in[0] == pytest.approx([0, 0, 384, 216])  # the whole slide
+    assert zoom_in[-1] == pytest.approx([32, 18, 320, 180])  # its centre at 1:1
+    assert crop_windows("zoom_out", size, zoom, 48)[0] == pytest.approx(zoom_in[-1])
+    pan = crop_windows("pan_right", size, zoom, 48)
+    assert pan[0][0] == 0 and pan[-1][0] == pytest.approx(64)
+
+
+def test_index_maps_cover_each_frame():
+    windows = crop_windows("zoom_in", (320, 180), 1.2, 10)
+    rows, cols = index_maps(windows, (320, 180), (384, 216))
+    assert rows.shape == (10, 180) and cols.shape == (10, 320)
+    assert rows.min() >= 0 and rows.max() < 216 and cols.min() >= 0 and cols.max() < 384
+    assert (np.diff(cols, axis=1) >= 0).all()
+    assert cols[-1].tolist() == list(range(32, 352))  # 1:1 crop: consecutive pixels
+
+
+def test_ken_burns_clip_frames_move(tmp_path):
+    path = str(tmp_path / "slide.png")
+    gradient = np.tile(np.linspace(0, 255, 320, dtype=np.uint8), (180, 1))
+    Image.fromarray(np.dstack([gradient] * 3)).save(path)
+
+    clip = ken_burns_clip(path, 2.0, "pan_right", zoom=1.2, fps=24)
+    first, last = clip.get_frame(0), clip.get_frame(clip.duration - 1e-3)
+    assert first.shape == (180, 320, 3) and first.dtype == np.uint8
+    assert last[:, :, 0].mean() > first[:, :, 0].mean()  # panned towards the bright side
+    assert clip.get_frame(0.5).tobytes() != clip.get_frame(1.0).tobytes()
+
+
+def test_animated_video_renders(tmp_path, monkeypatch):
+    from config_free import FreeConfig
+    from video_generator_free import FreeVideoGenerator
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FreeConfig, "BLOB_STORE_ENABLED", False)
+    monkeypatch.setattr(FreeConfig, "SLIDE_ANIMATION", "ken_burns")
+    generator = FreeVideoGenerator()
+    monkeypatch.setattr(generator, "get_audio", lambda text, path: path)  # no narration: silent slides
+    script = {"hook": {"text": "Hook", "duration": 1}, "segments": [{"text": "Point one", "duration": 1}]}
+    assert generator.create_short_form_video(script, str(tmp_path / "output" / "video.mp4"))
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Startup regression tests: the CLI must not pay for the model or video stack
+unless the selected mode needs it.
+"""
+
+from benchmark_free import HEAVY_MODULES, benchmark_startup, measure_import_times
+
+
+def test_import_main_free_skips_heavy_modules(tmp_path):
+    imported = {entry["module"].split(".")[0] for entry in measure_import_times("main_free", cwd=str(tmp_path))}
+    assert not imported.intersection(HEAVY_MODULES)
+
+
+def test_status_mode_within_budget(tmp_path):
+    result = benchmark_startup(runs=3, budget=1.0, cwd=str(tmp_path))
+    assert result["heavy_modules_imported"] == []
+    assert result["passed"], f"status took {result['status_seconds_min']:.2f}s"
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Topic history tests: near-duplicate detection, ranking and lookup speed
+"""
+
+import time
+
+import pytest
+
+from topic_history import TopicHistory, normalize_tokens
+
+
+@pytest.fixture
+def history(tmp_path):
+    return TopicHistory(str(tmp_path / "topics.db"), threshold=0.5)
+
+
+def test_normalization_ignores_case_punctuation_and_plurals():
+    assert normalize_tokens("OpenAI Launches the GPT-5 Model!") == normalize_tokens("openai launch GPT-5 models")
+
+
+def test_near_duplicates_are_seen(history):
+    history.record("Python Programming Tips for Beginners", "v1.mp4")
+
+    assert history.is_seen("Python programming tips for beginners")
+    assert history.is_seen("10 Python Programming Tips for Beginners")
+    assert not history.is_seen("Rust programming for embedded devices")
+
+
+def test_pick_unseen_keeps_rank_order(history):
+    history.record("Apple unveils new M5 MacBook Pro")
+    ranked = ["Apple unveils the M5 MacBook Pro", "Google releases Gemini 3", "Linux 7.0 kernel released"]
+
+    assert history.pick_unseen(ranked) == "Google releases Gemini 3"
+    history.record("Google releases Gemini 3")
+    assert history.pick_unseen(ranked) == "Linux 7.0 kernel released"
+    assert history.pick_unseen(ranked[:2]) is None
+
+
+def test_history_survives_restart_and_forgets_discarded_videos(tmp_path):
+    db = str(tmp_path / "topics.db")
+    TopicHistory(db).record("Cloud Computing Explained Simply", "output/v1.mp4")
+
+    reloaded = TopicHistory(db)
+    assert reloaded.is_seen("cloud computing explained simply")
+    reloaded.forget_video("output/v1.mp4")
+    assert not TopicHistory(db).is_seen("cloud computing explained simply")
+
+
+def test_lookup_stays_sub_millisecond_with_years_of_history(history):
+    vocabulary = [f"term{i}" for i in range(400)]
+    for day in range(5 * 365):
+        words = [vocabulary[(day * k) % len(vocabulary)] for k in (1, 3, 7, 11, 13)]
+        history._add(day + 1, " ".join(words), normalize_tokens(" ".join(words)), None, "2026-01-01")
+
+    queries = ["term5 term15 term35 term55 term65", "Brand new headline about quantum chips"] * 100
+    start = time.perf_counter()
+    for query in queries:
+        history.most_similar(query)
+    assert (time.perf_counter() - start) / len(queries) < 0.001
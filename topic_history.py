@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Topic History
+Every topic turned into a video, persisted in SQLite and indexed in memory
+by normalized tokens, so near-duplicate headlines are recognised before a
+full script/TTS/render cycle is spent on them.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from config_free import FreeConfig
+from logger import get_logger
+from sqlite_store import connect
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topic_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    tokens TEXT NOT NULL,
+    video_path TEXT,
+    used_at TEXT NOT NULL
+);
+"""
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in into is it its new of on or our the their this
+to today video vs was we what when why will with you your
+""".split())
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+
+def normalize_tokens(text: str) -> Set[str]:
+    """Lower-cased content words, light plural stemming, plus adjacent-word bigrams"""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        word = word.strip(".-")
+        if not word or word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith(("ches", "shes", "xes", "sses")):
+            word = word[:-2]
+        elif len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            word = word[:-1]
+        words.append(word)
+    return set(words) | {f"{a}_{b}" for a, b in zip(words, words[1:])}
+
+
+class TopicHistory:
+    """Seen topics with an in-memory inverted index (token -> topic ids)"""
+
+    def __init__(self, db_path: Optional[str] = None, threshold: Optional[float] = None):
+        self.db_path = db_path or FreeConfig.TOPIC_DB_PATH
+        self.threshold = FreeConfig.TOPIC_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self._entries: Dict[int, Dict] = {}
+        self._index: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA)
+            for row in conn.execute("SELECT id, topic, tokens, video_path, used_at FROM topic_history"):
+                self._add(row["id"], row["topic"], set(row["tokens"].split()), row["video_path"], row["used_at"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, entry_id: int, topic: str, tokens: Set[str], video_path: Optional[str], used_at: str):
+        self._entries[entry_id] = {"id": entry_id, "topic": topic, "tokens": tokens,
+                                   "video_path": video_path, "used_at": used_at}
+        for token in tokens:
+            self._index.setdefault(token, set()).add(entry_id)
+
+    def record(self, topic: str, video_path: Optional[str] = None) -> int:
+        """Remember that a video was made about topic"""
+        tokens = normalize_tokens(topic)
+        used_at = datetime.now().isoformat(timespec="seconds")
+        with self._lock, connect(self.db_path) as conn:
+            cur = conn.execute("INSERT INTO topic_history (topic, tokens, video_path, used_at) VALUES (?, ?, ?, ?)",
+                               (topic, " ".join(sorted(tokens)), video_path, used_at))
+            self._add(cur.lastrowid, topic, tokens, video_path, used_at)
+            return cur.lastrowid
+
+    def forget_video(self, video_path: str):
+        """Drop the entries for a video that was discarded before delivery"""
+        with self._lock, connect(self.db_path) as conn:
+            conn.execute("DELETE FROM topic_history WHERE video_path = ?", (video_path,))
+            for entry_id in [i for i, e in self._entries.items() if e["video_path"] == video_path]:
+                for token in self._entries.pop(entry_id)["tokens"]:
+                    self._index[token].discard(entry_id)
+
+    def most_similar(self, topic: str) -> Tuple[float, Optional[Dict]]:
+        """Best Jaccard match among past topics sharing at least one token"""
+        tokens = normalize_tokens(topic)
+        overlaps: Dict[int, int] = {}
+        with self._lock:
+            for token in tokens:
+                for entry_id in self._index.get(token, ()):
+                    overlaps[entry_id] = overlaps.get(entry_id, 0) + 1
+            best_score, best = 0.0, None
+            for entry_id, shared in overlaps.items():
+                entry = self._entries[entry_id]
+                score = shared / (len(tokens) + len(entry["tokens"]) - shared)
+                if score > best_score:
+                    best_score, best = score, entry
+        return best_score, best
+
+    def is_seen(self, topic: str) -> bool:
+        return self.most_similar(topic)[0] >= self.threshold
+
+    def pick_unseen(self, ranked_topics: List[str]) -> Optional[str]:
+        """First topic (in rank order) not similar to anything already made"""
+        for topic in ranked_topics:
+            score, match = self.most_similar(topic)
+            if score < self.threshold:
+                return topic
+            logger.info(f"Skipping '{topic}' - {score:.0%} similar to '{match['topic']}' ({match['used_at'][:10]})")
+        return None
+
+    def least_similar(self, topics: List[str]) -> Optional[str]:
+        """Fallback when everything was seen: the topic furthest from past videos"""
+        return min(topics, key=lambda t: self.most_similar(t)[0]) if topics else None
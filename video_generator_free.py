@@ -6,22 +6,37 @@ Free Video Generator - With gTTS retry logic for rate limits
 import os
 import gc
 import time
-from PIL import Image, ImageDraw, ImageFont
-from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips
-from moviepy.video.fx.all import fadein, fadeout
-from gtts import gTTS
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+from audio_track import concat_mp3
+from blob_store import BlobStore, content_key
+from config_free import FreeConfig
 from logger import get_logger
 
+# PIL, moviepy and gTTS are imported where they are used, so importing this
+# module (e.g. for status or scheduling) doesn't pay for the video stack.
+if TYPE_CHECKING:
+    from PIL import Image
+    from moviepy.editor import ImageClip
+
 logger = get_logger(__name__)
 
+# Slides rendered per video: the hook plus the first script segments
+MAX_SEGMENTS = 3
+VIDEO_FPS = 24
+SLIDE_SIZE = (1280, 720)
+
 class FreeVideoGenerator:
     """Free video generator with rate limit handling"""
     
-    def __init__(self):
+    def __init__(self, blob_store: Optional[BlobStore] = None):
         self.temp_dir = "temp"
         self.output_dir = "output"
         self._setup_directories()
+        # Slides, TTS clips and finished videos are stored once and shared across runs
+        if blob_store is None and FreeConfig.BLOB_STORE_ENABLED:
+            blob_store = BlobStore(os.path.join(self.output_dir, "blobs"))
+        self.blob_store = blob_store
+        self._owner = None  # run whose blob references are being recorded
         logger.info("Free video generator initialized")
     
     def _setup_directories(self):
@@ -35,6 +50,8 @@ class FreeVideoGenerator:
         if ext.lower() != ".mp3":
             output_path = base + ".mp3"
         
+        from gtts import gTTS
+        
         for attempt in range(max_retries):
             try:
                 # Add delay between requests to avoid rate limits
@@ -65,9 +82,43 @@ class FreeVideoGenerator:
         
         return False
     
-    def create_background_image(self, text: str, size: tuple = (1280, 720),
-                              bg_color: tuple = (30, 30, 30)) -> Image.Image:
+    def get_audio(self, text: str, output_path: str) -> str:
+        """Path of the narration for text - a stored clip if this text was spoken before"""
+        if self.blob_store is None:
+            self.generate_audio(text, output_path)
+            return output_path
+        
+        key = content_key("tts", "en", text)
+        cached = self.blob_store.lookup(key, self._owner)
+        if cached:
+            logger.info(f"Audio (cached): {text[:25]}...")
+            return cached
+        if self.generate_audio(text, output_path):
+            return self.blob_store.put_file(output_path, key, self._owner)
+        return output_path
+    
+    def get_slide(self, text: str, bg_color: tuple = (30, 30, 30), size: tuple = SLIDE_SIZE) -> str:
+        """Path of the rendered slide PNG for text - reused if rendered before"""
+        key = content_key("slide", text, bg_color, size)
+        if self.blob_store is not None:
+            cached = self.blob_store.lookup(key, self._owner)
+            if cached:
+                return cached
+        
+        img = self.create_background_image(text, size=size, bg_color=bg_color)
+        temp_img_path = os.path.join(self.temp_dir, f"img_{hash(text) % 1000}.png")
+        img.save(temp_img_path, optimize=True)
+        del img
+        gc.collect()
+        if self.blob_store is not None:
+            return self.blob_store.put_file(temp_img_path, key, self._owner)
+        return temp_img_path
+    
+    def create_background_image(self, text: str, size: tuple = SLIDE_SIZE,
+                              bg_color: tuple = (30, 30, 30)) -> "Image.Image":
         """Create background image (720p)"""
+        from PIL import Image, ImageDraw, ImageFont
+        
         try:
             img = Image.new('RGB', size, bg_color)
             draw = ImageDraw.Draw(img)
@@ -127,30 +178,23 @@ class FreeVideoGenerator:
             logger.error(f"Image error: {e}")
             return Image.new('RGB', size, bg_color)
     
-    def create_video_segment(self, text: str, audio_path: str, duration: int, 
-                           bg_color: tuple = (30, 30, 30)) -> Optional[ImageClip]:
-        """Create video segment"""
+    def create_video_segment(self, text: str, duration: float, bg_color: tuple = (30, 30, 30),
+                           motion: Optional[str] = None) -> Optional["ImageClip"]:
+        """Create a silent video segment; the narration track is added to the whole video
+        
+        With a motion from slide_motion.MOTIONS the slide pans or zooms instead of standing still.
+        """
+        from moviepy.editor import ImageClip
+        from moviepy.video.fx.all import fadein, fadeout
+        
         try:
             # Image
-            img = self.create_background_image(text, bg_color=bg_color)
-            temp_img_path = os.path.join(self.temp_dir, f"img_{hash(text) % 1000}.png")
-            img.save(temp_img_path, optimize=True)
-            del img
-            gc.collect()
-            
-            # Video with audio
-            if os.path.exists(audio_path):
-                try:
-                    audio_clip = AudioFileClip(audio_path)
-                    actual_duration = audio_clip.duration
-                    video_clip = ImageClip(temp_img_path, duration=actual_duration)
-                    video_clip = video_clip.set_audio(audio_clip)
-                except Exception as audio_error:
-                    logger.warning(f"Audio load failed, using silent: {audio_error}")
-                    video_clip = ImageClip(temp_img_path, duration=duration)
+            temp_img_path = self.get_slide(text, bg_color=bg_color)
+            if motion:
+                from slide_motion import ken_burns_clip
+                video_clip = ken_burns_clip(temp_img_path, duration, motion,
+                                            zoom=FreeConfig.KEN_BURNS_ZOOM, fps=VIDEO_FPS)
             else:
-                # No audio file - create silent video
-                logger.warning(f"No audio file, creating silent segment")
                 video_clip = ImageClip(temp_img_path, duration=duration)
             
             # Fades
@@ -167,60 +211,84 @@ class FreeVideoGenerator:
     def create_short_form_video(self, script: Dict, output_path: str, 
                               background_music: Optional[str] = None) -> bool:
         """Create video"""
+        from moviepy.editor import AudioFileClip, ColorClip, concatenate_videoclips
+        
         video_clips = []
         temp_files = []
+        audio_clip = None
+        self._owner = output_path
         
         try:
             logger.info("Creating video...")
             
-            # Limit segments
-            max_segments = 3
-            segment_count = 0
-            
-            # Hook
-            if 'hook' in script and segment_count < max_segments:
+            # Hook plus the first segments: (text, fallback duration, background)
+            slides = []
+            if 'hook' in script:
                 hook = script['hook']
-                audio_path = os.path.join(self.temp_dir, f"h_{segment_count}.mp3")
-                temp_files.append(audio_path)
-                
-                # Try to generate audio, but continue even if it fails
-                self.generate_audio(hook['text'], audio_path)
-                
-                clip = self.create_video_segment(
-                    hook['text'], audio_path, hook.get('duration', 5),
-                    bg_color=(40, 60, 120)
-                )
-                if clip:
-                    video_clips.append(clip)
-                    segment_count += 1
+                slides.append((hook['text'], hook.get('duration', 5), (40, 60, 120)))
+            for segment in script.get('segments', [])[:MAX_SEGMENTS - len(slides)]:
+                slides.append((segment['text'], segment.get('duration', 10), (30, 30, 30)))
             
-            # Main segments
-            for i, segment in enumerate(script.get('segments', [])[:2]):
-                if segment_count >= max_segments:
-                    break
-                    
-                audio_path = os.path.join(self.temp_dir, f"s_{i}.mp3")
+            # Narration; a failed clip becomes silence of the slide's default length
+            parts = []
+            for i, (text, duration, _) in enumerate(slides):
+                audio_path = os.path.join(self.temp_dir, f"n_{i}.mp3")
                 temp_files.append(audio_path)
-                
-                # Try to generate audio, but continue even if it fails
-                self.generate_audio(segment['text'], audio_path)
-                
-                clip = self.create_video_segment(
-                    segment['text'], audio_path, segment.get('duration', 10)
-                )
-                if clip:
-                    video_clips.append(clip)
-                    segment_count += 1
+                parts.append((self.get_audio(text, audio_path), duration))
+            
+            # One track for the whole video, timed from the MP3 frame headers
+            track_path = os.path.join(self.temp_dir, "narration.mp3")
+            temp_files.append(track_path)
+            durations = concat_mp3(parts, track_path) if parts else []
+            
+            animate = FreeConfig.SLIDE_ANIMATION == "ken_burns"
+            if animate:
+                from slide_motion import MOTIONS
+            failed = []
+            for i, ((text, _, bg_color), duration) in enumerate(zip(slides, durations)):
+                motion = MOTIONS[i % len(MOTIONS)] if animate else None
+                clip = self.create_video_segment(text, duration, bg_color=bg_color, motion=motion)
+                if clip is None:
+                    # Hold the bare background for the slide's time so later slides stay on cue
+                    clip = ColorClip(SLIDE_SIZE, color=bg_color, duration=duration)
+                    failed.append(i)
+                video_clips.append(clip)
+            
+            if len(failed) == len(slides):
+                video_clips = []
+            elif failed:
+                # Silence the failed slides' narration; the rest of the track keeps its timing
+                logger.warning(f"{len(failed)} slide(s) failed, silencing their narration")
+                for i in failed:
+                    parts[i] = (None, durations[i])
+                durations = concat_mp3(parts, track_path)
+            
+            # Music bed, looped to the video length and ducked under the narration, mixed in one stream
+            background_music = background_music or FreeConfig.BACKGROUND_MUSIC
+            if background_music and durations:
+                if os.path.exists(background_music):
+                    mix_path = os.path.join(self.temp_dir, "mix.wav")
+                    temp_files.append(mix_path)
+                    try:
+                        from music_mixer import mix_music
+                        mix_music(track_path, background_music, mix_path, sum(durations))
+                        track_path = mix_path
+                    except Exception as e:
+                        logger.warning(f"Music mix failed, using narration only: {e}")
+                else:
+                    logger.warning(f"Background music not found: {background_music}")
             
             # Export
             if video_clips:
                 logger.info(f"Combining {len(video_clips)} clips...")
                 final_video = concatenate_videoclips(video_clips, method="compose")
+                audio_clip = AudioFileClip(track_path)
+                final_video = final_video.set_audio(audio_clip)
                 
                 logger.info("Exporting...")
                 final_video.write_videofile(
                     output_path,
-                    fps=24,
+                    fps=VIDEO_FPS,
                     codec='libx264',
                     audio_codec='aac',
                     bitrate="500k",
@@ -233,6 +301,8 @@ class FreeVideoGenerator:
                 # Cleanup
                 logger.info("Cleanup...")
                 final_video.close()
+                if audio_clip is not None:
+                    audio_clip.close()
                 for clip in video_clips:
                     try:
                         clip.close()
@@ -256,6 +326,11 @@ class FreeVideoGenerator:
                             pass
                 
                 gc.collect()
+                
+                # Keep the export as a hard link to its blob (identical renders share one file)
+                if self.blob_store is not None:
+                    self.blob_store.put_file(output_path, owner=output_path, keep_source=True)
+                
                 logger.info(f"✅ Video: {output_path}")
                 return True
             else:
@@ -267,7 +342,7 @@ class FreeVideoGenerator:
             import traceback
             logger.error(traceback.format_exc())
             
-            for clip in video_clips:
+            for clip in video_clips + ([audio_clip] if audio_clip is not None else []):
                 try:
                     clip.close()
                 except: